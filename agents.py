@@ -1,85 +1,195 @@
 from crewai import Agent
 from tools.google_drive_tool import GoogleDriveTool
 from tools.social_media_tools import FacebookTool, TwitterTool, LinkedInTool
-from langchain_openai import ChatOpenAI
-from typing import Dict
+from tools.http_session import get_session
+from tools.dry_run import DryRunRecorder, get_dry_run
+from tools.ledger import PostLedger, get_ledger
+from llm_cache import CachedChatOpenAI, PersistentLLMCache, get_llm_cache
+from registry import registry
+from tracing import TokenUsageCallback, tracer
+import requests
+from typing import Callable, Dict, Optional
 
 
 class SocialMediaAgents:
+    """Builds the crew's agents on top of the shared component registry.
+
+    The LLM client, each tool and each agent are constructed once per process
+    (per distinct config section) and reused by every crew and task list.
+    """
+    
     def __init__(self, config: Dict):
         self.config = config
-        self.llm = ChatOpenAI(
+    
+    @property
+    def verbose(self) -> bool:
+        """Print agent transcripts; see logging.verbose"""
+        return bool(self.config.get('logging', {}).get('verbose', False))
+    
+    @property
+    def llm_cache(self) -> Optional[PersistentLLMCache]:
+        """Cache of this config's LLM client; dry runs measure real LLM usage and never use it"""
+        if self.config.get('dry_run', {}).get('enabled'):
+            return None
+        return get_llm_cache(self.config['openai'].get('cache'))
+    
+    @property
+    def llm(self) -> CachedChatOpenAI:
+        # The cache belongs to this client (False turns off langchain's global one), so
+        # dry-run and live profiles in one process each keep their own behaviour
+        return registry.get('llm', self.component_settings()['llm'], lambda: CachedChatOpenAI(
             model="gpt-3.5-turbo",
-            api_key=config['openai']['api_key']
-        )
-        
-        # Initialize tools
-        self.google_drive_tool = GoogleDriveTool(config['google_drive'])
-        self.facebook_tool = FacebookTool(config['facebook'])
-        self.twitter_tool = TwitterTool(config['twitter'])
-        self.linkedin_tool = LinkedInTool(config['linkedin'])
+            api_key=self.config['openai']['api_key'],
+            base_url=self.config['openai'].get('base_url'),
+            cache=self.llm_cache or False,
+            callbacks=[TokenUsageCallback(tracer)]
+        ))
+    
+    @property
+    def http_session(self) -> requests.Session:
+        return get_session(self.config.get('http'))
+    
+    @property
+    def post_ledger(self) -> Optional[PostLedger]:
+        return get_ledger(self.config.get('ledger'))
+    
+    @property
+    def dry_run(self) -> Optional[DryRunRecorder]:
+        return get_dry_run(self.config.get('dry_run'))
+    
+    def _tool_settings(self, section: str) -> Dict:
+        return {
+            section: self.config[section],
+            'http': self.config.get('http'),
+            'ledger': self.config.get('ledger'),
+            'dry_run': self.config.get('dry_run')
+        }
+    
+    def component_settings(self) -> Dict[str, Dict]:
+        """Registry settings of every shared component by kind; a changed entry means a rebuild"""
+        tools = {
+            'google_drive_tool': self.config['google_drive'],
+            'facebook_tool': self._tool_settings('facebook'),
+            'twitter_tool': self._tool_settings('twitter'),
+            'linkedin_tool': self._tool_settings('linkedin'),
+        }
+        llm = {'openai': self.config['openai'], 'dry_run': bool(self.config.get('dry_run', {}).get('enabled'))}
+        # Agents carry per-run executor state, so profiles never share one instance
+        agent = {'llm': llm, 'profile': self.config.get('profile'), 'verbose': self.verbose}
+        return {
+            'llm': llm,
+            **tools,
+            'agent:content_manager': {**agent, 'tool': tools['google_drive_tool']},
+            'agent:facebook': {**agent, 'tool': tools['facebook_tool']},
+            'agent:twitter': {**agent, 'tool': tools['twitter_tool']},
+            'agent:linkedin': {**agent, 'tool': tools['linkedin_tool']},
+            'agent:coordinator': agent,
+        }
+    
+    @property
+    def google_drive_tool(self) -> GoogleDriveTool:
+        return registry.get('google_drive_tool', self.component_settings()['google_drive_tool'],
+                            lambda: GoogleDriveTool(self.config['google_drive']))
+    
+    @property
+    def facebook_tool(self) -> FacebookTool:
+        return registry.get('facebook_tool', self.component_settings()['facebook_tool'],
+                            lambda: FacebookTool(self.config['facebook'], self.http_session, self.post_ledger,
+                                                 self.config.get('http'), self.dry_run))
+    
+    @property
+    def twitter_tool(self) -> TwitterTool:
+        return registry.get('twitter_tool', self.component_settings()['twitter_tool'],
+                            lambda: TwitterTool(self.config['twitter'], self.http_session, self.post_ledger,
+                                                self.config.get('http'), self.dry_run))
+    
+    @property
+    def linkedin_tool(self) -> LinkedInTool:
+        return registry.get('linkedin_tool', self.component_settings()['linkedin_tool'],
+                            lambda: LinkedInTool(self.config['linkedin'], self.http_session, self.post_ledger,
+                                                 self.config.get('http'), self.dry_run))
+    
+    def _shared_agent(self, name: str, factory: Callable[[], Agent]) -> Agent:
+        """Return the cached agent for this profile's settings, creating it once"""
+        kind = f'agent:{name}'
+        return registry.get(kind, self.component_settings()[kind], factory)
     
     def content_manager_agent(self) -> Agent:
         """Agent responsible for fetching and managing content from Google Drive"""
-        return Agent(
-            role='Content Manager',
-            goal='Fetch and organize content from Google Drive for social media posting',
-            backstory="""You are a skilled content manager who specializes in organizing 
-            and preparing content for social media distribution. You have access to Google Drive 
-            and can retrieve specific content files for different social media platforms.""",
-            tools=[self.google_drive_tool],
-            llm=self.llm,
-            verbose=True
+        return self._shared_agent(
+            'content_manager',
+            lambda: Agent(
+                role='Content Manager',
+                goal='Fetch and organize content from Google Drive for social media posting',
+                backstory="""You are a skilled content manager who specializes in organizing 
+                and preparing content for social media distribution. You have access to Google Drive 
+                and can retrieve specific content files for different social media platforms.""",
+                tools=[self.google_drive_tool],
+                llm=self.llm,
+                verbose=self.verbose
+            )
         )
     
     def facebook_agent(self) -> Agent:
         """Agent responsible for posting to Facebook"""
-        return Agent(
-            role='Facebook Social Media Manager',
-            goal='Post engaging content to Facebook page',
-            backstory="""You are a Facebook social media specialist who knows how to craft 
-            engaging posts that resonate with Facebook audiences. You understand Facebook's 
-            best practices and can adapt content accordingly.""",
-            tools=[self.facebook_tool],
-            llm=self.llm,
-            verbose=True
+        return self._shared_agent(
+            'facebook',
+            lambda: Agent(
+                role='Facebook Social Media Manager',
+                goal='Post engaging content to Facebook page',
+                backstory="""You are a Facebook social media specialist who knows how to craft 
+                engaging posts that resonate with Facebook audiences. You understand Facebook's 
+                best practices and can adapt content accordingly.""",
+                tools=[self.facebook_tool],
+                llm=self.llm,
+                verbose=self.verbose
+            )
         )
     
     def twitter_agent(self) -> Agent:
         """Agent responsible for posting to Twitter/X"""
-        return Agent(
-            role='Twitter Social Media Manager',
-            goal='Post concise and engaging content to Twitter/X',
-            backstory="""You are a Twitter/X specialist who excels at creating concise, 
-            impactful tweets. You understand the platform's character limits and trending 
-            topics, and can adapt content to fit Twitter's fast-paced environment.""",
-            tools=[self.twitter_tool],
-            llm=self.llm,
-            verbose=True
+        return self._shared_agent(
+            'twitter',
+            lambda: Agent(
+                role='Twitter Social Media Manager',
+                goal='Post concise and engaging content to Twitter/X',
+                backstory="""You are a Twitter/X specialist who excels at creating concise, 
+                impactful tweets. You understand the platform's character limits and trending 
+                topics, and can adapt content to fit Twitter's fast-paced environment.""",
+                tools=[self.twitter_tool],
+                llm=self.llm,
+                verbose=self.verbose
+            )
         )
     
     def linkedin_agent(self) -> Agent:
         """Agent responsible for posting to LinkedIn"""
-        return Agent(
-            role='LinkedIn Professional Content Manager',
-            goal='Post professional and thought-leadership content to LinkedIn',
-            backstory="""You are a LinkedIn content specialist who understands professional 
-            networking and thought leadership. You can craft content that establishes 
-            authority and engages with professional audiences.""",
-            tools=[self.linkedin_tool],
-            llm=self.llm,
-            verbose=True
+        return self._shared_agent(
+            'linkedin',
+            lambda: Agent(
+                role='LinkedIn Professional Content Manager',
+                goal='Post professional and thought-leadership content to LinkedIn',
+                backstory="""You are a LinkedIn content specialist who understands professional 
+                networking and thought leadership. You can craft content that establishes 
+                authority and engages with professional audiences.""",
+                tools=[self.linkedin_tool],
+                llm=self.llm,
+                verbose=self.verbose
+            )
         )
     
     def coordinator_agent(self) -> Agent:
         """Agent responsible for coordinating the entire posting process"""
-        return Agent(
-            role='Social Media Coordinator',
-            goal='Coordinate and oversee the entire social media posting process',
-            backstory="""You are an experienced social media coordinator who manages 
-            multiple platforms and ensures consistent brand messaging across all channels. 
-            You coordinate with content managers and platform specialists to execute 
-            successful social media campaigns.""",
-            llm=self.llm,
-            verbose=True
+        return self._shared_agent(
+            'coordinator',
+            lambda: Agent(
+                role='Social Media Coordinator',
+                goal='Coordinate and oversee the entire social media posting process',
+                backstory="""You are an experienced social media coordinator who manages 
+                multiple platforms and ensures consistent brand messaging across all channels. 
+                You coordinate with content managers and platform specialists to execute 
+                successful social media campaigns.""",
+                llm=self.llm,
+                verbose=self.verbose
+            )
         )
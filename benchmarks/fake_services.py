@@ -0,0 +1,333 @@
+"""Local stand-ins for Google Drive, the Graph API, Twitter, LinkedIn and OpenAI.
+
+One threaded HTTP server answers every service under its own path prefix:
+
+    /drive/v3/...                 Drive v3 files.list, files.get and alt=media
+    /facebook/v<version>/<page>/feed
+    /twitter/2/tweets
+    /linkedin/v2/ugcPosts
+    /openai/v1/chat/completions   (JSON, or server-sent events with "stream": true)
+
+Each service has its own latency, jitter, error rate and rate-limit rate, and
+rate-limited responses carry the same headers and bodies as the real APIs so
+the rate-limit manager reacts to them. ``GET /_stats`` returns every accepted
+post with its arrival time and ``POST /_control`` changes the settings or the
+content revision while the server runs.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+SERVICES = ('drive', 'facebook', 'twitter', 'linkedin', 'openai')
+
+DEFAULT_SERVICE_SETTINGS = {
+    'latency_ms': 50,
+    'jitter_ms': 10,
+    'error_rate': 0.0,
+    'rate_limit_rate': 0.0
+}
+
+
+class FakeServiceState:
+    """Settings, Drive content and the log of accepted posts, shared by all handler threads"""
+
+    def __init__(self, settings: Optional[Dict[str, Dict]] = None, content_bytes: int = 600, seed: int = 0):
+        self._lock = threading.Lock()
+        self.settings = {
+            service: {**DEFAULT_SERVICE_SETTINGS, **(settings or {}).get(service, {})}
+            for service in SERVICES
+        }
+        self.content_bytes = content_bytes
+        self.revision = 0
+        self.random = random.Random(seed)
+        self.file_names: Dict[str, str] = {}
+        self.posts = []
+        self.requests = {service: 0 for service in SERVICES}
+
+    def control(self, changes: Dict):
+        with self._lock:
+            if 'revision' in changes:
+                self.revision = changes['revision']
+            for service, values in changes.get('settings', {}).items():
+                self.settings[service].update(values)
+
+    def outcome(self, service: str) -> str:
+        """Sleep for the service's latency and pick 'ok', 'error' or 'rate_limited'"""
+        with self._lock:
+            settings = self.settings[service]
+            self.requests[service] += 1
+            delay = max(0.0, self.random.gauss(settings['latency_ms'], settings['jitter_ms'])) / 1000
+            roll = self.random.random()
+        time.sleep(delay)
+
+        if roll < settings['rate_limit_rate']:
+            return 'rate_limited'
+        if roll < settings['rate_limit_rate'] + settings['error_rate']:
+            return 'error'
+        return 'ok'
+
+    def record_post(self, service: str, account: str, text: str, reply: bool = False) -> str:
+        with self._lock:
+            post_id = str(len(self.posts) + 1)
+            self.posts.append({
+                'service': service,
+                'account': account,
+                'id': post_id,
+                'bytes': len(text.encode('utf-8')),
+                'reply': reply,
+                'received_at': time.time()
+            })
+        return post_id
+
+    def file_id(self, name: str) -> str:
+        file_id = 'f' + hashlib.sha1(name.encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            self.file_names[file_id] = name
+        return file_id
+
+    def file_content(self, name: str) -> bytes:
+        header = f"[{name} revision {self.revision}] "
+        filler = "Benchmark copy for the posting workflow. "
+        body = (header + filler * (self.content_bytes // len(filler) + 1))[:max(self.content_bytes, len(header))]
+        return body.encode('utf-8')
+
+    def file_metadata(self, name: str) -> Dict:
+        content = self.file_content(name)
+        return {
+            'id': self.file_id(name),
+            'name': name,
+            'md5Checksum': hashlib.md5(content).hexdigest(),
+            'modifiedTime': datetime.fromtimestamp(1700000000 + self.revision, timezone.utc).isoformat(),
+            'size': str(len(content))
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'posts': list(self.posts), 'requests': dict(self.requests), 'revision': self.revision}
+
+
+def _chat_reply(messages) -> str:
+    """Scripted ReAct turn: call the posting tool once, then give a final answer"""
+    prompt = "\n".join(str(message.get('content', '')) for message in messages)
+    tools = re.search(r"only one name of \[(.*?)\]", prompt)
+    tool_names = [name.strip() for name in tools.group(1).split(',')] if tools else []
+    poster = next((name for name in tool_names if name.endswith('Poster')), None)
+    scratchpad = prompt.rsplit("Begin!", 1)[-1]
+
+    digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]
+    if poster and "Action Input:" not in scratchpad:
+        arguments = json.dumps({'content': f"Benchmark post {digest}"})
+        return f"Thought: I should publish the content.\nAction: {poster}\nAction Input: {arguments}"
+
+    # Answers differ with the prompt, so a new content revision reaches the posting tasks as new copy
+    observation = scratchpad.rsplit("Observation:", 1)[-1].strip() if "Observation:" in scratchpad \
+        else f"Content ready {digest}"
+    return f"Thought: I now can give a great answer\nFinal Answer: {observation[:500]}"
+
+
+def _sse_chunks(completion: Dict, reply: str, usage: Dict, stream_options: Dict) -> bytes:
+    """Body of a streamed chat completion: one chunk per word, then finish_reason, [usage] and [DONE]"""
+    words = re.findall(r"\S*\s*", reply)[:-1] or [""]
+    deltas = [{'role': 'assistant', 'content': words[0]}] + [{'content': word} for word in words[1:]]
+    chunks = [{**completion, 'object': 'chat.completion.chunk',
+               'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]} for delta in deltas]
+    chunks.append({**completion, 'object': 'chat.completion.chunk',
+                   'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+    if stream_options.get('include_usage'):
+        chunks.append({**completion, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})
+    events = [f"data: {json.dumps(chunk)}\n\n" for chunk in chunks] + ["data: [DONE]\n\n"]
+    return "".join(events).encode('utf-8')
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: 'FakeServiceServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body=b"", headers: Optional[Dict] = None, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/_stats':
+            return self._send(200, self.server.state.stats())
+        if url.path.startswith('/drive/'):
+            return self._drive(url)
+        self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._body()
+        if url.path == '/_control':
+            self.server.state.control(json.loads(body or b"{}"))
+            return self._send(200, {'ok': True})
+
+        handlers = {
+            'facebook': self._facebook,
+            'twitter': self._twitter,
+            'linkedin': self._linkedin,
+            'openai': self._openai,
+        }
+        service = url.path.split('/')[1]
+        if service not in handlers:
+            return self._send(404, {'error': 'not found'})
+        handlers[service](url, body)
+
+    def _drive(self, url):
+        state = self.server.state
+        outcome = state.outcome('drive')
+        if outcome == 'rate_limited':
+            return self._send(429, {'error': {'code': 429, 'message': 'Rate Limit Exceeded'}})
+        if outcome == 'error':
+            return self._send(500, {'error': {'code': 500, 'message': 'Backend Error'}})
+
+        query = parse_qs(url.query)
+        parts = url.path.rstrip('/').split('/')
+        if parts[-1] == 'files':
+            names = [re.sub(r"\\(.)", r"\1", name) for name in
+                     re.findall(r"name='((?:[^'\\]|\\.)*)'", query.get('q', [''])[0])]
+            return self._send(200, {'files': [state.file_metadata(name) for name in names]})
+
+        name = state.file_names.get(parts[-1])
+        if name is None:
+            return self._send(404, {'error': {'code': 404, 'message': 'File not found'}})
+        if query.get('alt') == ['media']:
+            return self._send(200, state.file_content(name), content_type='text/plain')
+        return self._send(200, state.file_metadata(name))
+
+    def _facebook(self, url, body):
+        outcome = self.server.state.outcome('facebook')
+        if outcome == 'rate_limited':
+            return self._send(400, {'error': {
+                'message': '(#4) Application request limit reached', 'type': 'OAuthException', 'code': 4
+            }}, headers={'x-app-usage': json.dumps({'call_count': 100, 'total_cputime': 40, 'total_time': 40})})
+        if outcome == 'error':
+            return self._send(500, {'error': {'message': 'An unexpected error has occurred', 'code': 2}})
+
+        page = url.path.split('/')[-2]
+        message = parse_qs(body.decode('utf-8')).get('message', [''])[0]
+        post_id = self.server.state.record_post('facebook', page, message)
+        self._send(200, {'id': f"{page}_{post_id}"},
+                   headers={'x-app-usage': json.dumps({'call_count': 1, 'total_cputime': 1, 'total_time': 1})})
+
+    def _twitter(self, url, body):
+        outcome = self.server.state.outcome('twitter')
+        reset = int(time.time()) + 900
+        if outcome == 'rate_limited':
+            return self._send(429, {'title': 'Too Many Requests', 'detail': 'Too Many Requests', 'status': 429},
+                              headers={'x-rate-limit-limit': 200, 'x-rate-limit-remaining': 0,
+                                       'x-rate-limit-reset': reset})
+        if outcome == 'error':
+            return self._send(503, {'title': 'Service Unavailable', 'status': 503})
+
+        authorization = self.headers.get('Authorization', '')
+        token = re.search(r'oauth_token="([^"]+)"', authorization)
+        payload = json.loads(body or b"{}")
+        text = payload.get('text', '')
+        # Thread replies are parts of a post already counted
+        post_id = self.server.state.record_post('twitter', token.group(1) if token else '', text,
+                                                reply='reply' in payload)
+        self._send(201, {'data': {'id': post_id, 'text': text}},
+                   headers={'x-rate-limit-limit': 200, 'x-rate-limit-remaining': 199,
+                            'x-rate-limit-reset': reset})
+
+    def _linkedin(self, url, body):
+        outcome = self.server.state.outcome('linkedin')
+        if outcome == 'rate_limited':
+            return self._send(429, {'status': 429, 'message': 'Too Many Requests'}, headers={'Retry-After': 3600})
+        if outcome == 'error':
+            return self._send(500, {'status': 500, 'message': 'Internal Server Error'})
+
+        payload = json.loads(body or b"{}")
+        text = payload['specificContent']['com.linkedin.ugc.ShareContent']['shareCommentary']['text']
+        post_id = self.server.state.record_post('linkedin', payload.get('author', ''), text)
+        urn = f"urn:li:share:{post_id}"
+        self._send(201, {'id': urn}, headers={'x-restli-id': urn})
+
+    def _openai(self, url, body):
+        outcome = self.server.state.outcome('openai')
+        if outcome == 'rate_limited':
+            return self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                              headers={'Retry-After': 1})
+        if outcome == 'error':
+            return self._send(500, {'error': {'message': 'The server had an error', 'type': 'server_error'}})
+
+        request = json.loads(body or b"{}")
+        reply = _chat_reply(request.get('messages', []))
+        prompt_tokens = sum(len(str(message.get('content', ''))) for message in request.get('messages', [])) // 4
+        completion_tokens = len(reply) // 4
+        completion = {
+            'id': f"chatcmpl-{random.getrandbits(48):x}",
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-3.5-turbo')
+        }
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+        if request.get('stream'):
+            return self._send(200, _sse_chunks(completion, reply, usage, request.get('stream_options') or {}),
+                              content_type='text/event-stream')
+
+        self._send(200, {
+            **completion,
+            'object': 'chat.completion',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': reply},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        })
+
+
+class FakeServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, state: FakeServiceState):
+        self.state = state
+        super().__init__(address, FakeServiceHandler)
+
+
+def serve(port: int, settings: Optional[Dict] = None, content_bytes: int = 600, ready=None):
+    """Run the fake services until the process is terminated"""
+    server = FakeServiceServer(('127.0.0.1', port), FakeServiceState(settings, content_bytes))
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve fake platform APIs for offline benchmarks')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"Serving fake Drive, Facebook, Twitter, LinkedIn and OpenAI APIs on http://127.0.0.1:{args.port}")
+    serve(args.port, {service: {'latency_ms': args.latency_ms} for service in SERVICES})
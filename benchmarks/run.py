@@ -0,0 +1,343 @@
+"""End-to-end posting benchmark that needs no network access.
+
+Starts the fake services from ``benchmarks.fake_services`` in a separate
+process, writes a config for N account profiles pointing at them, and drives
+``SocialMediaScheduler`` (and through it ``SocialMediaCrew``) for M posting
+rounds. Each round queues one job in the job store and runs it, so every
+account posts once per platform per round.
+
+Reports throughput in posts/sec, p50/p99 end-to-end latency (job queued to
+post accepted by the fake API) and the peak RSS of the benchmark process.
+
+    python -m benchmarks.run --accounts 20 --posts 5 --latency-ms 80
+    python -m benchmarks.run --mode async --accounts 200 --posts 2
+    python -m benchmarks.run --mode parallel --accounts 2 --posts 2
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.fake_services import SERVICES, serve  # noqa: E402
+from tools.async_http import transport_mounts  # noqa: E402
+from tools.http_session import TimeoutHTTPAdapter, get_session, http_settings, request_timeout  # noqa: E402
+
+
+PLATFORMS = ('facebook', 'twitter', 'linkedin')
+
+# Real API prefixes and the fake server path that stands in for each
+REDIRECTS = {
+    'https://graph.facebook.com/': 'facebook/',
+    'https://graph-video.facebook.com/': 'facebook/',
+    'https://api.twitter.com/': 'twitter/',
+    'https://upload.twitter.com/': 'twitter/',
+    'https://api.linkedin.com/': 'linkedin/',
+}
+
+
+class RedirectingAdapter(TimeoutHTTPAdapter):
+    """Sends platform API calls to the fake server.
+
+    The response keeps the original URL so the rate-limit manager and the
+    tracer see the same hosts they would see in production.
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        self.base_url = base_url.rstrip('/') + '/'
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        original = request.url
+        for prefix, path in REDIRECTS.items():
+            if original.startswith(prefix):
+                request.url = self.base_url + path + original[len(prefix):]
+                break
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            request.url = original
+        response.url = original
+        return response
+
+
+class RedirectingTransport(httpx.AsyncHTTPTransport):
+    """httpx counterpart of RedirectingAdapter for the async workflow"""
+
+    def __init__(self, base_url: str, **kwargs):
+        self.base_url = base_url.rstrip('/') + '/'
+        super().__init__(**kwargs)
+
+    async def handle_async_request(self, request):
+        original = request.url
+        for prefix, path in REDIRECTS.items():
+            if str(original).startswith(prefix):
+                request.url = httpx.URL(self.base_url + path + str(original)[len(prefix):])
+                break
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            # The response reports request.url, so put the real one back
+            request.url = original
+
+
+def install_redirects(http_config: Dict, base_url: str):
+    """Mount the redirecting adapter/transport on the HTTP clients the tools will use"""
+    settings = http_settings(http_config)
+    adapter = RedirectingAdapter(
+        base_url,
+        timeout=request_timeout(settings),
+        pool_connections=settings['pool_connections'],
+        pool_maxsize=settings['pool_maxsize']
+    )
+    session = get_session(http_config)
+    for prefix in REDIRECTS:
+        session.mount(prefix, adapter)
+
+    transport = RedirectingTransport(base_url, limits=httpx.Limits(
+        max_connections=settings['async_max_connections'], max_keepalive_connections=settings['pool_maxsize']))
+    for prefix in REDIRECTS:
+        transport_mounts[prefix.rstrip('/')] = transport
+
+
+def build_config(base_url: str, args) -> Dict:
+    """Config with one profile per simulated account, all pointing at the fakes"""
+    unlimited = {'capacity': 1000000, 'per_seconds': 1}
+    http_config = {'pool_connections': 10, 'pool_maxsize': max(20, args.workers * 3)}
+
+    profiles = []
+    for index in range(args.accounts):
+        name = f"acct-{index:04d}"
+        profiles.append({
+            'name': name,
+            'facebook': {'access_token': f"fb-token-{index}", 'page_id': f"page{index}"},
+            'twitter': {'access_token': f"{1000 + index}-tw-token", 'access_token_secret': f"tw-secret-{index}"},
+            'linkedin': {'access_token': f"li-token-{index}", 'person_id': f"person{index}"},
+            'content_mapping': {platform: f"{name}_{platform}.txt" for platform in PLATFORMS}
+        })
+
+    return {
+        'google_drive': {
+            'credentials_file': 'unused_credentials.json',
+            'content_folder_id': 'benchmark-folder',
+            'scopes': ['https://www.googleapis.com/auth/drive.readonly'],
+            'api_endpoint': f"{base_url}/drive/v3/",
+            'cache': {'enabled': not args.no_drive_cache, 'directory': '.drive_cache'}
+        },
+        'facebook': {'access_token': 'fb-token', 'page_id': 'page'},
+        'twitter': {
+            'api_key': 'tw-key', 'api_secret': 'tw-secret',
+            'access_token': '999-tw-token', 'access_token_secret': 'tw-token-secret',
+            'bearer_token': 'tw-bearer'
+        },
+        'linkedin': {'access_token': 'li-token', 'person_id': 'person'},
+        'openai': {
+            'api_key': 'benchmark',
+            'base_url': f"{base_url}/openai/v1",
+            'cache': {'enabled': not args.no_llm_cache, 'path': 'llm_cache.db'}
+        },
+        'rate_limits': {'buckets': {platform: unlimited for platform in PLATFORMS}},
+        'ledger': {'enabled': True, 'path': 'post_ledger.db'},
+        'tracing': {'enabled': True, 'jsonl_path': None, 'print_summary': False},
+        'http': http_config,
+        'schedule': {'time': '23:59', 'timezone': 'UTC', 'job_store': 'jobs.db'},
+        'content_mapping': {platform: f"{platform}_content.txt" for platform in PLATFORMS},
+        'workflow': {'mode': args.mode, 'platform_timeout': 300, 'prefetch': True},
+        'profiles': profiles,
+        'engine': {'max_workers': args.workers, 'platform_concurrency': {}}
+    }
+
+
+def write_google_token():
+    """Cached user token so the Drive tool never starts the interactive OAuth flow"""
+    with open('token.json', 'w') as f:
+        json.dump({
+            'token': 'benchmark-access-token',
+            'refresh_token': 'benchmark-refresh-token',
+            'client_id': 'benchmark.apps.googleusercontent.com',
+            'client_secret': 'benchmark-secret',
+            'expiry': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + 30 * 86400))
+        }, f)
+
+
+def start_fake_services(args) -> Tuple[multiprocessing.Process, str]:
+    settings = {
+        service: {
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate,
+            'rate_limit_rate': args.rate_limit_rate if service in PLATFORMS else 0.0
+        }
+        for service in SERVICES
+    }
+    for override in args.service_latency or []:
+        service, value = override.split('=', 1)
+        settings[service]['latency_ms'] = float(value)
+
+    # A separate process keeps the servers out of the measured RSS and GIL
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    process = context.Process(target=serve, args=(0, settings, args.content_bytes, ready), daemon=True)
+    process.start()
+    port = ready.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_benchmark(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix='postbench-')
+    process, base_url = start_fake_services(args)
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        config = build_config(base_url, args)
+        with open('config.json', 'w') as f:
+            json.dump(config, f, indent=2)
+        write_google_token()
+        install_redirects(config['http'], base_url)
+
+        output = sys.stdout if args.verbose else io.StringIO()
+        with contextlib.redirect_stdout(output):
+            from scheduler import SocialMediaScheduler
+            logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+            scheduler = SocialMediaScheduler('config.json')
+
+        round_starts = []
+        started = time.time()
+        for round_number in range(args.posts):
+            requests.post(f"{base_url}/_control", json={'revision': round_number + 1})
+            round_starts.append(time.time())
+            scheduler.add_job(datetime.now(scheduler.timezone), name=f"benchmark-round-{round_number + 1}")
+            with contextlib.redirect_stdout(output):
+                scheduler.run_due_jobs()
+        wall_seconds = time.time() - started
+
+        stats = requests.get(f"{base_url}/_stats").json()
+        failed_jobs = len(scheduler.store.list_jobs('failed'))
+        deferred_jobs = sum(1 for job in scheduler.store.list_jobs('pending')
+                            if job.name.startswith('rate-limit-retry'))
+    finally:
+        os.chdir(previous_dir)
+        process.terminate()
+        process.join(5)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # A post's latency runs from the start of the round that queued it
+    posts = [post for post in stats['posts'] if not post.get('reply')]
+    latencies = []
+    for post in posts:
+        round_start = max((start for start in round_starts if start <= post['received_at']), default=started)
+        latencies.append(post['received_at'] - round_start)
+
+    expected = args.accounts * args.posts * len(PLATFORMS)
+    published = len(posts)
+    return {
+        'mode': args.mode,
+        'accounts': args.accounts,
+        'posts_per_account': args.posts,
+        'expected_posts': expected,
+        'published_posts': published,
+        'failed_jobs': failed_jobs,
+        'deferred_jobs': deferred_jobs,
+        'wall_seconds': round(wall_seconds, 3),
+        'posts_per_second': round(published / wall_seconds, 2) if wall_seconds else None,
+        'latency_p50_seconds': round(percentile(latencies, 0.5), 3) if latencies else None,
+        'latency_p99_seconds': round(percentile(latencies, 0.99), 3) if latencies else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'requests': stats['requests'],
+        'workdir': workdir if args.keep else None
+    }
+
+
+def _seconds(value: Optional[float]) -> str:
+    return 'n/a' if value is None else f"{value}s"
+
+
+def print_report(result: Dict):
+    print(f"📊 Benchmark ({result['mode']} mode): {result['accounts']} account(s) x "
+          f"{result['posts_per_account']} post(s) x {len(PLATFORMS)} platforms")
+    print(f"   Published:      {result['published_posts']}/{result['expected_posts']} "
+          f"({result['failed_jobs']} failed job(s), {result['deferred_jobs']} deferred retry job(s))")
+    print(f"   Wall time:      {result['wall_seconds']}s")
+    print(f"   Throughput:     {result['posts_per_second']} posts/sec")
+    print(f"   Latency p50:    {_seconds(result['latency_p50_seconds'])}")
+    print(f"   Latency p99:    {_seconds(result['latency_p99_seconds'])}")
+    print(f"   Peak RSS:       {result['peak_rss_mb']} MB")
+    print(f"   API requests:   {result['requests']}")
+    if result['workdir']:
+        print(f"   Work directory: {result['workdir']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Offline end-to-end posting benchmark')
+    parser.add_argument('--accounts', type=int, default=5, help='Number of account profiles (N)')
+    parser.add_argument('--posts', type=int, default=3, help='Posting rounds per account (M)')
+    parser.add_argument('--mode', choices=['direct', 'async', 'sequential', 'parallel'], default='direct',
+                        help='Workflow mode to benchmark')
+    parser.add_argument('--workers', type=int, default=4, help='engine.max_workers')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Mean latency of every fake API')
+    parser.add_argument('--jitter-ms', type=float, default=10, help='Standard deviation of the latency')
+    parser.add_argument('--service-latency', action='append', metavar='SERVICE=MS',
+                        help='Override the latency of one service (repeatable)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with a 5xx')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='Fraction of posting calls answered with a rate-limit response')
+    parser.add_argument('--content-bytes', type=int, default=600, help='Size of each Drive content file')
+    parser.add_argument('--no-drive-cache', action='store_true', help='Disable the Drive content cache')
+    parser.add_argument('--no-llm-cache', action='store_true', help='Disable the persistent LLM cache')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary work directory')
+    parser.add_argument('--verbose', action='store_true', help='Show workflow output and logs')
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+
+    # crewai's anonymous telemetry would try to reach the network
+    os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
+
+    result = run_benchmark(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
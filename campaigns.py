@@ -0,0 +1,218 @@
+import csv
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pytz
+
+
+PLATFORMS = ('facebook', 'twitter', 'linkedin')
+
+# Rows are validated and written to the job store this many at a time
+BATCH_SIZE = 500
+
+# Only the first errors are kept for the report; the rest are just counted
+MAX_REPORTED_ERRORS = 50
+
+# Drive folder calendars name each file "<time>_<account>_<platform>.<ext>",
+# e.g. "2024-06-01T09-30_brand-a_twitter.txt"
+DRIVE_NAME_PATTERN = re.compile(
+    r"^(?P<time>\d{4}-\d{2}-\d{2}[T ]\d{2}[-:.]?\d{2})_(?P<account>.+)_(?P<platform>facebook|twitter|linkedin)\.\w+$",
+    re.IGNORECASE
+)
+
+
+class CampaignError(ValueError):
+    """A calendar row that cannot be scheduled"""
+
+
+@dataclass
+class CampaignPost:
+    """One scheduled post: a file published to one platform of one account"""
+    due_at: datetime
+    account: str
+    platform: str
+    file: str
+    media: Optional[str] = None
+    # Drive folder holding the file when it is not the profile's content folder
+    folder_id: Optional[str] = None
+
+    @property
+    def dedupe_key(self) -> str:
+        """Identity of this row, so importing a calendar twice adds nothing"""
+        fields = [str(self.due_at.timestamp()), self.account, self.platform, self.file,
+                  self.media or '', self.folder_id or '']
+        return 'campaign:' + hashlib.sha256("\x1f".join(fields).encode('utf-8')).hexdigest()
+
+    def payload(self, single_profile: bool) -> Dict:
+        """Job payload: post just this platform with the row's file in place of the profile's own"""
+        overrides = {
+            'content_mapping': {self.platform: self.file},
+            # A row without media must not pick up the profile's default media
+            'media_mapping': {self.platform: self.media},
+            # One platform per job, so there is nothing to resume across platforms
+            'checkpoint': {'enabled': False}
+        }
+        if self.folder_id:
+            overrides['google_drive'] = {'content_folder_id': self.folder_id}
+
+        payload = {'platforms': [self.platform], 'overrides': overrides}
+        if not single_profile:
+            payload['profiles'] = [self.account]
+        return payload
+
+
+def parse_time(value: str, timezone: str) -> datetime:
+    """Timezone-aware datetime from ISO text; naive times are read in ``timezone``"""
+    value = value.strip()
+    # Drive file names cannot hold ':', so 09-30 and 0930 are accepted as well
+    match = re.fullmatch(r"(\d{4}-\d{2}-\d{2})[T ](\d{2})[-.]?(\d{2})", value)
+    if match:
+        value = f"{match.group(1)}T{match.group(2)}:{match.group(3)}"
+    try:
+        due_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise CampaignError(f"invalid time '{value}' (expected YYYY-MM-DDTHH:MM)")
+    if due_at.tzinfo is None:
+        return pytz.timezone(timezone).localize(due_at)
+    return due_at
+
+
+class CampaignValidator:
+    """Checks calendar rows one at a time against the profiles in the config"""
+
+    def __init__(self, config: Dict, now: Optional[float] = None):
+        self.timezone = config['schedule'].get('timezone', 'Asia/Kolkata')
+        profiles = config.get('profiles')
+        self.single_profile = not profiles
+        self.accounts = {'default'} if self.single_profile else {profile['name'] for profile in profiles}
+        self.now = now if now is not None else datetime.now(pytz.utc).timestamp()
+
+    def validate(self, row: Dict, folder_id: Optional[str] = None) -> CampaignPost:
+        """Turn a raw row into a CampaignPost or raise CampaignError"""
+        row = {key.strip().lower(): (value.strip() if isinstance(value, str) else value)
+               for key, value in row.items() if key}
+
+        missing = [field for field in ('time', 'platform', 'file') if not row.get(field)]
+        if missing:
+            raise CampaignError(f"missing {', '.join(missing)}")
+
+        platform = row['platform'].lower()
+        if platform not in PLATFORMS:
+            raise CampaignError(f"unknown platform '{row['platform']}'")
+
+        account = row.get('account') or 'default'
+        if account not in self.accounts:
+            raise CampaignError(f"unknown account '{account}'")
+
+        timezone = row.get('timezone') or self.timezone
+        if timezone not in pytz.all_timezones_set:
+            raise CampaignError(f"unknown timezone '{timezone}'")
+        due_at = parse_time(str(row['time']), timezone)
+        if due_at.timestamp() < self.now:
+            raise CampaignError(f"time {due_at.isoformat()} is in the past")
+
+        return CampaignPost(due_at, account, platform, row['file'], row.get('media') or None, folder_id)
+
+
+def iter_csv(path: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line number, row) from a CSV calendar with a header row"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line number, row) from a JSON-lines calendar; bad JSON becomes an error row"""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {'_error': f"invalid JSON: {str(e)}"}
+            yield line_number, row if isinstance(row, dict) else {'_error': "expected a JSON object"}
+
+
+def iter_drive_folder(drive_tool, folder_id: str) -> Iterator[Tuple[str, Dict]]:
+    """Yield (file name, row) for each calendar-named file in a Drive folder"""
+    for item in drive_tool.list_folder(folder_id):
+        if item.get('mimeType', '').startswith(('image/', 'video/')):
+            # Media is attached through CSV/JSONL rows, not posted on its own
+            continue
+        match = DRIVE_NAME_PATTERN.match(item['name'])
+        if match is None:
+            yield item['name'], {'_error': "name does not match <time>_<account>_<platform>.<ext>"}
+            continue
+        yield item['name'], {
+            'time': match.group('time'),
+            'account': match.group('account'),
+            'platform': match.group('platform'),
+            'file': item['name']
+        }
+
+
+def import_rows(store, config: Dict, rows: Iterable[Tuple[object, Dict]], folder_id: Optional[str] = None,
+                validate_only: bool = False) -> Dict:
+    """Validate rows as they stream in and queue valid ones in batches.
+
+    Only one batch is held in memory at a time. Returns counts and the first
+    ``MAX_REPORTED_ERRORS`` errors as "<line>: <message>".
+    """
+    validator = CampaignValidator(config)
+    report = {'rows': 0, 'valid': 0, 'queued': 0, 'duplicates': 0, 'invalid': 0, 'errors': []}
+    batch: List[Tuple[str, datetime, Dict, str]] = []
+
+    def flush():
+        if batch and not validate_only:
+            queued = store.add_jobs(batch)
+            report['queued'] += queued
+            report['duplicates'] += len(batch) - queued
+        batch.clear()
+
+    for location, row in rows:
+        report['rows'] += 1
+        try:
+            if '_error' in row:
+                raise CampaignError(row['_error'])
+            post = validator.validate(row, folder_id)
+        except CampaignError as e:
+            report['invalid'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append(f"{location}: {str(e)}")
+            continue
+
+        report['valid'] += 1
+        batch.append((f"campaign:{post.platform}", post.due_at, post.payload(validator.single_profile),
+                      post.dedupe_key))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+
+    flush()
+    return report
+
+
+def import_file(store, config: Dict, path: str, validate_only: bool = False) -> Dict:
+    """Import a .csv or .jsonl calendar"""
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        rows = iter_jsonl(path)
+    elif path.lower().endswith('.csv'):
+        rows = iter_csv(path)
+    else:
+        raise CampaignError(f"{path}: calendars must be .csv or .jsonl")
+    return import_rows(store, config, rows, validate_only=validate_only)
+
+
+def import_drive_folder(store, config: Dict, folder_id: str, validate_only: bool = False) -> Dict:
+    """Import every calendar-named file in a Drive folder; posts read their file from that folder"""
+    # The Drive client and its dependencies are only needed for this source
+    from agents import SocialMediaAgents
+    from profiles import load_profiles
+
+    drive_tool = SocialMediaAgents(load_profiles(config)[0]).google_drive_tool
+    return import_rows(store, config, iter_drive_folder(drive_tool, folder_id), folder_id, validate_only)
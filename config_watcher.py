@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from profiles import load_profiles
+from registry import fingerprint, registry
+
+logger = logging.getLogger('config')
+
+
+def changed_sections(old: Dict, new: Dict) -> Set[str]:
+    """Top-level sections that differ; changed profiles are reported as 'profiles:<name>'"""
+    changed = {
+        key for key in set(old) | set(new)
+        if key != 'profiles' and fingerprint(old.get(key)) != fingerprint(new.get(key))
+    }
+
+    old_profiles = {profile.get('name'): profile for profile in old.get('profiles') or []}
+    new_profiles = {profile.get('name'): profile for profile in new.get('profiles') or []}
+    for name in set(old_profiles) | set(new_profiles):
+        if fingerprint(old_profiles.get(name)) != fingerprint(new_profiles.get(name)):
+            changed.add(f"profiles:{name}")
+    return changed
+
+
+def evict_stale_components(old: Dict, new: Dict) -> int:
+    """Drop registry components built from settings no profile of the new config uses.
+
+    Components whose settings are unchanged (Drive clients, LLM clients,
+    platform tools) stay warm; the rest are rebuilt on their next use.
+    """
+    agents = sys.modules.get('agents')
+    if agents is None:
+        # Nothing heavy has been built yet
+        return 0
+
+    def settings_in_use(config: Dict) -> Dict[str, Dict[str, Dict]]:
+        in_use: Dict[str, Dict[str, Dict]] = {}
+        for profile_config in load_profiles(config):
+            for kind, settings in agents.SocialMediaAgents(profile_config).component_settings().items():
+                in_use.setdefault(kind, {})[fingerprint(settings)] = settings
+        return in_use
+
+    current = settings_in_use(new)
+    evicted = 0
+    for kind, by_fingerprint in settings_in_use(old).items():
+        for key, settings in by_fingerprint.items():
+            if key not in current.get(kind, {}):
+                evicted += registry.evict(kind, settings)
+    return evicted
+
+
+class ConfigWatcher:
+    """Polls the config file and hands each valid new version to a callback.
+
+    A change is detected by modification time and size, so editors that save
+    by renaming are picked up too. A file that does not parse (a save half
+    written, a typo) is logged and ignored until it is fixed.
+    """
+
+    def __init__(self, path: str, config: Dict, on_change: Callable[[Dict, Set[str]], None],
+                 interval: float = 5):
+        self.path = path
+        self.config = config
+        self.on_change = on_change
+        self.interval = interval
+        self._stamp = self._stat()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> Set[str]:
+        """Reload the file if it changed; return the changed sections (empty if none)"""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return set()
+        self._stamp = stamp
+
+        try:
+            with open(self.path, 'r') as f:
+                new = json.load(f)
+            load_profiles(new)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Ignoring unreadable {self.path}: {str(e)}")
+            return set()
+
+        changed = changed_sections(self.config, new)
+        if changed:
+            self.on_change(new, changed)
+            self.config = new
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Config reload failed: {str(e)}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
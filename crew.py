@@ -1,70 +1,400 @@
 from crewai import Crew, Process
 from tasks import SocialMediaTasks
 from agents import SocialMediaAgents
+from direct_workflow import DirectPostingWorkflow
+from log_pipeline import setup_logging
+from render import renderer
+from tracing import TaskTimer, run_in_context, tracer
+from tools.async_http import run_async
+from tools.checkpoint import PlatformDeadline, content_key, get_checkpoint, outcomes, platform_deadline
+from tools.credentials import credential_manager
+from tools.dry_run import get_dry_run
+from tools.rate_limit import account_key, rate_limits
+from tools.retry import retrier
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import asyncio
 import json
-from typing import Dict
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+PLATFORMS = ('facebook', 'twitter', 'linkedin')
+
+logger = logging.getLogger('crew')
+
+
+def configure_process(config: Dict):
+    """Apply the top-level config to the components every crew in the process shares.
+
+    The tracer, retrier, renderer and credential manager are process-wide, so
+    they are configured once from the process config rather than by each
+    profile's crew.
+    """
+    tracer.configure(config.get('tracing', {}))
+    retrier.configure(config.get('retry', {}))
+    renderer.configure(config.get('render', {}))
+    credential_manager.configure(config.get('credentials', {}))
 
 
 class SocialMediaCrew:
-    def __init__(self, config_path: str = "config.json"):
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
+    def __init__(self, config_path: str = "config.json", config: Optional[Dict] = None):
+        if config is None:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        self.config = config
         
         self.agents = SocialMediaAgents(self.config)
-        self.tasks = SocialMediaTasks(self.config)
+        self.tasks = SocialMediaTasks(self.config, self.agents)
+        self.workflow = self.config.get('workflow', {})
+        # Agent transcripts are written synchronously on every step; off unless asked for
+        self.verbose = 2 if self.config.get('logging', {}).get('verbose', False) else False
+        # Platforms skipped because of rate limits during the last run, with retry times
+        self.deferred: Dict[str, float] = {}
+        self.dry_run = get_dry_run(self.config.get('dry_run'))
+        # Placeholder IDs from a dry run must never mark a platform as posted for a real rerun
+        self.checkpoints = None if self.dry_run else get_checkpoint(self.config.get('checkpoint'))
+        # Content for the current run, from the prefetch or a checkpoint
+        self.fetched: Optional[Dict[str, Dict]] = None
+        self._resumed: Optional[Dict] = None
+        # Platforms the parallel workflow gave up on mid-send; whether they posted is unknown
+        self.in_flight: List[str] = []
+        # Platforms the last run tried and failed to post (neither deferred nor in flight)
+        self.failed: List[str] = []
+    
+    def platform_accounts(self) -> Dict[str, Optional[str]]:
+        """Rate-limit account keys matching the ones the platform tools report"""
+        return {
+            'facebook': None,
+            'twitter': account_key(self.config['twitter']['access_token']),
+            'linkedin': account_key(self.config['linkedin']['access_token']),
+        }
+    
+    def _platform_agent_and_task(self, platform: str):
+        if platform == 'facebook':
+            return self.agents.facebook_agent(), self.tasks.post_to_facebook_task()
+        if platform == 'twitter':
+            return self.agents.twitter_agent(), self.tasks.post_to_twitter_task()
+        if platform == 'linkedin':
+            return self.agents.linkedin_agent(), self.tasks.post_to_linkedin_task()
+        raise ValueError(f"Unknown platform: {platform}")
     
-    def create_crew(self) -> Crew:
+    def prefetch_content(self) -> Optional[Dict[str, Dict]]:
+        """Bulk-download every mapped file before the crew starts"""
+        if self.fetched is not None:
+            return self.fetched
+        if not self.workflow.get('prefetch', True):
+            return None
+        
+        try:
+            self.fetched = self.agents.google_drive_tool.fetch_content_mapping(self.config['content_mapping'])
+            return self.fetched
+        except Exception as e:
+            # The content manager agent can still fetch file by file
+            logger.warning(f"⚠️ Content prefetch failed, falling back to agent fetch: {str(e)}")
+            return None
+    
+    def create_crew(self, platforms: Optional[List[str]] = None) -> Crew:
         """Create and configure the CrewAI crew"""
+        platforms = platforms or PLATFORMS
         
         # Create agents
         content_manager = self.agents.content_manager_agent()
-        facebook_agent = self.agents.facebook_agent()
-        twitter_agent = self.agents.twitter_agent()
-        linkedin_agent = self.agents.linkedin_agent()
         coordinator = self.agents.coordinator_agent()
         
         # Create tasks
-        fetch_content = self.tasks.fetch_content_task()
-        post_facebook = self.tasks.post_to_facebook_task()
-        post_twitter = self.tasks.post_to_twitter_task()
-        post_linkedin = self.tasks.post_to_linkedin_task()
+        fetch_content = self.tasks.fetch_content_task(self.prefetch_content())
         coordinate = self.tasks.coordination_task()
         
         # Set task dependencies
-        post_facebook.context = [fetch_content]
-        post_twitter.context = [fetch_content]
-        post_linkedin.context = [fetch_content]
-        coordinate.context = [fetch_content, post_facebook, post_twitter, post_linkedin]
+        platform_agents = []
+        platform_tasks = []
+        for platform in platforms:
+            agent, task = self._platform_agent_and_task(platform)
+            task.context = [fetch_content]
+            platform_agents.append(agent)
+            platform_tasks.append(task)
+        coordinate.context = [fetch_content] + platform_tasks
         
         # Create crew
         crew = Crew(
-            agents=[content_manager, facebook_agent, twitter_agent, linkedin_agent, coordinator],
-            tasks=[fetch_content, post_facebook, post_twitter, post_linkedin, coordinate],
+            agents=[content_manager] + platform_agents + [coordinator],
+            tasks=[fetch_content] + platform_tasks + [coordinate],
             process=Process.sequential,
-            verbose=2
+            verbose=self.verbose,
+            step_callback=tracer.agent_step,
+            task_callback=TaskTimer(tracer)
         )
         
         return crew
     
-    def run_posting_workflow(self):
-        """Execute the social media posting workflow"""
+    def _single_task_crew(self, task) -> Crew:
+        """Wrap a single task in its own crew so it can be kicked off independently"""
+        return Crew(
+            agents=[task.agent],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=self.verbose,
+            step_callback=tracer.agent_step,
+            task_callback=TaskTimer(tracer)
+        )
+    
+    def _start_in_thread(self, name: str, func, deadline: PlatformDeadline) -> Future:
+        """Run func on a daemon thread so a hung platform call cannot block shutdown"""
+        future = Future()
+        
+        def runner():
+            if not future.set_running_or_notify_cancel():
+                return
+            # Tools on this thread stop sending once the deadline is expired
+            platform_deadline.set(deadline)
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run_in_context(runner), name=f"post-{name}", daemon=True).start()
+        return future
+    
+    def run_parallel_workflow(self, platforms: Optional[List[str]] = None) -> str:
+        """Fetch content once, post to all platforms concurrently, then coordinate"""
+        timeout = self.workflow.get('platform_timeout', 300)
+        
+        fetch_content = self.tasks.fetch_content_task(self.prefetch_content())
+        self._single_task_crew(fetch_content).kickoff()
+        
+        platform_tasks = {
+            platform: self._platform_agent_and_task(platform)[1]
+            for platform in (platforms or PLATFORMS)
+        }
+        
+        futures = {}
+        deadlines = {}
+        for platform, task in platform_tasks.items():
+            task.context = [fetch_content]
+            deadlines[platform] = PlatformDeadline()
+            futures[platform] = self._start_in_thread(platform, self._single_task_crew(task).kickoff,
+                                                      deadlines[platform])
+        
+        # Every platform started at the same moment, so they share one deadline
+        deadline = time.monotonic() + timeout
+        completed = []
+        failures = {}
+        for platform, future in futures.items():
+            try:
+                future.result(timeout=max(0, deadline - time.monotonic()))
+                completed.append(platform_tasks[platform])
+            except FutureTimeoutError:
+                # The thread keeps running; an expired deadline stops it from posting later
+                if deadlines[platform].expire():
+                    self.in_flight.append(platform)
+                    failures[platform] = f"timed out after {timeout} seconds with a post in flight; " \
+                                         f"whether it was published is unknown"
+                else:
+                    failures[platform] = f"timed out after {timeout} seconds; the post was not sent"
+            except Exception as e:
+                failures[platform] = str(e)
+        
+        for platform, reason in failures.items():
+            logger.warning(f"⚠️ {platform.capitalize()} posting did not complete: {reason}")
+        
+        coordinate = self.tasks.coordination_task(failures)
+        coordinate.context = [fetch_content] + completed
+        return self._single_task_crew(coordinate).kickoff()
+    
+    def _throttled_platforms(self, platforms: List[str]) -> Dict[str, float]:
+        """Platforms whose budget is known to be exhausted, with the time they free up"""
+        accounts = self.platform_accounts()
+        throttled = {}
+        for platform in platforms:
+            # A platform behind an open circuit breaker is deferred the same way
+            retry_at = max(rate_limits.blocked_until(platform, accounts[platform]), retrier.open_until(platform))
+            if retry_at:
+                throttled[platform] = retry_at
+        return throttled
+    
+    def _runnable_platforms(self, platforms: Optional[List[str]] = None) -> List[str]:
+        """Drop platforms known to be rate limited, recording them as deferred"""
+        platforms = list(platforms or PLATFORMS)
+        self.deferred = self._throttled_platforms(platforms)
+        
+        for platform, retry_at in self.deferred.items():
+            logger.info(f"⏳ Skipping {platform.capitalize()}: rate limited until {time.ctime(retry_at)}")
+        
+        return [platform for platform in platforms if platform not in self.deferred]
+    
+    def _resume(self, platforms: Optional[List[str]] = None) -> List[str]:
+        """Skip platforms an earlier, partly failed run already posted and reuse its content"""
+        platforms = list(platforms or PLATFORMS)
+        self.fetched = None
+        profile = self.config.get('profile', 'default')
+        self._resumed = self.checkpoints.load(profile) if self.checkpoints else None
+        if self._resumed is None:
+            return platforms
+        
         try:
-            print("🚀 Starting Social Media Posting Workflow...")
-            crew = self.create_crew()
-            result = crew.kickoff()
+            current = self._checkpoint_current(self._resumed)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not check the checkpoint against Google Drive, not resuming: {str(e)}")
+            self._resumed = None
+            return platforms
+        if not current:
+            logger.info("♻️ Content changed since the checkpoint was saved; discarding it")
+            self.checkpoints.clear(profile)
+            self._resumed = None
+            return platforms
+        
+        for platform, post_id in self._resumed['posted'].items():
+            if platform in platforms:
+                logger.info(f"♻️ {platform.capitalize()} was already posted by an earlier attempt (ID: {post_id})")
+        platforms = [platform for platform in platforms if platform not in self._resumed['posted']]
+        
+        content = self._resumed['content']
+        if platforms and all(platform in content and not content[platform]['error'] for platform in platforms):
+            self.fetched = {platform: content[platform] for platform in platforms}
+            logger.info(f"♻️ Resuming {', '.join(platforms)} with content saved by the earlier attempt")
+        return platforms
+    
+    def _content_key(self, content: Dict[str, Dict], versions: Optional[Dict[str, str]] = None) -> str:
+        """Key of the content mapping plus the revision of every file read (current ones when given)"""
+        if versions is None:
+            versions = {item['file']: item.get('version') for item in content.values() if item['content'] is not None}
+        return content_key(self.config.get('content_mapping', {}), versions)
+    
+    def _checkpoint_current(self, checkpoint: Dict) -> bool:
+        """True while the checkpoint's content mapping and Drive file revisions are unchanged"""
+        files = [item['file'] for item in checkpoint['content'].values() if item['content'] is not None]
+        versions = self.agents.google_drive_tool.file_versions(files)
+        return self._content_key(checkpoint['content'], versions) == checkpoint['content_key']
+    
+    def _resumed_content(self, platforms: List[str]) -> Optional[Dict[str, Dict]]:
+        """Checkpoint content for just these platforms (None to fetch from Drive)"""
+        if self.fetched is None:
+            return None
+        return {platform: dict(self.fetched[platform]) for platform in platforms}
+    
+    def _save_checkpoint(self, results: Dict[str, Dict], platforms: List[str]):
+        """Record which platforms are still pending so the next run resumes from there"""
+        if self.checkpoints is None:
+            return
+        
+        profile = self.config.get('profile', 'default')
+        previous = self._resumed or {'content': {}, 'posted': {}, 'pending': []}
+        posted = dict(previous['posted'])
+        posted.update({platform: result['post_id'] for platform, result in results.items()
+                       if result['post_id'] is not None})
+        pending = [platform for platform in dict.fromkeys(previous['pending'] + platforms) if platform not in posted]
+        if self.in_flight:
+            # Resuming could publish a second copy; the ledger or a person has to settle these
+            logger.warning(f"⚠️ Not resuming {', '.join(self.in_flight)}: a post was in flight when it timed out")
+            pending = [platform for platform in pending if platform not in self.in_flight]
+        
+        if not pending:
+            self.checkpoints.clear(profile)
+            return
+        
+        content = {**previous['content'], **(self.fetched or {})}
+        self.checkpoints.save(profile, content, posted, pending, self._content_key(content))
+        logger.info(f"💾 Checkpoint saved; a rerun will resume {', '.join(pending)}")
+    
+    def _report(self, result):
+        logger.info("✅ Social Media Posting Workflow Completed!")
+        logger.info(f"📊 Results:\n{result}")
+        
+        llm_cache = self.agents.llm_cache
+        if llm_cache is not None:
+            stats = llm_cache.stats()
+            logger.info(f"🧠 LLM cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        if self.dry_run is not None:
+            logger.info(f"🧪 Dry run: nothing was published; the requests are in {self.dry_run.path or 'memory only'}")
+    
+    def _finish_run(self, run_id: str, platforms: List[str]):
+        # Posts the tools had to defer while the workflow ran
+        for platform, retry_at in rate_limits.pop_deferrals(self.platform_accounts()).items():
+            self.deferred[platform] = max(self.deferred.get(platform, 0), retry_at)
+        
+        # The report is free text; what the tools recorded says whether each platform was posted
+        results = outcomes.pop(run_id)
+        self.failed = [platform for platform in platforms
+                       if results.get(platform, {}).get('post_id') is None
+                       and platform not in self.deferred and platform not in self.in_flight]
+        
+        self._save_checkpoint(results, platforms + [platform for platform in self.deferred if platform not in platforms])
+        
+        spans = tracer.finish_run(run_id)
+        if spans and tracer.print_summary:
+            logger.info(f"⏱️ Run {run_id} timings:\n{tracer.summary_table(spans)}")
+    
+    def run_posting_workflow(self, platforms: Optional[List[str]] = None):
+        """Execute the social media posting workflow; ``failed`` then lists the platforms not posted"""
+        self.failed, self.in_flight = [], []
+        platforms = self._resume(platforms)
+        if not platforms:
+            return "All requested platforms were already posted"
+        platforms = self._runnable_platforms(platforms)
+        if not platforms:
+            return "All requested platforms are rate limited; posts were deferred"
+        
+        run_id = tracer.start_run(self.config.get('profile', 'default'))
+        try:
+            mode = self.workflow.get('mode', 'sequential')
+            logger.info(f"🚀 Starting Social Media Posting Workflow ({mode})...")
             
-            print("✅ Social Media Posting Workflow Completed!")
-            print("📊 Results:")
-            print(result)
+            if mode in ('direct', 'async'):
+                workflow = DirectPostingWorkflow(self.config, self.agents)
+                fetched = self._resumed_content(platforms)
+                if mode == 'direct':
+                    result = workflow.run(platforms, fetched)
+                else:
+                    result = run_async(workflow.arun(platforms, fetched))
+                self.fetched = workflow.fetched
+            elif mode == 'parallel':
+                result = self.run_parallel_workflow(platforms)
+            else:
+                crew = self.create_crew(platforms)
+                result = crew.kickoff()
             
+            self._report(result)
             return result
             
         except Exception as e:
-            print(f"❌ Error in posting workflow: {str(e)}")
+            logger.error(f"❌ Error in posting workflow: {str(e)}")
             return None
-
+        
+        finally:
+            self._finish_run(run_id, platforms)
+    
+    async def arun_posting_workflow(self, platforms: Optional[List[str]] = None):
+        """Run the direct workflow on the caller's event loop (used to run many profiles in one loop)"""
+        self.failed, self.in_flight = [], []
+        # Checking the checkpoint lists Drive files, a blocking call
+        platforms = await asyncio.to_thread(self._resume, platforms)
+        if not platforms:
+            return "All requested platforms were already posted"
+        platforms = self._runnable_platforms(platforms)
+        if not platforms:
+            return "All requested platforms are rate limited; posts were deferred"
+        
+        run_id = tracer.start_run(self.config.get('profile', 'default'))
+        try:
+            logger.info("🚀 Starting Social Media Posting Workflow (async)...")
+            workflow = DirectPostingWorkflow(self.config, self.agents)
+            result = await workflow.arun(platforms, self._resumed_content(platforms))
+            self.fetched = workflow.fetched
+            self._report(result)
+            return result
+            
+        except Exception as e:
+            logger.error(f"❌ Error in posting workflow: {str(e)}")
+            return None
+        
+        finally:
+            self._finish_run(run_id, platforms)
 
 if __name__ == "__main__":
     # Test run
     social_crew = SocialMediaCrew()
+    configure_process(social_crew.config)
+    setup_logging(social_crew.config.get('logging', {}))
     social_crew.run_posting_workflow()
@@ -0,0 +1,212 @@
+from agents import SocialMediaAgents
+from datetime import datetime
+import asyncio
+from tools.media import DEFAULT_CHUNK_SIZE
+from tools.rate_limit import RateLimited
+from tracing import tracer
+import time
+from typing import Dict, List, Optional
+
+
+PLATFORM_NAMES = {
+    'facebook': 'Facebook',
+    'twitter': 'Twitter/X',
+    'linkedin': 'LinkedIn',
+}
+
+
+class DirectPostingWorkflow:
+    """Posts final copy from Google Drive without any LLM reasoning.
+
+    Each file in content_mapping is read with the Google Drive tool and handed
+    verbatim to the matching platform tool, together with the image or video
+    named in media_mapping if there is one. The report mirrors the sections the
+    coordination task is asked to cover.
+    """
+
+    def __init__(self, config: Dict, agents: SocialMediaAgents = None):
+        self.config = config
+        self.agents = agents or SocialMediaAgents(config)
+        # Content of the last run, kept for the crew's checkpoint
+        self.fetched: Optional[Dict[str, Dict]] = None
+
+    def _platform_tool(self, platform: str):
+        return {
+            'facebook': self.agents.facebook_tool,
+            'twitter': self.agents.twitter_tool,
+            'linkedin': self.agents.linkedin_tool,
+        }[platform]
+
+    def _mapping(self, platforms: Optional[List[str]] = None) -> Dict[str, str]:
+        return {
+            platform: filename
+            for platform, filename in self.config['content_mapping'].items()
+            if platforms is None or platform in platforms
+        }
+
+    @staticmethod
+    def _fetch_failed(mapping: Dict[str, str], error: Exception) -> Dict[str, Dict]:
+        return {
+            platform: {'file': filename, 'content': None, 'error': str(error), 'version': None}
+            for platform, filename in mapping.items()
+        }
+
+    def _attach_media(self, fetched: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Look up each platform's media file; only metadata is read here"""
+        media_mapping = self.config.get('media_mapping', {})
+        chunk_size = self.config.get('media', {}).get('chunk_size', DEFAULT_CHUNK_SIZE)
+        for platform, item in fetched.items():
+            item['media'] = None
+            filename = media_mapping.get(platform)
+            if not filename or item['error']:
+                continue
+            try:
+                item['media'] = self.agents.google_drive_tool.media_file(filename, chunk_size)
+            except Exception as e:
+                item['error'] = f"Media file {filename} unavailable: {str(e)}"
+        return fetched
+
+    def fetch_content(self, platforms: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Read every mapped file in one batch, recording failures instead of raising"""
+        mapping = self._mapping(platforms)
+        try:
+            fetched = self.agents.google_drive_tool.fetch_content_mapping(mapping)
+        except Exception as e:
+            fetched = self._fetch_failed(mapping, e)
+        return self._attach_media(fetched)
+
+    async def afetch_content(self, platforms: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Async variant of fetch_content"""
+        mapping = self._mapping(platforms)
+        try:
+            fetched = await self.agents.google_drive_tool.afetch_content_mapping(mapping)
+        except Exception as e:
+            fetched = self._fetch_failed(mapping, e)
+        return await asyncio.to_thread(self._attach_media, fetched)
+
+    @staticmethod
+    def _skipped(item: Dict) -> Dict:
+        return {
+            'status': 'skipped',
+            'message': f"Content unavailable: {item['error']}",
+            'post_id': None,
+            'seconds': 0.0,
+        }
+
+    @staticmethod
+    def _outcome(platform: str, started: float, post_id: Optional[str] = None,
+                 error: Optional[Exception] = None) -> Dict:
+        """Result entry for one publish attempt"""
+        if error is None:
+            result = {
+                'status': 'posted',
+                'message': f"Successfully posted to {PLATFORM_NAMES[platform]}",
+                'post_id': post_id,
+            }
+        elif isinstance(error, RateLimited):
+            result = {
+                'status': 'deferred',
+                'message': f"Deferred: {str(error)}",
+                'post_id': None,
+            }
+        else:
+            result = {
+                'status': 'failed',
+                'message': f"Error posting to {PLATFORM_NAMES[platform]}: {str(error)}",
+                'post_id': None,
+            }
+
+        result['seconds'] = round(time.monotonic() - started, 3)
+        return result
+
+    def post_content(self, fetched: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Publish each fetched file to its platform"""
+        results = {}
+        for platform, item in fetched.items():
+            if item['error']:
+                results[platform] = self._skipped(item)
+                continue
+
+            started = time.monotonic()
+            try:
+                post_id = self._platform_tool(platform).post(item['content'], item['media'])
+                results[platform] = self._outcome(platform, started, post_id=post_id)
+            except Exception as e:
+                results[platform] = self._outcome(platform, started, error=e)
+
+        return results
+
+    async def apost_content(self, fetched: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Publish every fetched file concurrently on the running event loop"""
+        async def publish(platform: str, item: Dict) -> Dict:
+            if item['error']:
+                return self._skipped(item)
+
+            started = time.monotonic()
+            tool = self._platform_tool(platform)
+            try:
+                if item['media'] is not None:
+                    # Chunked uploads stream through the blocking Drive and
+                    # requests clients, so they run on a worker thread
+                    post_id = await asyncio.to_thread(tool.post, item['content'], item['media'])
+                else:
+                    post_id = await tool.apost(item['content'])
+                return self._outcome(platform, started, post_id=post_id)
+            except Exception as e:
+                return self._outcome(platform, started, error=e)
+
+        outcomes = await asyncio.gather(*(publish(platform, item) for platform, item in fetched.items()))
+        return dict(zip(fetched, outcomes))
+
+    def build_report(self, fetched: Dict[str, Dict], results: Dict[str, Dict]) -> str:
+        """Render the same summary the coordinator agent produces"""
+        lines = [
+            "Social Media Posting Report",
+            f"Generated: {datetime.now().isoformat(timespec='seconds')}",
+            "",
+            "Content fetched from Google Drive:",
+        ]
+        for platform, item in fetched.items():
+            name = PLATFORM_NAMES.get(platform, platform)
+            if item['error']:
+                lines.append(f"- {name} ({item['file']}): ❌ {item['error']}")
+            else:
+                media = item.get('media')
+                attachment = f" + {media.kind} {media.name} ({media.size} bytes)" if media is not None else ""
+                lines.append(f"- {name} ({item['file']}): ✅ {len(item['content'])} characters{attachment}")
+
+        lines += ["", "Posting status:"]
+        for platform, result in results.items():
+            name = PLATFORM_NAMES.get(platform, platform)
+            icon = {'posted': '✅', 'deferred': '⏳'}.get(result['status'], '❌')
+            detail = f" (ID: {result['post_id']})" if result['post_id'] else ""
+            lines.append(f"- {name}: {icon} {result['message']}{detail} [{result['seconds']}s]")
+
+        posted = sum(1 for result in results.values() if result['status'] == 'posted')
+        lines += ["", f"Summary: {posted}/{len(results)} platforms posted successfully"]
+
+        return "\n".join(lines)
+
+    def run(self, platforms: Optional[List[str]] = None, fetched: Optional[Dict[str, Dict]] = None) -> str:
+        """Fetch (unless content from a checkpoint is given), post and report"""
+        with tracer.span('task', 'direct fetch_content'):
+            if fetched is None:
+                fetched = self.fetch_content(platforms)
+            else:
+                fetched = self._attach_media(fetched)
+        self.fetched = fetched
+        with tracer.span('task', 'direct post_content'):
+            results = self.post_content(fetched)
+        return self.build_report(fetched, results)
+
+    async def arun(self, platforms: Optional[List[str]] = None, fetched: Optional[Dict[str, Dict]] = None) -> str:
+        """Fetch, post and report without blocking the event loop"""
+        with tracer.span('task', 'direct fetch_content'):
+            if fetched is None:
+                fetched = await self.afetch_content(platforms)
+            else:
+                fetched = await asyncio.to_thread(self._attach_media, fetched)
+        self.fetched = fetched
+        with tracer.span('task', 'direct post_content'):
+            results = await self.apost_content(fetched)
+        return self.build_report(fetched, results)
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from crew import SocialMediaCrew
+from profiles import apply_overrides, load_profiles
+from tools.async_http import run_async
+from tools.limits import platform_limiter
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+
+class FanOutEngine:
+    """Runs the posting workflow for many account profiles in one process.
+
+    Profiles are executed on a bounded thread pool, or as coroutines on one
+    event loop when ``workflow.mode`` is ``async``. Tools, clients and agents
+    are shared through the component registry wherever profiles use the same
+    settings, and per-platform limits cap concurrent API calls across profiles.
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.engine_config = config.get('engine', {})
+        self.max_workers = self.engine_config.get('max_workers', 4)
+        self.max_concurrent_profiles = self.engine_config.get('max_concurrent_profiles', 100)
+        platform_limiter.configure(self.engine_config.get('platform_concurrency', {}))
+
+    def _run_profile(self, profile_config: Dict, platforms: Optional[List[str]] = None) -> Dict:
+        """Run one profile's workflow and describe the outcome"""
+        started = time.monotonic()
+        crew = None
+        try:
+            crew = SocialMediaCrew(config=profile_config)
+            result = crew.run_posting_workflow(platforms)
+            error = self._error(crew, result)
+        except Exception as e:
+            result = None
+            error = str(e)
+
+        return self._outcome(profile_config, crew, result, error, started)
+
+    async def _arun_profile(self, profile_config: Dict, platforms: Optional[List[str]],
+                            limit: asyncio.Semaphore) -> Dict:
+        """Async variant of _run_profile; many profiles share one event loop"""
+        async with limit:
+            started = time.monotonic()
+            crew = None
+            try:
+                crew = SocialMediaCrew(config=profile_config)
+                result = await crew.arun_posting_workflow(platforms)
+                error = self._error(crew, result)
+            except Exception as e:
+                result = None
+                error = str(e)
+
+        return self._outcome(profile_config, crew, result, error, started)
+
+    async def _arun_profiles(self, profiles: List[Dict], platforms: Optional[List[str]]) -> List[Dict]:
+        limit = asyncio.Semaphore(self.max_concurrent_profiles)
+        return await asyncio.gather(*(self._arun_profile(profile, platforms, limit) for profile in profiles))
+
+    @staticmethod
+    def _error(crew: SocialMediaCrew, result) -> Optional[str]:
+        """Why the profile's run failed, judged by what was posted rather than by the report"""
+        if result is None:
+            return "workflow returned no result"
+        if crew.failed:
+            return f"not posted to {', '.join(crew.failed)}"
+        return None
+
+    @staticmethod
+    def _outcome(profile_config: Dict, crew: Optional[SocialMediaCrew], result, error: Optional[str],
+                 started: float) -> Dict:
+        return {
+            'profile': profile_config['profile'],
+            'success': error is None,
+            'result': str(result) if result is not None else None,
+            'error': error,
+            'deferred': crew.deferred if crew is not None else {},
+            'seconds': round(time.monotonic() - started, 3)
+        }
+
+    def run(self, names: List[str] = None, platforms: Optional[List[str]] = None,
+            overrides: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Run every profile (or only the named ones) and return results by profile name"""
+        profiles = [apply_overrides(profile, overrides) for profile in load_profiles(self.config)]
+        if names:
+            profiles = [profile for profile in profiles if profile['profile'] in names]
+
+        if not profiles:
+            return {}
+
+        if self.config.get('workflow', {}).get('mode') == 'async':
+            outcomes = run_async(self._arun_profiles(profiles, platforms))
+            return {outcome['profile']: outcome for outcome in outcomes}
+
+        workers = min(self.max_workers, len(profiles))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='profile') as pool:
+            outcomes = pool.map(lambda profile: self._run_profile(profile, platforms), profiles)
+            return {outcome['profile']: outcome for outcome in outcomes}
@@ -0,0 +1,406 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    timezone TEXT NOT NULL,
+    recurrence TEXT,
+    local_time TEXT,
+    payload TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    last_run_at REAL,
+    worker_id TEXT,
+    lease_until REAL,
+    dedupe_key TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_due ON jobs (status, due_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_recurring_name ON jobs (name) WHERE recurrence IS NOT NULL;
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    ran_at REAL NOT NULL,
+    worker_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_job_runs_ran_at ON job_runs (ran_at);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    hostname TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release, created on older job stores at open
+MIGRATIONS = {
+    'worker_id': "ALTER TABLE jobs ADD COLUMN worker_id TEXT",
+    'lease_until': "ALTER TABLE jobs ADD COLUMN lease_until REAL",
+    'dedupe_key': "ALTER TABLE jobs ADD COLUMN dedupe_key TEXT",
+}
+
+
+def default_worker_id() -> str:
+    """hostname:pid, unique among live workers sharing a job store"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class Job:
+    id: int
+    name: str
+    due_at: float
+    timezone: str
+    recurrence: Optional[str]
+    local_time: Optional[str]
+    payload: Dict
+    attempts: int
+    worker_id: Optional[str] = None
+
+    @property
+    def due_datetime(self) -> datetime:
+        """Due time in the job's own timezone"""
+        return datetime.fromtimestamp(self.due_at, pytz.timezone(self.timezone))
+
+
+def next_daily_occurrence(local_time: str, timezone: str, after: float) -> float:
+    """Next epoch time strictly after ``after`` at HH:MM in the given timezone"""
+    tz = pytz.timezone(timezone)
+    hour, minute = (int(part) for part in local_time.split(':'))
+    day = datetime.fromtimestamp(after, tz).date()
+
+    while True:
+        candidate = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+        if candidate.timestamp() > after:
+            return candidate.timestamp()
+        day += timedelta(days=1)
+
+
+class JobStore:
+    """SQLite-backed store of scheduled posting jobs.
+
+    Due times are kept as UTC epoch seconds alongside each job's timezone, so
+    recurring jobs are re-anchored correctly across DST changes and jobs that
+    were due while the scheduler was down are still found after a restart.
+
+    Any number of worker processes can share one store. A worker claims a job
+    by taking a lease on it (``lease_seconds``) and keeps the lease alive with
+    ``heartbeat()`` while the job runs. If a worker dies, its lease runs out
+    and the next worker to claim picks the job up again, up to
+    ``max_attempts`` times; a job that keeps taking its worker down is then
+    failed (or, if daily, moved to its next occurrence) instead.
+    """
+
+    def __init__(self, path: str = "jobs.db", worker_id: Optional[str] = None, lease_seconds: float = 300,
+                 max_attempts: int = 3):
+        self.path = path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        # A job whose worker died this many times in a row is not leased again
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Other workers hold the write lock briefly while claiming; wait for it
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs (status, lease_until)")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe_key ON jobs (dedupe_key) WHERE dedupe_key IS NOT NULL")
+        # Stores from before the run history keep each job's latest run
+        self._conn.execute(
+            "INSERT INTO job_runs (job_id, ran_at, worker_id) SELECT id, last_run_at, worker_id FROM jobs "
+            "WHERE last_run_at IS NOT NULL AND NOT EXISTS (SELECT 1 FROM job_runs)")
+
+    def _row_to_job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            id=row['id'],
+            name=row['name'],
+            due_at=row['due_at'],
+            timezone=row['timezone'],
+            recurrence=row['recurrence'],
+            local_time=row['local_time'],
+            payload=json.loads(row['payload']),
+            attempts=row['attempts'],
+            worker_id=row['worker_id']
+        )
+
+    def add_job(self, name: str, due_at: datetime, payload: Optional[Dict] = None) -> int:
+        """Queue a one-off job; ``due_at`` must be timezone-aware"""
+        if due_at.tzinfo is None:
+            raise ValueError("due_at must be timezone-aware")
+
+        now = time.time()
+        timezone = getattr(due_at.tzinfo, 'zone', None) or 'UTC'
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (name, due_at, timezone, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, due_at.timestamp(), timezone, json.dumps(payload or {}), now, now)
+            )
+            return cursor.lastrowid
+
+    def add_jobs(self, jobs: Iterable[Tuple[str, datetime, Dict, str]]) -> int:
+        """Queue many one-off (name, due_at, payload, dedupe_key) jobs in one transaction.
+
+        Jobs whose dedupe_key is already in the store are skipped, so the same
+        batch can be imported twice. Returns the number of jobs inserted.
+        """
+        now = time.time()
+        rows = [
+            (name, due_at.timestamp(), getattr(due_at.tzinfo, 'zone', None) or 'UTC', json.dumps(payload),
+             dedupe_key, now, now)
+            for name, due_at, payload, dedupe_key in jobs
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (name, due_at, timezone, payload, dedupe_key, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                inserted = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def ensure_daily_job(self, name: str, local_time: str, timezone: str,
+                         payload: Optional[Dict] = None, misfire_grace: float = 3600) -> Job:
+        """Create or update the recurring daily job called ``name``.
+
+        An occurrence missed by no more than ``misfire_grace`` seconds is kept
+        so it runs immediately; older misses skip to the next occurrence.
+        """
+        now = time.time()
+        with self._lock:
+            # Workers starting together must not both insert the job
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._upsert_daily_job(name, local_time, timezone, payload, misfire_grace, now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._row_to_job(row)
+
+    def _upsert_daily_job(self, name: str, local_time: str, timezone: str, payload: Optional[Dict],
+                          misfire_grace: float, now: float) -> sqlite3.Row:
+        row = self._conn.execute(
+            "SELECT * FROM jobs WHERE name = ? AND recurrence = 'daily'", (name,)).fetchone()
+
+        if row is None:
+            self._conn.execute(
+                "INSERT INTO jobs (name, due_at, timezone, recurrence, local_time, payload, "
+                "created_at, updated_at) VALUES (?, ?, ?, 'daily', ?, ?, ?, ?)",
+                (name, next_daily_occurrence(local_time, timezone, now), timezone,
+                 local_time, json.dumps(payload or {}), now, now)
+            )
+        else:
+            due_at = row['due_at']
+            if row['local_time'] != local_time or row['timezone'] != timezone:
+                due_at = next_daily_occurrence(local_time, timezone, now)
+            elif due_at < now - misfire_grace and row['status'] == 'pending':
+                due_at = next_daily_occurrence(local_time, timezone, now)
+
+            self._conn.execute(
+                "UPDATE jobs SET due_at = ?, timezone = ?, local_time = ?, payload = ?, "
+                "updated_at = ? WHERE id = ?",
+                (due_at, timezone, local_time, json.dumps(payload or {}), now, row['id'])
+            )
+
+        return self._conn.execute(
+            "SELECT * FROM jobs WHERE name = ? AND recurrence = 'daily'", (name,)).fetchone()
+
+    def recurring_names(self) -> List[str]:
+        """Names of every recurring job in the store"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM jobs WHERE recurrence IS NOT NULL").fetchall()
+        return [row['name'] for row in rows]
+
+    def remove_recurring(self, name: str) -> int:
+        """Delete the recurring job called ``name`` (a run in progress finishes normally)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE name = ? AND recurrence IS NOT NULL AND status = 'pending'", (name,))
+            return cursor.rowcount
+
+    def recover_interrupted(self) -> int:
+        """Return jobs left 'running' by a dead worker (or this one's last run) to the queue"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'pending', worker_id = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE status = 'running' AND (worker_id = ? OR lease_until IS NULL OR lease_until < ?)",
+                (now, self.worker_id, now)
+            )
+            return cursor.rowcount
+
+    def next_due_at(self) -> Optional[float]:
+        """Epoch time of the earliest pending job or expiring lease, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE WHEN status = 'pending' THEN due_at ELSE lease_until END) AS due_at "
+                "FROM jobs WHERE status = 'pending' OR (status = 'running' AND lease_until IS NOT NULL)"
+            ).fetchone()
+            return row['due_at']
+
+    def claim_due(self, now: Optional[float] = None, limit: int = 100) -> List[Job]:
+        """Lease up to ``limit`` due jobs to this worker and return them.
+
+        Jobs still marked running whose lease has expired belonged to a worker
+        that stopped heartbeating, and are claimed like pending ones.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so two workers never claim the same row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'pending' AND due_at <= ?) "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY due_at LIMIT ?", (now, now, limit)).fetchall()
+                # Expired leases, and one-off jobs handed back after an interrupted run, were tried already
+                exhausted = [row for row in rows if row['attempts'] >= self.max_attempts
+                             and (row['status'] == 'running' or row['recurrence'] is None)]
+                for row in exhausted:
+                    self._give_up(row, now)
+                rows = [row for row in rows if row['id'] not in {row['id'] for row in exhausted}]
+                self._conn.executemany(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_id = ?, "
+                    "lease_until = ?, last_run_at = ?, updated_at = ? WHERE id = ?",
+                    [(self.worker_id, now + self.lease_seconds, now, now, row['id']) for row in rows]
+                )
+                self._conn.executemany(
+                    "INSERT INTO job_runs (job_id, ran_at, worker_id) VALUES (?, ?, ?)",
+                    [(row['id'], now, self.worker_id) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        jobs = [self._row_to_job(row) for row in rows]
+        for job in jobs:
+            job.worker_id = self.worker_id
+        return jobs
+
+    def _give_up(self, row: sqlite3.Row, now: float):
+        error = f"Gave up after {row['attempts']} interrupted attempt(s)"
+        if row['recurrence'] == 'daily':
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', due_at = ?, attempts = 0, last_error = ?, worker_id = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE id = ?",
+                (next_daily_occurrence(row['local_time'], row['timezone'], max(now, row['due_at'])),
+                 error, now, row['id'])
+            )
+        else:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', last_error = ?, worker_id = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (error, now, row['id'])
+            )
+
+    def heartbeat(self) -> int:
+        """Extend the leases on this worker's running jobs and mark the worker alive"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO workers (worker_id, hostname, pid, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (self.worker_id, socket.gethostname(), os.getpid(), now, now)
+            )
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE status = 'running' AND worker_id = ?",
+                (now + self.lease_seconds, self.worker_id)
+            )
+            return cursor.rowcount
+
+    def complete(self, job: Job, error: Optional[str] = None) -> bool:
+        """Finish a run: recurring jobs move to their next occurrence, others close.
+
+        Returns False without changing anything if the lease was lost to
+        another worker, which then owns the job's outcome.
+        """
+        now = time.time()
+        with self._lock:
+            if job.recurrence == 'daily':
+                # Attempts count the tries at one occurrence
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = 'pending', due_at = ?, attempts = 0, last_error = ?, worker_id = NULL, "
+                    "lease_until = NULL, updated_at = ? WHERE id = ? AND worker_id = ?",
+                    (next_daily_occurrence(job.local_time, job.timezone, max(now, job.due_at)),
+                     error, now, job.id, self.worker_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, last_error = ?, lease_until = NULL, updated_at = ? "
+                    "WHERE id = ? AND worker_id = ?",
+                    ('failed' if error else 'done', error, now, job.id, self.worker_id)
+                )
+            return cursor.rowcount > 0
+
+    def deregister(self):
+        """Forget this worker and hand its running jobs back on a clean shutdown"""
+        self.recover_interrupted()
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+
+    def list_workers(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM workers ORDER BY started_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def upcoming(self, limit: int = 20) -> List[Job]:
+        """The next pending jobs by due time (served from the status/due_at index)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' ORDER BY due_at LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def ran_between(self, start: float, end: float) -> List[Job]:
+        """Jobs with a run in [start, end), once each, in the order they first ran then"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT jobs.* FROM jobs JOIN (SELECT job_id, MIN(ran_at) AS first_run FROM job_runs "
+                "WHERE ran_at >= ? AND ran_at < ? GROUP BY job_id) AS runs ON runs.job_id = jobs.id "
+                "ORDER BY runs.first_run", (start, end)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY due_at", (status,)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY due_at").fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
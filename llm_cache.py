@@ -0,0 +1,165 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import BaseMessageChunk
+from langchain_openai import ChatOpenAI
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    generations TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access);
+"""
+
+
+def _normalize(value: Any) -> Any:
+    """Collapse insignificant whitespace in every string of a JSON structure"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form of the serialized message list langchain passes as the prompt"""
+    try:
+        return json.dumps(_normalize(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        return " ".join(prompt.split())
+
+
+class PersistentLLMCache(BaseCache):
+    """SQLite-backed langchain cache for the agents' chat completions.
+
+    Entries are keyed by the model string langchain builds (model name,
+    parameters and any bound tool/function schema) plus the normalized message
+    list. Entries expire after ``ttl_seconds``, and least recently used entries
+    are evicted once ``max_entries`` or ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, config: Dict):
+        self.path = config.get('path', 'llm_cache.db')
+        self.ttl_seconds = config.get('ttl_seconds', 7 * 24 * 3600)
+        self.max_entries = config.get('max_entries', 10000)
+        self.max_bytes = config.get('max_bytes', 100 * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def cache_key(prompt: str, llm_string: str) -> str:
+        payload = llm_string + "\x1f" + normalize_prompt(prompt)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.cache_key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generations, created_at FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?", (now, key))
+
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        payload = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, generations, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.cache_key(prompt, llm_string), payload, len(payload), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk from least recently used until both limits hold again
+        rows = self._conn.execute(
+            "SELECT cache_key, size FROM llm_cache ORDER BY last_access").fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", doomed)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process plus the current entry count"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+
+class CachedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose ``stream()`` is answered by one ``invoke()``, so agent turns go through the cache.
+
+    crewai's agent executor streams every completion, and langchain's
+    streaming path never reads or writes the LLM cache. Nothing in the crew
+    consumes tokens as they arrive, so each turn is requested whole and
+    handed back as a single chunk.
+    """
+
+    def stream(self, input: Any, config: Optional[Dict] = None, *, stop: Optional[List[str]] = None,
+               **kwargs: Any) -> Iterator[BaseMessageChunk]:
+        yield self.invoke(input, config=config, stop=stop, **kwargs)
+
+    async def astream(self, input: Any, config: Optional[Dict] = None, *, stop: Optional[List[str]] = None,
+                      **kwargs: Any) -> AsyncIterator[BaseMessageChunk]:
+        yield await self.ainvoke(input, config=config, stop=stop, **kwargs)
+
+
+_caches: Dict[str, PersistentLLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(config: Optional[Dict]) -> Optional[PersistentLLMCache]:
+    """Return the process-wide cache for this config (None if disabled), to pass as a model's ``cache``"""
+    config = config or {}
+    if not config.get('enabled', True):
+        return None
+
+    path = config.get('path', 'llm_cache.db')
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = PersistentLLMCache(config)
+        return _caches[path]
@@ -0,0 +1,145 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+
+DEFAULT_LOGGING_SETTINGS = {
+    'path': 'social_media_posting.log',
+    # 'text' for the classic one-line format, 'json' for one JSON object per line
+    'format': 'text',
+    'level': 'INFO',
+    # Per-component overrides, e.g. {"crew": "DEBUG", "credentials": "WARNING"}
+    'levels': {},
+    # Size-based rotation, or time-based when rotate_when is set ("midnight", "H", ...)
+    'max_bytes': 10 * 1024 * 1024,
+    'rotate_when': None,
+    'backup_count': 10,
+    'compress': True,
+    'console': True,
+    # CrewAI/agent transcripts of every LLM step; slow and very large at volume
+    'verbose': False
+}
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class RunContextFilter(logging.Filter):
+    """Stamp records with the tracer's run ID while still on the logging thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # tracing pulls in LangChain, so only read it once something else has imported it
+        tracing = sys.modules.get('tracing')
+        if tracing is not None and not hasattr(record, 'run_id'):
+            record.run_id = tracing.current_run.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with the time, level, component, message and extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'component': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and value is not None:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _gzip_namer(name: str) -> str:
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _file_handler(settings: Dict) -> logging.Handler:
+    if settings['rotate_when']:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            settings['path'], when=settings['rotate_when'], backupCount=settings['backup_count'], encoding='utf-8')
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            settings['path'], maxBytes=settings['max_bytes'], backupCount=settings['backup_count'], encoding='utf-8')
+    if settings['compress']:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(config: Optional[Dict] = None) -> logging.handlers.QueueListener:
+    """Route every logger through a queue to rotating file and console handlers.
+
+    Callers only pay for putting a record on a queue; formatting, writes and
+    rotation (with gzip) happen on the listener thread. Calling it again
+    replaces the previous pipeline, so the last config wins.
+    """
+    global _listener
+    settings = {**DEFAULT_LOGGING_SETTINGS, **(config or {})}
+    formatter = JsonFormatter() if settings['format'] == 'json' else logging.Formatter(TEXT_FORMAT)
+
+    handlers = []
+    if settings['path']:
+        handlers.append(_file_handler(settings))
+    if settings['console']:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RunContextFilter())
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(settings['level'])
+        for component, level in settings['levels'].items():
+            logging.getLogger(component).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and close the handlers"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,61 @@
+import copy
+import logging
+from typing import Dict, List, Optional
+
+
+# Top-level keys that describe the process rather than a single account
+PROCESS_KEYS = ('profiles', 'engine')
+
+# Sections read once by components shared across profiles; a profile cannot override them
+SHARED_KEYS = ('tracing', 'retry', 'render', 'credentials', 'rate_limits')
+
+logger = logging.getLogger('profiles')
+
+
+def build_profile_config(config: Dict, profile: Dict) -> Dict:
+    """Overlay one account profile on the shared top-level config.
+
+    Dict sections are merged key by key, so a profile only needs to list what
+    differs from the defaults (e.g. just ``page_id`` and ``access_token``).
+    """
+    merged = {
+        key: copy.deepcopy(value)
+        for key, value in config.items()
+        if key not in PROCESS_KEYS
+    }
+
+    shared = [key for key in SHARED_KEYS if key in profile]
+    if shared:
+        logger.warning(f"⚠️ Profile {profile['name']}: {', '.join(shared)} apply to the whole process; "
+                       f"the profile's values are ignored")
+        profile = {key: value for key, value in profile.items() if key not in SHARED_KEYS}
+
+    merged = apply_overrides(merged, profile)
+    merged['profile'] = profile['name']
+    return merged
+
+
+def apply_overrides(config: Dict, overrides: Optional[Dict]) -> Dict:
+    """Copy of config with override sections merged in the same way as a profile"""
+    merged = dict(config)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_profiles(config: Dict) -> List[Dict]:
+    """Return one complete config per account profile (the config itself if none)"""
+    profiles = config.get('profiles')
+    if not profiles:
+        single = {key: value for key, value in config.items() if key not in PROCESS_KEYS}
+        single.setdefault('profile', 'default')
+        return [single]
+
+    names = [profile.get('name') for profile in profiles]
+    if None in names or len(set(names)) != len(names):
+        raise ValueError("Every entry in 'profiles' needs a unique 'name'")
+
+    return [build_profile_config(config, profile) for profile in profiles]
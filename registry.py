@@ -0,0 +1,70 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def fingerprint(settings: Any) -> str:
+    """Stable hash of a JSON-serialisable config section"""
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ComponentRegistry:
+    """Process-wide cache of expensive clients, tools and agents.
+
+    Components are built lazily on first request and keyed by a kind plus a
+    fingerprint of the config they were built from, so identical settings share
+    one instance while a changed section gets a fresh one.
+    """
+
+    def __init__(self):
+        self._components: Dict[Tuple[str, str], Any] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, settings: Any, factory: Callable[[], Any]) -> Any:
+        """Return the component for (kind, settings), building it on first use"""
+        key = (kind, fingerprint(settings))
+
+        with self._lock:
+            if key in self._components:
+                return self._components[key]
+            build_lock = self._locks.setdefault(key, threading.Lock())
+
+        # Build outside the registry lock so one slow OAuth handshake does not
+        # stall unrelated components; the per-key lock prevents double builds.
+        with build_lock:
+            with self._lock:
+                if key in self._components:
+                    return self._components[key]
+
+            component = factory()
+
+            with self._lock:
+                self._components[key] = component
+
+        return component
+
+    def evict(self, kind: str, settings: Optional[Any] = None) -> int:
+        """Drop cached components of a kind (optionally only for given settings)"""
+        with self._lock:
+            keys = [
+                key for key in self._components
+                if key[0] == kind and (settings is None or key[1] == fingerprint(settings))
+            ]
+            for key in keys:
+                del self._components[key]
+                self._locks.pop(key, None)
+
+        return len(keys)
+
+    def clear(self):
+        """Drop every cached component"""
+        with self._lock:
+            self._components.clear()
+            self._locks.clear()
+
+
+# Shared by agents.py, tasks.py and crew.py
+registry = ComponentRegistry()
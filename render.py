@@ -0,0 +1,332 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from tracing import tracer
+
+
+# Bump when rendering rules change so cached variants are not reused
+RENDER_VERSION = 2
+
+TWITTER_MAX_WEIGHT = 280
+# Every URL is wrapped in a 23-character t.co link
+TWITTER_URL_WEIGHT = 23
+# twitter-text v3: code points in these ranges count once, everything else twice
+TWITTER_LIGHT_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+PLATFORM_LIMITS = {'facebook': 63206, 'linkedin': 3000}
+
+DEFAULT_RENDER_SETTINGS = {
+    'cache_path': 'render_cache.db',
+    'ttl_seconds': 7 * 24 * 3600,
+    'max_hashtags': {'twitter': 3, 'facebook': 5, 'linkedin': 5},
+    'thread_numbering': True,
+    'prerender_at': None
+}
+
+URL_PATTERN = re.compile(r"(?:https?://|www\.)[^\s<>\"]*[^\s<>\"'.,;:!?)\]]", re.IGNORECASE)
+HASHTAG_PATTERN = re.compile(r"(?<![\w#&/])#(\w*[^\W\d]\w*)")
+TRAILING_TAGS_PATTERN = re.compile(r"(?:\s*#\w+)+\s*$")
+LEADING_TAGS_PATTERN = re.compile(r"^\s*(?:#\w*[^\W\d]\w*\s+)+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS variants (
+    cache_key TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    parts TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_variants_created ON variants (created_at);
+"""
+
+
+def _is_emoji(cp: int) -> bool:
+    return (0x1F000 <= cp <= 0x1FAFF or 0x2600 <= cp <= 0x27BF or 0x2300 <= cp <= 0x23FF
+            or 0x2B00 <= cp <= 0x2BFF or cp in (0x00A9, 0x00AE, 0x203C, 0x2049, 0x2122, 0x3030, 0x303D))
+
+
+def _extends_cluster(cp: int) -> bool:
+    # Variation selectors, skin tones, keycap, tag characters and combining marks
+    return (cp in (0xFE0E, 0xFE0F, 0x20E3) or 0x1F3FB <= cp <= 0x1F3FF or 0xE0020 <= cp <= 0xE007F
+            or unicodedata.category(chr(cp)) in ('Mn', 'Me'))
+
+
+def clusters(text: str) -> List[str]:
+    """Split NFC text into user-perceived characters (emoji sequences stay whole)"""
+    result = []
+    index = 0
+    while index < len(text):
+        end = index + 1
+        # Regional indicator pairs are one flag
+        if 0x1F1E6 <= ord(text[index]) <= 0x1F1FF and end < len(text) and 0x1F1E6 <= ord(text[end]) <= 0x1F1FF:
+            end += 1
+        while end < len(text):
+            cp = ord(text[end])
+            if _extends_cluster(cp):
+                end += 1
+            elif cp == 0x200D and end + 1 < len(text):
+                end += 2
+            else:
+                break
+        result.append(text[index:end])
+        index = end
+    return result
+
+
+def _cluster_weight(cluster: str) -> int:
+    """Weight of one cluster in twitter-text units (1 or 2 characters)"""
+    first = ord(cluster[0])
+    if _is_emoji(first) or (len(cluster) > 1 and (0x1F1E6 <= first <= 0x1F1FF or '\u20e3' in cluster)):
+        return 2
+    weight = 0
+    for char in cluster:
+        cp = ord(char)
+        weight += 1 if any(low <= cp <= high for low, high in TWITTER_LIGHT_RANGES) else 2
+    return weight
+
+
+def twitter_length(text: str) -> int:
+    """Length of text as Twitter counts it: NFC, URLs as 23, CJK and emoji as 2"""
+    text = unicodedata.normalize('NFC', text)
+    length = 0
+    position = 0
+    for match in URL_PATTERN.finditer(text):
+        length += sum(_cluster_weight(cluster) for cluster in clusters(text[position:match.start()]))
+        length += TWITTER_URL_WEIGHT
+        position = match.end()
+    return length + sum(_cluster_weight(cluster) for cluster in clusters(text[position:]))
+
+
+def normalize_hashtags(text: str, max_hashtags: Optional[int] = None) -> str:
+    """Drop repeated hashtags and trim the leading and trailing hashtag blocks to max_hashtags.
+
+    Repeats inside sentences lose their ``#`` so the sentence still reads;
+    hashtags in sentences are always kept and count towards the limit first,
+    then the leading block, then the trailing one. Repeats and extras in the
+    blocks are removed. Text made only of hashtags is one trailing block.
+    """
+    match = TRAILING_TAGS_PATTERN.search(text)
+    body, block = (text[:match.start()], match.group()) if match else (text, "")
+    lead = LEADING_TAGS_PATTERN.match(body)
+    lead, body = (lead.group(), body[lead.end():]) if lead else ("", body)
+
+    seen = set()
+
+    def first_use(tag: re.Match) -> str:
+        key = tag.group(1).casefold()
+        if key in seen:
+            return tag.group(1)
+        seen.add(key)
+        return tag.group()
+
+    body = HASHTAG_PATTERN.sub(first_use, body).strip()
+
+    def trim(tag_block: str) -> List[str]:
+        tags = []
+        for tag in HASHTAG_PATTERN.finditer(tag_block):
+            key = tag.group(1).casefold()
+            if key in seen or (max_hashtags is not None and len(seen) >= max_hashtags):
+                continue
+            seen.add(key)
+            tags.append(tag.group())
+        return tags
+
+    head = " ".join(trim(lead) + ([body] if body else []))
+    tail = " ".join(trim(block))
+    return f"{head}\n\n{tail}" if head and tail else head or tail
+
+
+def _hard_split(word: str, limit: int) -> List[str]:
+    """Split one over-long token at cluster boundaries"""
+    pieces, current, weight = [], "", 0
+    for cluster in clusters(word):
+        cluster_weight = _cluster_weight(cluster)
+        if current and weight + cluster_weight > limit:
+            pieces.append(current)
+            current, weight = "", 0
+        current += cluster
+        weight += cluster_weight
+    return pieces + [current] if current else pieces
+
+
+def _pack(text: str, limit: int) -> List[str]:
+    """Greedily pack whitespace-separated tokens into parts of at most limit"""
+    parts = []
+    current, weight = "", 0
+    tokens = re.split(r"(\s+)", text.strip())
+    # tokens alternate word, whitespace, word, ...
+    for index in range(0, len(tokens), 2):
+        word = tokens[index]
+        space = tokens[index - 1] if index else ""
+        word_weight = twitter_length(word)
+
+        # Prefer to start a new part at a paragraph break once this one is half full
+        paragraph_break = space.count("\n") >= 2 and weight >= limit // 2
+        if current and (paragraph_break or weight + twitter_length(space) + word_weight > limit):
+            parts.append(current)
+            current, weight = "", 0
+            space = ""
+
+        if word_weight > limit:
+            pieces = _hard_split(word, limit)
+            parts.extend(pieces[:-1])
+            word = pieces[-1]
+            word_weight = twitter_length(word)
+
+        current += space + word
+        weight += twitter_length(space) + word_weight
+
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_thread(text: str, limit: int = TWITTER_MAX_WEIGHT, numbering: bool = True) -> List[str]:
+    """Split text into tweets of at most limit weighted characters, numbered " 1/3" etc."""
+    text = unicodedata.normalize('NFC', text).strip()
+    if twitter_length(text) <= limit:
+        return [text]
+    if not numbering:
+        return _pack(text, limit)
+
+    # The suffix width depends on the number of parts, so repack until it settles
+    total = 9
+    while True:
+        parts = _pack(text, limit - len(f" {total}/{total}"))
+        if len(str(len(parts))) <= len(str(total)):
+            break
+        total = len(parts)
+    return [f"{part} {index}/{len(parts)}" for index, part in enumerate(parts, 1)]
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    # Cut at a word boundary when one is reasonably close
+    boundary = cut.rfind(' ')
+    if boundary > limit * 0.8:
+        cut = cut[:boundary]
+    return cut.rstrip() + "…"
+
+
+def render_variant(platform: str, source: str, settings: Dict) -> List[str]:
+    """Platform-ready parts for the source text (several parts only for Twitter threads)"""
+    text = unicodedata.normalize('NFC', source).strip()
+    text = normalize_hashtags(text, settings['max_hashtags'].get(platform))
+    if platform == 'twitter':
+        return split_thread(text, TWITTER_MAX_WEIGHT, settings['thread_numbering'])
+    return [_truncate(text, PLATFORM_LIMITS.get(platform, len(text)))]
+
+
+class RenderCache:
+    """SQLite store of rendered variants keyed by a checksum of the source text and settings"""
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parts FROM variants WHERE cache_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, platform: str, parts: List[str]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO variants (cache_key, platform, parts, created_at) VALUES (?, ?, ?, ?)",
+                (key, platform, json.dumps(parts), now)
+            )
+            self._conn.execute("DELETE FROM variants WHERE created_at < ?", (now - self.ttl_seconds,))
+
+
+class ContentRenderer:
+    """Turns source copy into per-platform variants once and serves them from a cache.
+
+    Variants are keyed by the SHA-256 of the source text, so content rendered
+    ahead of time (``--prerender``) is a cache lookup when it is posted.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self._lock = threading.Lock()
+        self._cache: Optional[RenderCache] = None
+        self.configure(config or {})
+
+    def configure(self, config: Dict):
+        settings = {**DEFAULT_RENDER_SETTINGS, **config}
+        settings['max_hashtags'] = {**DEFAULT_RENDER_SETTINGS['max_hashtags'], **settings['max_hashtags']}
+        with self._lock:
+            self.settings = settings
+            if self._cache is not None and self._cache.path != settings['cache_path']:
+                self._cache = None
+            elif self._cache is not None:
+                self._cache.ttl_seconds = settings['ttl_seconds']
+
+    def _get_cache(self) -> Optional[RenderCache]:
+        """The variant store, opened on first use (None when caching is off)"""
+        with self._lock:
+            if self._cache is None and self.settings['cache_path']:
+                self._cache = RenderCache(self.settings['cache_path'], self.settings['ttl_seconds'])
+            return self._cache
+
+    def cache_key(self, platform: str, source: str) -> str:
+        checksum = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        rules = {
+            'version': RENDER_VERSION,
+            'max_hashtags': self.settings['max_hashtags'].get(platform),
+            'thread_numbering': self.settings['thread_numbering']
+        }
+        payload = "\x1f".join([platform, checksum, json.dumps(rules, sort_keys=True)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def lookup(self, platform: str, source: str) -> Tuple[List[str], bool]:
+        """(parts, cache_hit) for the source, rendering and storing it on a miss"""
+        key = self.cache_key(platform, source)
+        cache = self._get_cache()
+        parts = cache.get(key) if cache is not None else None
+        if parts is not None:
+            return parts, True
+
+        parts = render_variant(platform, source, self.settings)
+        if cache is not None:
+            cache.put(key, platform, parts)
+        return parts, False
+
+    def variant(self, platform: str, source: str) -> List[str]:
+        with tracer.span('render', platform) as span:
+            parts, span['cache_hit'] = self.lookup(platform, source)
+            span['parts'] = len(parts)
+            return parts
+
+
+def prerender(config: Dict) -> Dict[str, Dict]:
+    """Fetch one profile's content files and render every platform variant into the cache"""
+    from agents import SocialMediaAgents
+
+    fetched = SocialMediaAgents(config).google_drive_tool.fetch_content_mapping(config['content_mapping'])
+
+    report = {}
+    for platform, item in fetched.items():
+        if item['error']:
+            report[platform] = {'file': item['file'], 'error': item['error']}
+            continue
+        parts, hit = renderer.lookup(platform, item['content'])
+        report[platform] = {'file': item['file'], 'parts': len(parts), 'cached': hit, 'error': None}
+    return report
+
+
+# Shared by every platform tool in the process
+renderer = ContentRenderer()
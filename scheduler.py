@@ -1,67 +1,481 @@
-import schedule
+import threading
 import time
 import pytz
-from datetime import datetime
-from crew import SocialMediaCrew
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time, timedelta
+from config_watcher import ConfigWatcher, evict_stale_components
+from job_store import Job, JobStore
+from tools.credentials import CredentialsError, credential_manager
+from tools.rate_limit import configure_rate_limits, rate_limits
 import json
 import logging
+from log_pipeline import setup_logging
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger('scheduler')
+
+class JobRunner:
+    """Runs job payloads against one config: the posting workflow or a prerender.
+    
+    The scheduler keeps one in-process, and every pool worker keeps its own so
+    the crew and its clients stay warm between jobs. Results are plain data
+    (success and rate-limit deferrals per profile) that can cross a process
+    boundary; queueing the retries is left to whoever owns the job store.
+    """
+    
+    def __init__(self, config: Dict, config_path: str = "config.json"):
+        self.config = config
+        self.config_path = config_path
+        self.timezone = pytz.timezone(config['schedule'].get('timezone', 'Asia/Kolkata'))
+        # crewai, langchain and the platform clients are imported when the first job runs
+        self._crew = None
+        self._engine = None
+        self._configured = False
+    
+    def _configure_process(self):
+        """Point this process's shared tracer, retrier, renderer and credentials at the config"""
+        if not self._configured:
+            from crew import configure_process
+            configure_process(self.config)
+            self._configured = True
+    
+    @property
+    def crew(self):
+        """Posting crew, created on first use"""
+        if self._crew is None:
+            self._configure_process()
+            from crew import SocialMediaCrew
+            self._crew = SocialMediaCrew(self.config_path, config=self.config)
+        return self._crew
+    
+    @property
+    def engine(self):
+        """Fan-out engine for multi-profile configs (None without profiles)"""
+        if self._engine is None and self.config.get('profiles'):
+            self._configure_process()
+            from fanout import FanOutEngine
+            self._engine = FanOutEngine(self.config)
+        return self._engine
+    
+    def run(self, payload: Optional[Dict] = None) -> Dict:
+        """Run a job payload; returns {'success': bool, 'deferred': [(profile, {platform: retry_at}), ...]}"""
+        payload = payload or {}
+        if payload.get('prerender'):
+            return {'success': self.run_prerender(payload.get('profiles')), 'deferred': []}
+        try:
+            current_time = datetime.now(self.timezone)
+            logger.info(f"🕐 Starting scheduled social media posting at {current_time}")
+            
+            overrides = payload.get('overrides')
+            if self.engine:
+                return self.run_profiles(payload.get('profiles'), payload.get('platforms'), overrides)
+            
+            crew = self.crew
+            if overrides:
+                # Campaign posts swap in their own file; the shared crew keeps the daily config
+                from crew import SocialMediaCrew
+                from profiles import apply_overrides
+                crew = SocialMediaCrew(self.config_path, config=apply_overrides(self.config, overrides))
+            result = crew.run_posting_workflow(payload.get('platforms'))
+            
+            success = result is not None and not crew.failed
+            if success:
+                logger.info("✅ Scheduled posting completed successfully")
+            elif result is None:
+                logger.error("❌ Scheduled posting failed")
+            else:
+                logger.error(f"❌ Scheduled posting failed for {', '.join(crew.failed)}")
+            return {'success': success, 'deferred': [(None, crew.deferred)]}
+                
+        except Exception as e:
+            logger.error(f"❌ Error in scheduled posting: {str(e)}")
+            return {'success': False, 'deferred': []}
+    
+    def run_profiles(self, names=None, platforms=None, overrides: Optional[Dict] = None) -> Dict:
+        """Run every account profile (or the named ones) through the fan-out engine"""
+        results = self.engine.run(names, platforms, overrides)
+        failed = [name for name, outcome in results.items() if not outcome['success']]
+        
+        for name, outcome in results.items():
+            if outcome['success']:
+                logger.info(f"✅ [{name}] Posting completed in {outcome['seconds']}s")
+            else:
+                logger.error(f"❌ [{name}] Posting failed: {outcome['error']}")
+        
+        logger.info(f"📊 {len(results) - len(failed)}/{len(results)} profiles posted successfully")
+        return {'success': not failed, 'deferred': [(name, outcome['deferred']) for name, outcome in results.items()]}
+    
+    def run_prerender(self, names=None) -> bool:
+        """Render every profile's content into per-platform variants ahead of posting"""
+        from profiles import load_profiles
+        from render import prerender
+        
+        self._configure_process()
+        ok = True
+        for profile_config in load_profiles(self.config):
+            name = profile_config['profile']
+            if names and name not in names:
+                continue
+            try:
+                report = prerender(profile_config)
+            except Exception as e:
+                logger.error(f"❌ [{name}] Prerender failed: {str(e)}")
+                ok = False
+                continue
+            for platform, item in report.items():
+                if item['error']:
+                    logger.error(f"❌ [{name}] {platform} ({item['file']}): {item['error']}")
+                    ok = False
+                else:
+                    state = "already cached" if item['cached'] else "rendered"
+                    logger.info(f"🎨 [{name}] {platform} ({item['file']}): {item['parts']} part(s), {state}")
+        return ok
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('social_media_posting.log'),
-        logging.StreamHandler()
-    ]
-)
 
 class SocialMediaScheduler:
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", worker_id: Optional[str] = None):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         
-        self.crew = SocialMediaCrew(config_path)
+        setup_logging(self.config.get('logging', {}))
+        self.config_path = config_path
+        self.runner = JobRunner(self.config, config_path)
+        self._pool = None
         self.timezone = pytz.timezone(self.config['schedule'].get('timezone', 'Asia/Kolkata'))
+        self.store = JobStore(
+            self.config['schedule'].get('job_store', 'jobs.db'),
+            worker_id=worker_id,
+            lease_seconds=self.config['schedule'].get('lease_seconds', 300),
+            max_attempts=self.config['schedule'].get('max_attempts', 3)
+        )
+        self._wakeup = threading.Event()
+        
+        configure_rate_limits(self.config)
+    
+    @property
+    def pool(self):
+        """Worker process pool when worker_pool.enabled is set (started on first use), else None"""
+        if self._pool is None and self.config.get('worker_pool', {}).get('enabled'):
+            from worker_pool import WorkerPool
+            self._pool = WorkerPool(self.config['worker_pool'])
+            self._pool.start()
+        return self._pool
     
-    def run_posting_job(self):
+    def apply_config(self, config: Dict, changed: Set[str]):
+        """Switch to a reloaded config, rebuilding only what the changed sections affect.
+        
+        Jobs already running finish with the crew they started with; the next
+        job builds a crew from the new config, reusing every cached client
+        whose settings did not change.
+        """
+        old = self.config
+        self.config = config
+        self.runner = JobRunner(config, self.config_path)
+        evicted = evict_stale_components(old, config)
+        
+        if 'logging' in changed:
+            setup_logging(config.get('logging', {}))
+        if 'rate_limits' in changed:
+            configure_rate_limits(config)
+        if 'credentials' in changed:
+            credential_manager.configure(config.get('credentials', {}))
+        if 'worker_pool' in changed:
+            logger.warning("⚠️ worker_pool settings only take effect after a restart")
+        if 'schedule' in changed or 'render' in changed or 'profiles' in changed:
+            if config['schedule'].get('job_store', 'jobs.db') != old['schedule'].get('job_store', 'jobs.db'):
+                logger.warning("⚠️ schedule.job_store only takes effect after a restart")
+            self.timezone = pytz.timezone(config['schedule'].get('timezone', 'Asia/Kolkata'))
+            self.store.lease_seconds = config['schedule'].get('lease_seconds', 300)
+            self.store.max_attempts = config['schedule'].get('max_attempts', 3)
+            daily = self._ensure_recurring_jobs()
+            logger.info(f"⏭️ Next daily run: {daily.due_datetime}")
+            self._wakeup.set()
+        
+        logger.info(f"🔁 Reloaded {self.config_path}: {', '.join(sorted(changed))} changed, "
+                    f"{evicted} cached component(s) dropped")
+    
+    def _ensure_recurring_jobs(self) -> Job:
+        """Bring the daily posting (and prerender) jobs in line with the config; returns the next posting job.
+        
+        With profiles, each profile gets its own daily job at its own
+        ``schedule.time``, so the workers share the burst profile by profile.
+        """
+        from profiles import load_profiles
+        
+        timezone = self.config['schedule'].get('timezone', 'Asia/Kolkata')
+        misfire_grace = self.config['schedule'].get('misfire_grace_seconds', 3600)
+        if self.config.get('profiles'):
+            wanted = {}
+            for profile_config in load_profiles(self.config):
+                name = profile_config['profile']
+                wanted[f"daily-posting:{name}"] = (profile_config['schedule'], {'profiles': [name]})
+        else:
+            wanted = {'daily-posting': (self.config['schedule'], None)}
+        
+        for name in self.store.recurring_names():
+            if (name == 'daily-posting' or name.startswith('daily-posting:')) and name not in wanted:
+                self.store.remove_recurring(name)
+        daily = [
+            self.store.ensure_daily_job(name, schedule['time'], schedule.get('timezone', timezone), payload=payload,
+                                        misfire_grace=schedule.get('misfire_grace_seconds', misfire_grace))
+            for name, (schedule, payload) in wanted.items()
+        ]
+        
+        prerender_at = self.config.get('render', {}).get('prerender_at')
+        if prerender_at:
+            self.store.ensure_daily_job('daily-prerender', prerender_at, timezone, payload={'prerender': True})
+            logger.info(f"🎨 Content variants will be prerendered daily at {prerender_at} {timezone}")
+        else:
+            self.store.remove_recurring('daily-prerender')
+        return min(daily, key=lambda job: job.due_at)
+    
+    def run_posting_job(self, payload: Optional[Dict] = None) -> bool:
         """Job function that runs the social media posting workflow"""
+        payload = payload or {}
+        outcomes = self._run_in_pool(payload) if self.pool is not None else [self.runner.run(payload)]
+        
+        for outcome in outcomes:
+            for profile, deferred in outcome['deferred']:
+                self.reschedule_deferred(deferred, profile=profile, overrides=payload.get('overrides'))
+        return all(outcome['success'] for outcome in outcomes)
+    
+    def _run_in_pool(self, payload: Dict) -> List[Dict]:
+        """Run a payload in the worker pool, one profile per worker so accounts use every core"""
+        from profiles import load_profiles
+        
+        names = payload.get('profiles')
+        if not names and self.config.get('profiles'):
+            names = [profile_config['profile'] for profile_config in load_profiles(self.config)]
+        parts = [{**payload, 'profiles': [name]} for name in names] if names and len(names) > 1 else [payload]
+        
+        def run(part: Dict) -> Dict:
+            try:
+                return self.pool.run(part, self.config)
+            except Exception as e:
+                logger.error(f"❌ {', '.join(part.get('profiles') or ['Posting'])}: {str(e)}")
+                return {'success': False, 'deferred': []}
+        
+        if len(parts) == 1:
+            return [run(parts[0])]
+        with ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix='pool-dispatch') as executor:
+            outcomes = list(executor.map(run, parts))
+        succeeded = sum(1 for outcome in outcomes if outcome['success'])
+        logger.info(f"📊 {succeeded}/{len(outcomes)} profiles posted successfully across the worker pool")
+        return outcomes
+    
+    def run_prerender_job(self, names=None) -> bool:
+        """Render every profile's content into per-platform variants ahead of posting"""
+        return self.runner.run_prerender(names)
+    
+    def enable_dry_run(self):
+        """Validate and record every post instead of publishing it, for this process only"""
+        from profiles import apply_overrides
+        self.config = apply_overrides(self.config, {'dry_run': {'enabled': True}})
+        self.runner = JobRunner(self.config, self.config_path)
+    
+    def run_shadow(self, day: Optional[str] = None) -> List[Dict]:
+        """Replay the jobs that ran on a day (yesterday by default) as dry runs, measuring latency and LLM usage"""
+        # Token counts come from the tracer, which pulls in LangChain
+        from tracing import tracer
+        
+        self.enable_dry_run()
+        if day:
+            date = datetime.strptime(day, '%Y-%m-%d').date()
+        else:
+            date = (datetime.now(self.timezone) - timedelta(days=1)).date()
+        start = self.timezone.localize(datetime.combine(date, dt_time.min))
+        end = self.timezone.localize(datetime.combine(date + timedelta(days=1), dt_time.min))
+        jobs = self.store.ran_between(start.timestamp(), end.timestamp())
+        if not jobs:
+            logger.warning(f"⚠️ No jobs ran on {date}; nothing to replay")
+            return []
+        
+        logger.info(f"👥 Shadow-replaying {len(jobs)} job(s) from {date} without publishing")
+        report = []
+        for job in jobs:
+            before = tracer.usage()
+            clock = time.monotonic()
+            # In this process even with a worker pool, so the usage counters see every call
+            outcome = self.runner.run(job.payload)
+            seconds = time.monotonic() - clock
+            usage = {key: value - before[key] for key, value in tracer.usage().items()}
+            report.append({'job': job.id, 'name': job.name, 'success': outcome['success'],
+                           'seconds': round(seconds, 3), **usage})
+            logger.info(f"👥 #{job.id} '{job.name}': {'ok' if outcome['success'] else 'failed'} in {seconds:.2f}s, "
+                        f"{usage['llm_calls']} LLM call(s), {usage['total_tokens']} tokens, "
+                        f"{usage['http_calls']} HTTP call(s)")
+        
+        durations = sorted(entry['seconds'] for entry in report)
+        tokens = sum(entry['total_tokens'] for entry in report)
+        price = self.config['dry_run'].get('price_per_1k_tokens')
+        cost = f" (≈ {tokens / 1000 * price:.4f} at {price} per 1K)" if price else ""
+        logger.info(f"📊 Shadow run: {sum(entry['success'] for entry in report)}/{len(report)} job(s) succeeded; "
+                    f"p50 {durations[len(durations) // 2]:.2f}s, max {durations[-1]:.2f}s, "
+                    f"total {sum(durations):.2f}s; {tokens} tokens{cost}")
+        return report
+    
+    def run_authorize(self, names=None) -> bool:
+        """Run the one-time Google consent in a browser for every profile's token file"""
+        from profiles import load_profiles
+        
+        # Asked for explicitly, so a browser is allowed even without a terminal
+        credential_manager.configure({**self.config.get('credentials', {}), 'interactive': True})
+        authorized = set()
+        for profile_config in load_profiles(self.config):
+            drive_config = profile_config['google_drive']
+            token_file = drive_config.get('token_file', 'token.json')
+            if (names and profile_config['profile'] not in names) or token_file in authorized:
+                continue
+            try:
+                credential_manager.authorize_google(drive_config)
+            except CredentialsError as e:
+                logger.error(f"❌ {str(e)}")
+                return False
+            authorized.add(token_file)
+            logger.info(f"🔑 Saved Google token to {token_file}")
+        return True
+    
+    def import_campaign(self, source: str, drive_folder: bool = False, validate_only: bool = False) -> Dict:
+        """Stream a CSV/JSONL calendar (or a Drive folder listing) into the job store"""
+        import campaigns
+        
+        if drive_folder:
+            report = campaigns.import_drive_folder(self.store, self.config, source, validate_only)
+        else:
+            report = campaigns.import_file(self.store, self.config, source, validate_only)
+        
+        for error in report['errors']:
+            logger.warning(f"⚠️ {source} row {error}")
+        action = "validated" if validate_only else f"{report['queued']} queued, {report['duplicates']} already queued"
+        logger.info(f"📥 {source}: {report['rows']} row(s), {report['valid']} valid ({action}), "
+                    f"{report['invalid']} invalid")
+        if report['queued']:
+            self._wakeup.set()
+        return report
+    
+    def reschedule_deferred(self, deferred: Dict[str, float], profile: Optional[str] = None,
+                            overrides: Optional[Dict] = None):
+        """Queue retry jobs for platforms that were skipped because of rate limits"""
+        for platform, retry_at in deferred.items():
+            payload = {'platforms': [platform]}
+            if profile:
+                payload['profiles'] = [profile]
+            if overrides:
+                payload['overrides'] = overrides
+            due_at = datetime.fromtimestamp(retry_at, self.timezone)
+            self.add_job(due_at, payload, name=f"rate-limit-retry:{platform}")
+            logger.warning(f"⏳ {platform.capitalize()} is rate limited; retry queued for {due_at}")
+        
+        if deferred:
+            logger.info(f"📉 Remaining API budgets: {rate_limits.remaining()}")
+    
+    def add_job(self, due_at: datetime, payload: Optional[Dict] = None, name: str = "posting") -> int:
+        """Queue a one-off posting job and wake the worker loop"""
+        if due_at.tzinfo is None:
+            due_at = self.timezone.localize(due_at)
+        job_id = self.store.add_job(name, due_at, payload)
+        self._wakeup.set()
+        return job_id
+    
+    def execute_job(self, job: Job):
+        """Run one claimed job and record its outcome"""
+        logger.info(f"▶️ Running job #{job.id} '{job.name}' due {job.due_datetime}")
         try:
-            current_time = datetime.now(self.timezone)
-            logging.info(f"🕐 Starting scheduled social media posting at {current_time}")
-            
-            result = self.crew.run_posting_workflow()
-            
-            if result:
-                logging.info("✅ Scheduled posting completed successfully")
+            success = self.run_posting_job(job.payload)
+            error = None if success else "posting workflow failed"
+        except BaseException as e:
+            self._complete(job, str(e))
+            raise
+        self._complete(job, error)
+    
+    def _complete(self, job: Job, error: Optional[str]):
+        if not self.store.complete(job, error):
+            logger.warning(f"⚠️ Lease on job #{job.id} expired while it ran; another worker has taken it over")
+    
+    def run_due_jobs(self) -> int:
+        """Claim and run due jobs a batch at a time, so idle workers share a burst"""
+        batch = self.config['schedule'].get('claim_batch', 1)
+        pool = self.pool
+        if pool is not None:
+            # Keep every pool worker busy when several jobs are due together
+            batch = max(batch, pool.size)
+        count = 0
+        while True:
+            jobs = self.store.claim_due(limit=batch)
+            if not jobs:
+                return count
+            if pool is not None and len(jobs) > 1:
+                with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix='job-dispatch') as executor:
+                    list(executor.map(self.execute_job, jobs))
             else:
-                logging.error("❌ Scheduled posting failed")
-                
-        except Exception as e:
-            logging.error(f"❌ Error in scheduled posting: {str(e)}")
+                for job in jobs:
+                    self.execute_job(job)
+            count += len(jobs)
+    
+    def _heartbeat_loop(self, interval: float):
+        """Keep this worker's leases alive while its jobs run"""
+        while True:
+            try:
+                self.store.heartbeat()
+            except Exception as e:
+                logger.error(f"❌ Heartbeat failed: {str(e)}")
+            time.sleep(interval)
     
     def start_scheduler(self):
         """Start the scheduler with the configured time"""
         schedule_time = self.config['schedule']['time']
+        timezone = self.config['schedule'].get('timezone', 'Asia/Kolkata')
+        
+        # A headless worker must fail fast on a missing token, never wait on a browser
+        from profiles import load_profiles
+        credential_manager.configure(self.config.get('credentials', {}))
+        credential_manager.worker = True
+        credential_manager.start(load_profiles(self.config))
+        
+        recovered = self.store.recover_interrupted()
+        if recovered:
+            logger.warning(f"♻️ Re-queued {recovered} job(s) interrupted by a previous shutdown")
         
-        # Schedule the job
-        schedule.every().day.at(schedule_time).do(self.run_posting_job)
+        heartbeat = self.config['schedule'].get('heartbeat_seconds', self.store.lease_seconds / 3)
+        threading.Thread(target=self._heartbeat_loop, args=(heartbeat,), name='job-heartbeat', daemon=True).start()
         
-        logging.info(f"📅 Scheduler started. Posts will be published daily at {schedule_time} {self.config['schedule'].get('timezone', 'Asia/Kolkata')}")
-        logging.info("🔄 Scheduler is running. Press Ctrl+C to stop.")
+        daily = self._ensure_recurring_jobs()
+        
+        if self.pool is not None:
+            logger.info(f"🏊 Posting jobs run in {self.pool.size} worker process(es)")
+        
+        if self.config['schedule'].get('watch_config', True):
+            watcher = ConfigWatcher(self.config_path, self.config, self.apply_config,
+                                    self.config['schedule'].get('config_poll_seconds', 5))
+            watcher.start()
+        
+        logger.info(f"📅 Scheduler started. Posts will be published daily at {schedule_time} {timezone}")
+        logger.info(f"⏭️ Next daily run: {daily.due_datetime}")
+        logger.info(f"🔄 Worker {self.store.worker_id} is running. Press Ctrl+C to stop.")
         
         try:
             while True:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                self.run_due_jobs()
+                
+                # Sleep until the next job is due; the cap picks up jobs
+                # queued by other processes and wall-clock adjustments
+                next_due = self.store.next_due_at()
+                max_sleep = self.config['schedule'].get('max_sleep_seconds', 300)
+                delay = max_sleep if next_due is None else min(max_sleep, next_due - time.time())
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                self._wakeup.clear()
                 
         except KeyboardInterrupt:
-            logging.info("🛑 Scheduler stopped by user")
+            if self._pool is not None:
+                self._pool.stop()
+            self.store.deregister()
+            logger.info("🛑 Scheduler stopped by user")
     
-    def run_once(self):
+    def run_once(self, profiles=None):
         """Run the posting workflow once (for testing)"""
-        logging.info("🧪 Running one-time posting workflow for testing...")
-        self.run_posting_job()
+        logger.info("🧪 Running one-time posting workflow for testing...")
+        self.run_posting_job({'profiles': profiles} if profiles else None)
 
 
 def main():
@@ -71,13 +485,64 @@ def main():
     parser = argparse.ArgumentParser(description='Social Media Posting Scheduler')
     parser.add_argument('--test', action='store_true', help='Run once for testing')
     parser.add_argument('--config', default='config.json', help='Path to config file')
+    parser.add_argument('--at', help='Queue a one-off posting job at this local time (YYYY-MM-DDTHH:MM)')
+    parser.add_argument('--timezone', help='Timezone for --at (defaults to the schedule timezone)')
+    parser.add_argument('--profile', action='append', help='Limit a queued job to this profile (repeatable)')
+    parser.add_argument('--list-jobs', action='store_true', help='Show queued jobs and exit')
+    parser.add_argument('--list-workers', action='store_true', help='Show workers sharing the job store and exit')
+    parser.add_argument('--import-campaign', metavar='PATH',
+                        help='Queue every row of a CSV or JSONL posting calendar and exit')
+    parser.add_argument('--import-drive-folder', metavar='FOLDER_ID',
+                        help='Queue every <time>_<account>_<platform> file in a Drive folder and exit')
+    parser.add_argument('--validate-only', action='store_true', help='With an import, only check the rows')
+    parser.add_argument('--upcoming', type=int, metavar='N', help='Show the next N pending jobs and exit')
+    parser.add_argument('--worker-id', help='Stable name for this worker (defaults to hostname:pid)')
+    parser.add_argument('--prerender', action='store_true',
+                        help='Render platform variants of the current content into the cache and exit')
+    parser.add_argument('--authorize', action='store_true',
+                        help='Grant Google Drive access in a browser and save the token, then exit')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Run the posting workflow once, validating and recording each post instead of publishing')
+    parser.add_argument('--shadow', nargs='?', const='', metavar='YYYY-MM-DD',
+                        help="Replay a day's jobs (yesterday by default) as dry runs and report latency and LLM usage")
     
     args = parser.parse_args()
     
-    scheduler = SocialMediaScheduler(args.config)
+    scheduler = SocialMediaScheduler(args.config, worker_id=args.worker_id)
+    if args.dry_run:
+        scheduler.enable_dry_run()
     
-    if args.test:
-        scheduler.run_once()
+    if args.at:
+        payload = {'profiles': args.profile} if args.profile else {}
+        due_at = datetime.fromisoformat(args.at)
+        if args.timezone and due_at.tzinfo is None:
+            due_at = pytz.timezone(args.timezone).localize(due_at)
+        job_id = scheduler.add_job(due_at, payload)
+        print(f"📌 Queued job #{job_id} for {args.at}")
+    elif args.list_jobs:
+        for job in scheduler.store.list_jobs():
+            print(f"#{job.id}\t{job.name}\t{job.due_datetime.isoformat()}\t{job.recurrence or 'once'}\t"
+                  f"{job.worker_id or '-'}\t{job.payload}")
+    elif args.import_campaign or args.import_drive_folder:
+        report = scheduler.import_campaign(args.import_campaign or args.import_drive_folder,
+                                           drive_folder=bool(args.import_drive_folder),
+                                           validate_only=args.validate_only)
+        raise SystemExit(1 if report['invalid'] else 0)
+    elif args.upcoming:
+        for job in scheduler.store.upcoming(args.upcoming):
+            print(f"#{job.id}\t{job.name}\t{job.due_datetime.isoformat()}\t{job.payload}")
+    elif args.list_workers:
+        for worker in scheduler.store.list_workers():
+            seen = datetime.fromtimestamp(worker['heartbeat_at'], scheduler.timezone).isoformat()
+            print(f"{worker['worker_id']}\t{worker['hostname']}\tpid {worker['pid']}\tlast heartbeat {seen}")
+    elif args.prerender:
+        scheduler.run_prerender_job(args.profile)
+    elif args.authorize:
+        scheduler.run_authorize(args.profile)
+    elif args.shadow is not None:
+        scheduler.run_shadow(args.shadow or None)
+    elif args.test or args.dry_run:
+        scheduler.run_once(args.profile)
     else:
         scheduler.start_scheduler()
 
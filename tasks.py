@@ -1,15 +1,19 @@
 from crewai import Task
 from agents import SocialMediaAgents
-from typing import Dict
+from typing import Dict, Optional
 
 
 class SocialMediaTasks:
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, agents: Optional[SocialMediaAgents] = None):
         self.config = config
-        self.agents = SocialMediaAgents(config)
+        # Agents come from the shared registry, so tasks reuse the crew's instances
+        self.agents = agents or SocialMediaAgents(config)
     
-    def fetch_content_task(self) -> Task:
+    def fetch_content_task(self, prefetched: Optional[Dict[str, Dict]] = None) -> Task:
         """Task to fetch content from Google Drive"""
+        if prefetched:
+            return self._organize_prefetched_content_task(prefetched)
+        
         return Task(
             description=f"""
             Fetch content from Google Drive for social media posting.
@@ -26,6 +30,30 @@ class SocialMediaTasks:
             expected_output="A structured report containing content for each social media platform"
         )
     
+    def _organize_prefetched_content_task(self, prefetched: Dict[str, Dict]) -> Task:
+        """Fetch task variant whose content was already bulk-downloaded from Google Drive"""
+        sections = []
+        for platform, item in prefetched.items():
+            if item['error']:
+                body = f"(unavailable: {item['error']})"
+            else:
+                body = item['content']
+            sections.append(f"--- {platform.capitalize()} content ({item['file']}) ---\n{body}")
+        
+        return Task(
+            description=f"""
+            The content for social media posting has already been fetched from Google Drive.
+            Do not fetch the files again.
+            
+            {chr(10).join(sections)}
+            
+            Organize the content and prepare it for distribution to respective social media platforms.
+            Ensure each piece of content is appropriate for its target platform.
+            """,
+            agent=self.agents.content_manager_agent(),
+            expected_output="A structured report containing content for each social media platform"
+        )
+    
     def post_to_facebook_task(self) -> Task:
         """Task to post content to Facebook"""
         return Task(
@@ -50,7 +78,7 @@ class SocialMediaTasks:
             Post the Twitter content to Twitter/X account.
             
             Use the content retrieved for Twitter and ensure it:
-            - Stays within the 280 character limit
+            - Stays within the 280 character limit (longer copy is posted as a numbered thread)
             - Uses appropriate hashtags and mentions
             - Is engaging and concise
             - Fits Twitter's fast-paced environment
@@ -79,10 +107,9 @@ class SocialMediaTasks:
             expected_output="Confirmation of successful LinkedIn post with post details"
         )
     
-    def coordination_task(self) -> Task:
+    def coordination_task(self, failures: Optional[Dict[str, str]] = None) -> Task:
         """Task to coordinate the entire posting process"""
-        return Task(
-            description="""
+        description = """
             Coordinate the entire social media posting process.
             
             Oversee the execution of all posting tasks and ensure:
@@ -92,7 +119,15 @@ class SocialMediaTasks:
             - A comprehensive report is generated
             
             Provide a summary of all posting activities and their status.
-            """,
+            """
+        
+        if failures:
+            description += "\n            The following platform tasks did not complete:\n"
+            for platform, reason in failures.items():
+                description += f"            - {platform.capitalize()}: {reason}\n"
+        
+        return Task(
+            description=description,
             agent=self.agents.coordinator_agent(),
             expected_output="A comprehensive report of all social media posting activities and their status"
         )
@@ -0,0 +1,13 @@
+import pytest
+
+from benchmarks.run import parse_args, start_fake_services
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Base URL of the benchmark's fake services, started in a separate process"""
+    monkeypatch.setenv('OTEL_SDK_DISABLED', 'true')
+    process, base_url = start_fake_services(parse_args(['--latency-ms', '1', '--jitter-ms', '0']))
+    yield base_url
+    process.terminate()
+    process.join(5)
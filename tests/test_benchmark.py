@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.run import parse_args, print_report, run_benchmark
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setenv('OTEL_SDK_DISABLED', 'true')
+
+
+def test_fake_openai_streams_server_sent_events(fake_openai):
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(api_key='benchmark', base_url=f"{fake_openai}/openai/v1")
+    chunks = [chunk.content for chunk in llm.stream("Say something")]
+    assert len(chunks) > 1
+    assert "".join(chunks) == llm.invoke("Say something").content
+
+
+def test_sequential_mode_end_to_end(capsys):
+    result = run_benchmark(parse_args(['--mode', 'sequential', '--accounts', '1', '--posts', '1',
+                                       '--latency-ms', '1', '--jitter-ms', '0']))
+    assert result['failed_jobs'] == 0
+    assert result['published_posts'] == result['expected_posts'] == 3
+    assert result['requests']['openai'] > 0
+
+
+def test_report_without_posts_prints_na(capsys):
+    print_report({'mode': 'direct', 'accounts': 1, 'posts_per_account': 1, 'expected_posts': 3,
+                  'published_posts': 0, 'failed_jobs': 1, 'deferred_jobs': 0, 'wall_seconds': 0.1,
+                  'posts_per_second': 0.0, 'latency_p50_seconds': None, 'latency_p99_seconds': None,
+                  'peak_rss_mb': 100.0, 'requests': {}, 'workdir': None})
+    output = capsys.readouterr().out
+    assert "Latency p50:    n/a" in output
+    assert "Nones" not in output
@@ -0,0 +1,30 @@
+from tools.drive_cache import DriveCache
+
+
+def test_caches_sharing_a_directory_keep_each_others_entries(tmp_path):
+    config = {'directory': str(tmp_path / 'cache')}
+    # Two instances stand in for two processes: each has its own view of the index
+    first, second = DriveCache(config), DriveCache(config)
+
+    first.put('file-a', 'v1', b"alpha")
+    first.remember_name('folder', 'a.txt', 'file-a')
+    second.put('file-b', 'v1', b"beta")
+    second.remember_name('folder', 'b.txt', 'file-b')
+
+    for cache in (first, second, DriveCache(config)):
+        assert cache.get('file-a', 'v1') == b"alpha"
+        assert cache.get('file-b', 'v1') == b"beta"
+        assert cache.resolve('folder', 'a.txt') == 'file-a'
+        assert cache.resolve('folder', 'b.txt') == 'file-b'
+
+
+def test_eviction_drops_least_recently_used_files_and_their_names(tmp_path):
+    cache = DriveCache({'directory': str(tmp_path / 'cache'), 'max_bytes': 10})
+    cache.put('old', 'v1', b"123456")
+    cache.remember_name('folder', 'old.txt', 'old')
+    cache.put('new', 'v1', b"abcdef")
+
+    assert cache.get('old') is None
+    assert cache.resolve('folder', 'old.txt') is None
+    assert cache.get('new') == b"abcdef"
+    assert cache.needs_metadata_check('old')
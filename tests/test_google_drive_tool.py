@@ -0,0 +1,7 @@
+from tools.google_drive_tool import query_string
+
+
+def test_query_string_escapes_quotes_and_backslashes():
+    assert query_string("plain.txt") == "'plain.txt'"
+    assert query_string("Bob's post.txt") == "'Bob\\'s post.txt'"
+    assert query_string("a\\'b") == "'a\\\\\\'b'"
@@ -0,0 +1,19 @@
+from job_store import JobStore
+
+DAY = 24 * 3600
+
+
+def test_ran_between_uses_the_run_history_of_recurring_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job = store.ensure_daily_job('daily-posting', '09:00', 'UTC')
+    first_run = job.due_at
+
+    [claimed] = store.claim_due(now=first_run)
+    store.complete(claimed)
+    # The next occurrence is missed for a day and runs late
+    [claimed] = store.claim_due(now=first_run + 2 * DAY)
+    store.complete(claimed)
+
+    assert [job.id for job in store.ran_between(first_run - 3600, first_run + DAY - 3600)] == [job.id]
+    assert store.ran_between(first_run + DAY - 3600, first_run + 2 * DAY - 3600) == []
+    assert [job.id for job in store.ran_between(first_run + 2 * DAY - 3600, first_run + 3 * DAY)] == [job.id]
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import requests
+
+from llm_cache import CachedChatOpenAI, get_llm_cache
+
+
+def _openai_requests(base_url: str) -> int:
+    return requests.get(f"{base_url}/_stats").json()['requests']['openai']
+
+
+def test_second_crew_kickoff_is_served_from_the_cache(fake_openai, tmp_path):
+    from crewai import Agent, Crew, Task
+
+    cache = get_llm_cache({'path': str(tmp_path / 'llm_cache.db')})
+    llm = CachedChatOpenAI(api_key='test', base_url=f"{fake_openai}/openai/v1", cache=cache)
+
+    def kickoff():
+        agent = Agent(role='Writer', goal='Write short copy', backstory='A copywriter',
+                      llm=llm, allow_delegation=False)
+        task = Task(description='Write one sentence about caching', agent=agent,
+                    expected_output='One sentence')
+        return Crew(agents=[agent], tasks=[task]).kickoff()
+
+    first = kickoff()
+    calls = _openai_requests(fake_openai)
+    assert calls > 0 and cache.misses == calls
+
+    second = kickoff()
+    assert second == first
+    assert cache.hits == calls
+    assert _openai_requests(fake_openai) == calls
+
+
+def test_stream_yields_the_whole_completion_once(fake_openai, tmp_path):
+    cache = get_llm_cache({'path': str(tmp_path / 'llm_cache.db')})
+    llm = CachedChatOpenAI(api_key='test', base_url=f"{fake_openai}/openai/v1", cache=cache)
+    chunks = list(llm.stream("Say something"))
+    assert len(chunks) == 1
+    assert list(llm.stream("Say something"))[0].content == chunks[0].content
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_dry_run_and_live_profiles_keep_their_own_cache_setting(tmp_path):
+    from langchain.globals import get_llm_cache as global_llm_cache
+
+    from agents import SocialMediaAgents
+
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    config['openai']['cache']['path'] = str(tmp_path / 'llm_cache.db')
+    live = SocialMediaAgents({**config, 'profile': 'live'})
+    dry = SocialMediaAgents({**config, 'profile': 'dry', 'dry_run': {'enabled': True}})
+
+    assert dry.llm.cache is False
+    assert live.llm.cache is live.llm_cache is not None
+    assert dry.llm.cache is False
+    assert live.llm is not dry.llm
+    assert global_llm_cache() is None
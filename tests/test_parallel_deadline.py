@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from tools.checkpoint import DeadlineExpired, PlatformDeadline, platform_deadline
+from tools.social_media_tools import FacebookTool
+
+
+class RecordingFacebookTool(FacebookTool):
+    """Facebook tool that records posts instead of calling the Graph API"""
+
+    def _publish(self, content, media=None):
+        self.config['sent'].append(content)
+        release = self.config.get('release')
+        if release is not None:
+            self.config['started'].set()
+            release.wait(5)
+        return f"post-{len(self.config['sent'])}"
+
+
+def _tool(**extra):
+    return RecordingFacebookTool({'page_id': '1', 'access_token': 'token', 'sent': [], **extra})
+
+
+def test_expired_deadline_stops_the_send():
+    tool = _tool()
+    deadline = PlatformDeadline()
+    platform_deadline.set(deadline)
+    try:
+        assert tool.post("before") == "post-1"
+        assert deadline.expire() is False
+        with pytest.raises(DeadlineExpired):
+            tool.post("after")
+    finally:
+        platform_deadline.set(None)
+    assert tool.config['sent'] == ["before"]
+
+
+def test_expire_reports_a_send_in_flight():
+    release, started = threading.Event(), threading.Event()
+    tool = _tool(release=release, started=started)
+    deadline = PlatformDeadline()
+
+    def post():
+        platform_deadline.set(deadline)
+        tool.post("slow")
+
+    thread = threading.Thread(target=post)
+    thread.start()
+    assert started.wait(5)
+    assert deadline.expire() is True
+    release.set()
+    thread.join(5)
+    assert deadline.expire() is False
@@ -0,0 +1,18 @@
+import pytest
+import requests
+
+from tools import social_media_tools
+from tools.rate_limit import RateLimited, RateLimitManager
+from tools.social_media_tools import LinkedInTool
+
+
+def test_linkedin_429_blocks_the_account(monkeypatch):
+    manager = RateLimitManager()
+    monkeypatch.setattr(social_media_tools, 'rate_limits', manager)
+    tool = LinkedInTool({'person_id': 'person', 'access_token': 'token'})
+    response = requests.Response()
+    response.status_code = 429
+
+    with pytest.raises(RateLimited) as error:
+        tool._post_id(response)
+    assert manager.blocked_until('linkedin', tool.account) == error.value.retry_at
@@ -0,0 +1,98 @@
+import pytest
+
+from render import TWITTER_MAX_WEIGHT, normalize_hashtags, split_thread, twitter_length
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("hello", 5),
+    ("", 0),
+    # CJK counts twice
+    ("日本", 4),
+    # Emoji count as two however many code points they are built from
+    ("👍", 2),
+    ("👍🏽", 2),
+    ("👨‍👩‍👧", 2),
+    ("🇺🇸", 2),
+    ("1️⃣", 2),
+    # Combining accents join the preceding letter after NFC
+    ("café", 4),
+    # URLs are 23 whatever their length; trailing punctuation is not part of the link
+    ("see https://example.com/a/very/long/path?query=1.", 4 + 23 + 1),
+    ("www.example.com", 23),
+])
+def test_twitter_length(text, expected):
+    assert twitter_length(text) == expected
+
+
+def test_split_thread_short_text_is_one_tweet():
+    assert split_thread("  Short post  ") == ["Short post"]
+
+
+def test_split_thread_exact_limit_is_not_split():
+    text = "a" * TWITTER_MAX_WEIGHT
+    assert split_thread(text) == [text]
+
+
+def test_split_thread_numbers_parts_within_limit():
+    text = " ".join(["word"] * 200)
+    parts = split_thread(text)
+    assert len(parts) > 1
+    assert all(twitter_length(part) <= TWITTER_MAX_WEIGHT for part in parts)
+    assert [part.rsplit(" ", 1)[1] for part in parts] == [f"{i}/{len(parts)}" for i in range(1, len(parts) + 1)]
+    # Every word survives the split
+    assert " ".join(part.rsplit(" ", 1)[0] for part in parts).split() == text.split()
+
+
+def test_split_thread_without_numbering():
+    assert split_thread("a" * 281 + " b", numbering=False) == ["a" * 280, "a b"]
+
+
+def test_split_thread_hard_splits_long_words():
+    parts = split_thread("x" * 1000)
+    assert all(twitter_length(part) <= TWITTER_MAX_WEIGHT for part in parts)
+    assert "".join(part.rsplit(" ", 1)[0] for part in parts) == "x" * 1000
+
+
+def test_split_thread_widens_numbering_past_nine_parts():
+    parts = split_thread(" ".join(["w"] * 20000))
+    assert len(parts) >= 100
+    assert all(twitter_length(part) <= TWITTER_MAX_WEIGHT for part in parts)
+    assert parts[-1].endswith(f" {len(parts)}/{len(parts)}")
+
+
+def test_split_thread_never_splits_emoji():
+    parts = split_thread("👨‍👩‍👧" * 200, numbering=False)
+    assert all(twitter_length(part) <= TWITTER_MAX_WEIGHT for part in parts)
+    assert all(part == "👨‍👩‍👧" * (len(part) // len("👨‍👩‍👧")) for part in parts)
+
+
+def test_split_thread_prefers_paragraph_breaks():
+    first = " ".join(["one"] * 50)
+    second = " ".join(["two"] * 50)
+    parts = split_thread(f"{first}\n\n{second}")
+    assert parts[0] == f"{first} 1/2"
+    assert parts[1] == f"{second} 2/2"
+
+
+@pytest.mark.parametrize("text, max_hashtags, expected", [
+    ("No tags here", 3, "No tags here"),
+    # Repeats in sentences lose their '#', repeats in the block are dropped
+    ("Hello #AI and #ai again\n\n#AI #Data", None, "Hello #AI and ai again\n\n#Data"),
+    # Tags in sentences count first; the trailing block fills the remaining room
+    ("Hello #AI and #ML today\n\n#Data #Cloud #More", 3, "Hello #AI and #ML today\n\n#Data"),
+    ("Hello #A #B #C now\n\n#D", 2, "Hello #A #B #C now"),
+    # Tags ending the last sentence belong to the trailing block
+    ("Launching #AI\n\n#Data #Cloud", 2, "Launching\n\n#AI #Data"),
+    # Text made only of hashtags is trimmed too
+    ("#OnlyTags #Here", 1, "#OnlyTags"),
+    ("#OnlyTags #Here #onlytags", None, "#OnlyTags #Here"),
+    ("#A #B", 0, ""),
+    # A leading block is trimmed like a trailing one, after in-sentence tags
+    ("#News #Launch #Extra Big launch today", 2, "#News #Launch Big launch today"),
+    ("#News #Launch Big #launch day", 2, "#News Big #launch day"),
+    ("#News Big day\n\n#Later #news", 2, "#News Big day\n\n#Later"),
+    # Numeric tags are not hashtags, so they stay in the sentence
+    ("#1 reason to love it #Launch", 0, "#1 reason to love it"),
+])
+def test_normalize_hashtags(text, max_hashtags, expected):
+    assert normalize_hashtags(text, max_hashtags) == expected
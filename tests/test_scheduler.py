@@ -0,0 +1,33 @@
+import pytest
+import requests
+
+from benchmarks.run import PLATFORMS, build_config, install_redirects, parse_args, write_google_token
+from scheduler import JobRunner
+from tools.retry import retrier
+
+
+@pytest.fixture
+def failing_platforms(fake_openai, tmp_path, monkeypatch):
+    """Benchmark config (direct mode, one profile) whose platform APIs answer every post with a 5xx"""
+    monkeypatch.chdir(tmp_path)
+    # The failures below would open the shared circuit breakers for later tests
+    monkeypatch.setattr(retrier, '_breakers', {})
+    config = build_config(fake_openai, parse_args(['--accounts', '1', '--mode', 'direct']))
+    write_google_token()
+    install_redirects(config['http'], fake_openai)
+    requests.post(f"{fake_openai}/_control", json={
+        'revision': 1, 'settings': {platform: {'error_rate': 1.0} for platform in PLATFORMS}})
+    return config
+
+
+def test_run_fails_when_every_platform_fails(failing_platforms):
+    config = {key: value for key, value in failing_platforms.items() if key != 'profiles'}
+    runner = JobRunner(config)
+    assert runner.run() == {'success': False, 'deferred': [(None, {})]}
+    assert sorted(runner.crew.failed) == sorted(PLATFORMS)
+
+
+@pytest.mark.parametrize('mode', ['direct', 'async'])
+def test_profile_fails_when_every_platform_fails(failing_platforms, mode):
+    config = {**failing_platforms, 'workflow': {**failing_platforms['workflow'], 'mode': mode}}
+    assert JobRunner(config).run_profiles() == {'success': False, 'deferred': [('acct-0000', {})]}
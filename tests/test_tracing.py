@@ -0,0 +1,57 @@
+from typing import Any, Callable, Iterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+from llm_cache import CachedChatOpenAI
+from tracing import TokenUsageCallback, Tracer
+
+USAGE = {'prompt_tokens': 12, 'completion_tokens': 3, 'total_tokens': 15}
+
+
+class StreamingStub(BaseChatModel):
+    """Chat model that only streams, reporting usage on its last chunk like OpenAI's include_usage"""
+
+    @property
+    def _llm_type(self) -> str:
+        return 'streaming-stub'
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any):
+        raise NotImplementedError
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        yield ChatGenerationChunk(message=AIMessageChunk(content="Hello "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="world"), generation_info={
+            'finish_reason': 'stop', 'model_name': 'stub-model', 'token_usage': USAGE})
+
+
+def _start_run(tracer: Tracer) -> Callable[[], List[dict]]:
+    """Start a run; the returned function finishes it and returns its LLM spans"""
+    run_id = tracer.start_run('test')
+    return lambda: [span for span in tracer.finish_run(run_id) if span['kind'] == 'llm']
+
+
+def test_streamed_result_records_token_usage():
+    tracer = Tracer({'jsonl_path': None})
+    finish = _start_run(tracer)
+    chunks = list(StreamingStub().stream("Hi", config={'callbacks': [TokenUsageCallback(tracer)]}))
+
+    assert "".join(chunk.content for chunk in chunks) == "Hello world"
+    [span] = finish()
+    assert span['name'] == 'stub-model'
+    assert {key: span[key] for key in USAGE} == USAGE
+    assert tracer.usage()['total_tokens'] == 15
+
+
+def test_agent_client_records_token_usage(fake_openai):
+    tracer = Tracer({'jsonl_path': None})
+    finish = _start_run(tracer)
+    llm = CachedChatOpenAI(api_key='test', base_url=f"{fake_openai}/openai/v1", cache=False,
+                           callbacks=[TokenUsageCallback(tracer)])
+    list(llm.stream("Say something"))
+
+    [span] = finish()
+    assert span['prompt_tokens'] > 0 and span['completion_tokens'] > 0
+    assert span['total_tokens'] == span['prompt_tokens'] + span['completion_tokens']
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import weakref
+import httpx
+from tools.http_session import http_settings
+from tools.rate_limit import rate_limits
+from tracing import tracer
+from typing import Dict, Tuple
+
+
+# Extra transports by URL prefix (e.g. "https://api.twitter.com"), used to
+# route clients through a proxy or to local stand-in servers
+transport_mounts: Dict[str, httpx.AsyncBaseTransport] = {}
+
+
+async def _observe(response: httpx.Response):
+    # Response hooks run before the body is read; read it so the size and
+    # elapsed time are known, then feed the same observers as the sync session
+    await response.aread()
+    rate_limits.observe(response)
+    tracer.observe_http(response)
+
+
+def build_async_client(settings: Dict = None) -> httpx.AsyncClient:
+    """Create a keep-alive async client sized for many in-flight requests"""
+    settings = http_settings(settings)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings['read_timeout'], connect=settings['connect_timeout']),
+        limits=httpx.Limits(
+            max_connections=settings['async_max_connections'],
+            max_keepalive_connections=settings['pool_maxsize']
+        ),
+        mounts=dict(transport_mounts) or None,
+        event_hooks={'response': [_observe]}
+    )
+
+
+# httpx clients are bound to the event loop that first used them
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, httpx.AsyncClient]]' = \
+    weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_async_client(settings: Dict = None) -> httpx.AsyncClient:
+    """Return the running loop's client for these settings, creating it once"""
+    loop = asyncio.get_running_loop()
+    key = tuple(sorted(http_settings(settings).items()))
+    with _clients_lock:
+        clients = _clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = build_async_client(settings)
+        return clients[key]
+
+
+async def close_async_clients():
+    """Close every client created on the running loop"""
+    with _clients_lock:
+        clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def run_async(coroutine):
+    """Run a coroutine on a new event loop and close its HTTP clients afterwards"""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close_async_clients()
+
+    return asyncio.run(main())
@@ -0,0 +1,190 @@
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from registry import fingerprint
+from tracing import current_run
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    profile TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    posted TEXT NOT NULL,
+    pending TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    content_key TEXT
+);
+"""
+
+# Columns added after the first release, created on older checkpoint stores at open
+MIGRATIONS = {
+    'content_key': "ALTER TABLE checkpoints ADD COLUMN content_key TEXT",
+}
+
+
+def content_key(content_mapping: Dict[str, str], versions: Dict[str, str]) -> str:
+    """Identifies the content a checkpoint was saved for: the mapping and each file's Drive revision"""
+    return fingerprint({'content_mapping': content_mapping, 'versions': versions})
+
+
+class RunOutcomes:
+    """What each platform tool did during a run, keyed by the tracer's run ID.
+
+    Tools report here whether they are driven by an agent or a workflow, so
+    the crew can tell which platforms were actually posted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict[str, Dict]] = {}
+
+    def record(self, platform: str, post_id: Optional[str] = None, error: Optional[Exception] = None):
+        run_id = current_run.get()
+        if run_id is None:
+            return
+        with self._lock:
+            platforms = self._runs.setdefault(run_id, {})
+            # An agent may retry a tool; a success in the run is what counts
+            if platforms.get(platform, {}).get('post_id') is None:
+                platforms[platform] = {'post_id': post_id, 'error': str(error) if error else None}
+
+    def pop(self, run_id: str) -> Dict[str, Dict]:
+        with self._lock:
+            return self._runs.pop(run_id, {})
+
+
+class DeadlineExpired(Exception):
+    """Raised when a tool tries to publish after the workflow stopped waiting for its platform"""
+
+
+class PlatformDeadline:
+    """Lets the parallel workflow stop a platform thread it has given up on.
+
+    The thread cannot be killed, so tools check in before sending: once the
+    deadline has expired nothing new is published. A send already under way
+    cannot be recalled, so ``expire`` reports it and the crew treats the
+    platform as in flight rather than failed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expired = False
+        self._sending = 0
+
+    def expire(self) -> bool:
+        """Refuse further sends; True when a send is already in flight"""
+        with self._lock:
+            self._expired = True
+            return self._sending > 0
+
+    @contextmanager
+    def sending(self, platform: str):
+        with self._lock:
+            if self._expired:
+                raise DeadlineExpired(f"{platform} missed the workflow deadline; the post was not sent")
+            self._sending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._sending -= 1
+
+
+# Set in each parallel workflow thread; None when the caller waits for the tool
+platform_deadline: contextvars.ContextVar[Optional[PlatformDeadline]] = contextvars.ContextVar(
+    'platform_deadline', default=None)
+
+
+@contextmanager
+def deadline_guard(platform: str):
+    """Hold for the duration of a send so an expired deadline stops it from starting"""
+    deadline = platform_deadline.get()
+    if deadline is None:
+        yield
+        return
+    with deadline.sending(platform):
+        yield
+
+
+class WorkflowCheckpoint:
+    """Per-profile record of an unfinished run so a rerun only redoes what failed.
+
+    The fetched content and the platforms already posted are saved when a run
+    ends with platforms still pending. A rerun within ``ttl_seconds`` reuses
+    the content instead of reading Drive again and skips the posted platforms,
+    as long as its ``content_key`` still matches: a changed content mapping or
+    an edited Drive file means the checkpoint describes a different post.
+    """
+
+    def __init__(self, config: Dict):
+        self.path = config.get('path', 'checkpoints.db')
+        self.ttl_seconds = config.get('ttl_seconds', 20 * 3600)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(checkpoints)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+
+    def load(self, profile: str) -> Optional[Dict]:
+        """The profile's checkpoint as {content, posted, pending, content_key}, if one is still fresh"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM checkpoints WHERE profile = ? AND updated_at >= ?",
+                (profile, time.time() - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'content': json.loads(row['content']),
+            'posted': json.loads(row['posted']),
+            'pending': json.loads(row['pending']),
+            'content_key': row['content_key']
+        }
+
+    def save(self, profile: str, content: Dict[str, Dict], posted: Dict[str, str], pending: List[str],
+             key: str):
+        # Only the text is kept; media handles are looked up again on resume
+        content = {
+            platform: {'file': item['file'], 'content': item['content'], 'error': item['error'],
+                       'version': item.get('version')}
+            for platform, item in content.items()
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (profile, content, posted, pending, updated_at, content_key) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (profile, json.dumps(content), json.dumps(posted), json.dumps(pending), time.time(), key)
+            )
+
+    def clear(self, profile: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE profile = ?", (profile,))
+
+
+_checkpoints: Dict[str, WorkflowCheckpoint] = {}
+_checkpoints_lock = threading.Lock()
+
+
+def get_checkpoint(config: Optional[Dict]) -> Optional[WorkflowCheckpoint]:
+    """Return the process-wide checkpoint store for this config, or None when disabled"""
+    config = config or {}
+    if not config.get('enabled', True):
+        return None
+
+    path = config.get('path', 'checkpoints.db')
+    with _checkpoints_lock:
+        if path not in _checkpoints:
+            _checkpoints[path] = WorkflowCheckpoint(config)
+        return _checkpoints[path]
+
+
+# Filled in by every platform tool in the process
+outcomes = RunOutcomes()
@@ -0,0 +1,378 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timezone
+from typing import Dict, List, Optional
+
+from tools.rate_limit import account_key, alias_token
+
+try:
+    import fcntl
+except ImportError:  # no advisory file locks on Windows; single-process use only
+    fcntl = None
+
+
+DEFAULT_CREDENTIAL_SETTINGS = {
+    'store_path': 'token_store.json',
+    # Google access tokens live for an hour; refresh them this long before expiry
+    'refresh_margin': 600,
+    # LinkedIn and Facebook long-lived tokens last ~60 days; refresh a week early
+    'long_lived_refresh_margin': 7 * 24 * 3600,
+    'check_interval': 300,
+    'background_refresh': True,
+    # None means "only when attached to a terminal"
+    'interactive': None
+}
+
+LINKEDIN_TOKEN_URL = "https://www.linkedin.com/oauth/v2/accessToken"
+LINKEDIN_INTROSPECT_URL = "https://www.linkedin.com/oauth/v2/introspectToken"
+FACEBOOK_GRAPH_URL = "https://graph.facebook.com/"
+
+# After a failed refresh, a token that still works is used this long before trying again
+REFRESH_RETRY_SECONDS = 60
+
+logger = logging.getLogger('credentials')
+
+
+class CredentialsError(Exception):
+    """Raised when valid credentials cannot be obtained without user interaction"""
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive advisory lock on ``path + '.lock'``, shared by every process on the host"""
+    if fcntl is None:
+        yield
+        return
+
+    with open(path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class CredentialManager:
+    """Keeps OAuth tokens valid in memory and on disk, shared safely between processes.
+
+    The Google token lives in ``google_drive.token_file`` as before; refreshed
+    LinkedIn and Facebook tokens are kept in ``store_path``. Every read-modify-
+    write happens under a file lock, and a process that finds a token another
+    process has just refreshed adopts it instead of refreshing again. A
+    background thread refreshes tokens ahead of expiry so posting never waits
+    on it. Interactive consent is never started in worker mode.
+
+    Refreshes are network calls, so each token file or token has its own
+    lock; callers of other credentials never wait on them. A failed refresh
+    is logged and the current token is used until it actually expires.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self._lock = threading.RLock()
+        self._google: Dict[str, object] = {}
+        self._tokens: Dict[str, Dict] = {}
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+        # Credential -> time before which a failed refresh is not retried
+        self._retry_at: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        # Set by the scheduler loop; no browser flows from a headless worker
+        self.worker = False
+        self.configure(config or {})
+
+    def configure(self, config: Dict):
+        settings = {**DEFAULT_CREDENTIAL_SETTINGS, **config}
+        self.store_path = settings['store_path']
+        self.refresh_margin = settings['refresh_margin']
+        self.long_lived_refresh_margin = settings['long_lived_refresh_margin']
+        self.check_interval = settings['check_interval']
+        self.background_refresh = settings['background_refresh']
+        self._interactive = settings['interactive']
+
+    @property
+    def interactive(self) -> bool:
+        if self.worker:
+            return False
+        if self._interactive is None:
+            return sys.stdin is not None and sys.stdin.isatty()
+        return bool(self._interactive)
+
+    def _refresh_lock(self, name: str) -> threading.Lock:
+        """Lock serialising the refreshes of one credential"""
+        with self._lock:
+            return self._refresh_locks.setdefault(name, threading.Lock())
+
+    def _backing_off(self, name: str) -> bool:
+        return self._retry_at.get(name, 0) > time.time()
+
+    def _refresh_failed(self, name: str, error: Exception, expired: bool):
+        """Raise if the credential is unusable, else log and keep it until it expires"""
+        self._retry_at[name] = time.time() + REFRESH_RETRY_SECONDS
+        if expired:
+            raise CredentialsError(f"{name} token expired and could not be refreshed: {str(error)}") from error
+        logger.warning(f"⚠️ {name} token refresh failed, using the current token until it expires: {str(error)}")
+
+    # Google
+
+    @staticmethod
+    def _expires_at(creds) -> Optional[float]:
+        # google-auth keeps expiry as a naive UTC datetime
+        return creds.expiry.replace(tzinfo=timezone.utc).timestamp() if creds.expiry else None
+
+    def _google_due(self, creds) -> bool:
+        expires_at = self._expires_at(creds)
+        return not creds.token or (expires_at is not None and expires_at - time.time() < self.refresh_margin)
+
+    def google(self, drive_config: Dict):
+        """Valid Google credentials for a Drive config, loaded once per token file"""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+
+        path = drive_config.get('token_file', 'token.json')
+        name = f"google:{path}"
+        with self._lock:
+            creds = self._google.get(path)
+        if creds is not None and (not self._google_due(creds) or (creds.valid and self._backing_off(name))):
+            return creds
+
+        with self._refresh_lock(name), file_lock(path):
+            with self._lock:
+                creds = self._google.get(path)
+            # Another thread may have refreshed it while this one waited
+            if creds is not None and not self._google_due(creds):
+                return creds
+
+            stored = Credentials.from_authorized_user_file(path, drive_config['scopes']) \
+                if os.path.exists(path) else None
+            if creds is None:
+                creds = stored
+            elif stored is not None and stored.token != creds.token:
+                # Another process refreshed it; adopt its token in place so
+                # clients already holding this object see the new one
+                creds.token, creds.expiry = stored.token, stored.expiry
+
+            if creds is not None and self._google_due(creds) and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                    _write_atomic(path, creds.to_json())
+                except Exception as e:
+                    self._refresh_failed(name, e, expired=not creds.valid)
+            elif creds is None or not creds.valid:
+                creds = self._google_consent(drive_config)
+                _write_atomic(path, creds.to_json())
+
+            with self._lock:
+                self._google[path] = creds
+        return creds
+
+    def _google_consent(self, drive_config: Dict):
+        if not self.interactive:
+            raise CredentialsError(
+                f"No usable Google token in {drive_config.get('token_file', 'token.json')}; "
+                f"run `python scheduler.py --authorize` once from a terminal")
+        # Only needed for the one-time browser consent, so imported here
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        flow = InstalledAppFlow.from_client_secrets_file(drive_config['credentials_file'], drive_config['scopes'])
+        return flow.run_local_server(port=0)
+
+    def authorize_google(self, drive_config: Dict):
+        """Run the browser consent now and save the token (for --authorize)"""
+        path = drive_config.get('token_file', 'token.json')
+        creds = self._google_consent(drive_config)
+        with self._refresh_lock(f"google:{path}"), file_lock(path):
+            _write_atomic(path, creds.to_json())
+            with self._lock:
+                self._google.pop(path, None)
+        return creds
+
+    # LinkedIn and Facebook
+
+    def _read_store(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.store_path):
+            return {}
+        with open(self.store_path) as f:
+            return json.load(f)
+
+    def _token_key(self, platform: str, config: Dict) -> str:
+        # Keyed by the configured token, so a profile's entry survives refreshes
+        return f"{platform}:{account_key(config['access_token'])}"
+
+    def access_token(self, platform: str, config: Dict) -> str:
+        """Current access token for a LinkedIn or Facebook config, refreshing it when close to expiry"""
+        key = self._token_key(platform, config)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                entry = {'platform': platform, 'config': config, 'access_token': config['access_token'],
+                         'expires_at': config.get('expires_at')}
+                entry.update(self._read_store().get(key, {}))
+                self._tokens[key] = entry
+                alias_token(entry['access_token'], config['access_token'])
+
+        if self._token_due(entry) and (self._token_expired(entry) or not self._backing_off(key)):
+            try:
+                self._refresh_token(key)
+            except Exception as e:
+                self._refresh_failed(key, e, expired=self._token_expired(entry))
+        return entry['access_token']
+
+    def _token_due(self, entry: Dict) -> bool:
+        expires_at = entry.get('expires_at')
+        return bool(expires_at) and expires_at - time.time() < self.long_lived_refresh_margin
+
+    @staticmethod
+    def _token_expired(entry: Dict) -> bool:
+        expires_at = entry.get('expires_at')
+        return bool(expires_at) and expires_at <= time.time()
+
+    def _refresh_token(self, key: str):
+        with self._lock:
+            entry = self._tokens[key]
+        with self._refresh_lock(key):
+            # Another thread may have refreshed it while this one waited
+            if not self._token_due(entry):
+                return
+            with file_lock(self.store_path):
+                stored = self._read_store()
+                if key in stored and not self._token_due(stored[key]):
+                    entry.update(stored[key])
+                else:
+                    refreshed = getattr(self, f"_refresh_{entry['platform']}")(entry)
+                    if refreshed is None:
+                        return
+                    entry.update(refreshed)
+                    stored[key] = refreshed
+                    _write_atomic(self.store_path, json.dumps(stored, indent=2))
+                    logger.info(f"🔑 Refreshed {entry['platform']} access token")
+            alias_token(entry['access_token'], entry['config']['access_token'])
+
+    @staticmethod
+    def _session():
+        from tools.http_session import get_session
+        return get_session()
+
+    def _refresh_linkedin(self, entry: Dict) -> Optional[Dict]:
+        """Exchange the refresh token for a new access token (needs client_id/client_secret)"""
+        config = entry['config']
+        refresh_token = entry.get('refresh_token') or config.get('refresh_token')
+        if not (refresh_token and config.get('client_id') and config.get('client_secret')):
+            return None
+        response = self._session().post(LINKEDIN_TOKEN_URL, data={
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': config['client_id'],
+            'client_secret': config['client_secret']
+        })
+        response.raise_for_status()
+        result = response.json()
+        return {
+            'access_token': result['access_token'],
+            'expires_at': time.time() + result['expires_in'],
+            'refresh_token': result.get('refresh_token', refresh_token)
+        }
+
+    def _refresh_facebook(self, entry: Dict) -> Optional[Dict]:
+        """Exchange a long-lived token for a fresh one (needs app_id/app_secret)"""
+        config = entry['config']
+        if not (config.get('app_id') and config.get('app_secret')):
+            return None
+        response = self._session().get(f"{FACEBOOK_GRAPH_URL}oauth/access_token", params={
+            'grant_type': 'fb_exchange_token',
+            'client_id': config['app_id'],
+            'client_secret': config['app_secret'],
+            'fb_exchange_token': entry['access_token']
+        })
+        response.raise_for_status()
+        result = response.json()
+        # Page tokens minted from a long-lived user token do not expire
+        expires_in = result.get('expires_in')
+        return {'access_token': result['access_token'], 'expires_at': time.time() + expires_in if expires_in else 0}
+
+    def _discover_expiry(self, key: str):
+        """Ask the platform when a token without a known expiry runs out"""
+        entry = self._tokens[key]
+        config = entry['config']
+        if entry['platform'] == 'linkedin' and config.get('client_id') and config.get('client_secret'):
+            response = self._session().post(LINKEDIN_INTROSPECT_URL, data={
+                'client_id': config['client_id'],
+                'client_secret': config['client_secret'],
+                'token': entry['access_token']
+            })
+            expires_at = response.json().get('expires_at') if response.ok else None
+        elif entry['platform'] == 'facebook' and config.get('app_id') and config.get('app_secret'):
+            response = self._session().get(f"{FACEBOOK_GRAPH_URL}debug_token", params={
+                'input_token': entry['access_token'],
+                'access_token': f"{config['app_id']}|{config['app_secret']}"
+            })
+            expires_at = response.json().get('data', {}).get('expires_at') if response.ok else None
+        else:
+            expires_at = None
+        # 0 records "never expires" (or "cannot tell") so the platform is not asked again
+        entry['expires_at'] = expires_at or 0
+
+    # Background refresh
+
+    def register(self, config: Dict):
+        """Track every credential in a profile config so the refresher keeps it valid"""
+        if config.get('google_drive', {}).get('scopes'):
+            try:
+                self.google(config['google_drive'])
+            except CredentialsError as e:
+                logger.warning(f"⚠️ {str(e)}")
+        for platform in ('linkedin', 'facebook'):
+            if config.get(platform, {}).get('access_token'):
+                self.access_token(platform, config[platform])
+
+    def refresh_due(self):
+        """One refresh pass over every tracked credential"""
+        with self._lock:
+            google = [(path, creds) for path, creds in self._google.items() if self._google_due(creds)]
+            tokens = list(self._tokens)
+
+        for path, creds in google:
+            try:
+                self.google({'token_file': path, 'scopes': creds.scopes})
+            except Exception as e:
+                logger.warning(f"⚠️ Google token refresh failed: {str(e)}")
+
+        for key in tokens:
+            try:
+                if self._tokens[key].get('expires_at') is None:
+                    self._discover_expiry(key)
+                if self._token_due(self._tokens[key]):
+                    self._refresh_token(key)
+            except Exception as e:
+                logger.warning(f"⚠️ {self._tokens[key]['platform']} token refresh failed: {str(e)}")
+
+    def start(self, configs: List[Dict]):
+        """Start the daemon refresher for these profile configs (once per process)"""
+        if not self.background_refresh or self._thread is not None:
+            return
+
+        def run():
+            for config in configs:
+                try:
+                    self.register(config)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not load credentials for {config.get('profile', 'default')}: {str(e)}")
+            while True:
+                self.refresh_due()
+                time.sleep(self.check_interval)
+
+        self._thread = threading.Thread(target=run, name='credential-refresh', daemon=True)
+        self._thread.start()
+
+
+# Shared by every tool and profile in the process
+credential_manager = CredentialManager()
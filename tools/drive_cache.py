@@ -0,0 +1,170 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    name_key TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    file_id TEXT PRIMARY KEY,
+    version TEXT,
+    blob TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_last_access ON files (last_access);
+"""
+
+
+class DriveCache:
+    """On-disk cache of Google Drive file contents.
+
+    Blobs are stored under their content hash, and a SQLite index maps file
+    IDs to the Drive version (md5Checksum, or modifiedTime for files without
+    one) they were downloaded at, plus folder/name pairs to file IDs. Every
+    read and write goes to the index, so pool workers and profiles in other
+    processes sharing the directory see each other's entries. Least recently
+    used files are evicted once the blobs exceed ``max_bytes``.
+    """
+
+    def __init__(self, config: Dict):
+        self.directory = config.get('directory', '.drive_cache')
+        self.max_bytes = config.get('max_bytes', 100 * 1024 * 1024)
+        self.name_ttl = config.get('name_ttl', 3600)
+        self.metadata_ttl = config.get('metadata_ttl', 0)
+        self.blob_dir = os.path.join(self.directory, 'blobs')
+        self.index_path = os.path.join(self.directory, 'index.db')
+        self._lock = threading.Lock()
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def version_of(metadata: Dict) -> Optional[str]:
+        """Identify a file revision from its Drive metadata"""
+        return metadata.get('md5Checksum') or metadata.get('modifiedTime')
+
+    def resolve(self, folder_id: str, filename: str) -> Optional[str]:
+        """Return the cached file ID for a name, if it is still fresh"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, resolved_at FROM names WHERE name_key = ?", (f"{folder_id}/{filename}",)
+            ).fetchone()
+        if row and time.time() - row[1] < self.name_ttl:
+            return row[0]
+        return None
+
+    def remember_name(self, folder_id: str, filename: str, file_id: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO names (name_key, file_id, resolved_at) VALUES (?, ?, ?)",
+                (f"{folder_id}/{filename}", file_id, time.time())
+            )
+
+    def forget_name(self, folder_id: str, filename: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM names WHERE name_key = ?", (f"{folder_id}/{filename}",))
+
+    def needs_metadata_check(self, file_id: str) -> bool:
+        """Whether the Drive version of a cached file should be re-checked"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blob, checked_at FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        if not row or not os.path.exists(self._blob_path(row[0])):
+            return True
+        return time.time() - row[1] >= self.metadata_ttl
+
+    def get(self, file_id: str, version: Optional[str] = None) -> Optional[bytes]:
+        """Return cached bytes, or None on a miss or when the version has changed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, blob FROM files WHERE file_id = ?", (file_id,)).fetchone()
+            if not row or (version is not None and row[0] != version):
+                return None
+
+            try:
+                with open(self._blob_path(row[1]), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                # Evicted by another process; only drop the entry if it still points at that blob
+                self._conn.execute("DELETE FROM files WHERE file_id = ? AND blob = ?", (file_id, row[1]))
+                return None
+
+            now = time.time()
+            if version is not None:
+                self._conn.execute(
+                    "UPDATE files SET last_access = ?, checked_at = ? WHERE file_id = ?", (now, now, file_id))
+            else:
+                self._conn.execute("UPDATE files SET last_access = ? WHERE file_id = ?", (now, file_id))
+            return data
+
+    def put(self, file_id: str, version: Optional[str], data: bytes):
+        """Store a downloaded revision and evict old entries past the size budget"""
+        blob = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(blob)
+
+        with self._lock:
+            if not os.path.exists(blob_path):
+                fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, blob_path)
+
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (file_id, version, blob, size, last_access, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_id, version, blob, len(data), now, now)
+                )
+                doomed = self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        for blob in doomed:
+            try:
+                os.remove(self._blob_path(blob))
+            except OSError:
+                pass
+
+    def _blob_path(self, blob: str) -> str:
+        return os.path.join(self.blob_dir, blob)
+
+    def _evict(self) -> List[str]:
+        """Drop least recently used files until the blobs fit in max_bytes; returns the blobs to delete"""
+        rows = self._conn.execute("SELECT file_id, blob, size FROM files ORDER BY last_access").fetchall()
+        # Identical content may be shared by several file IDs
+        blob_sizes = {blob: size for _, blob, size in rows}
+        references = {}
+        for _, blob, _ in rows:
+            references[blob] = references.get(blob, 0) + 1
+        total = sum(blob_sizes.values())
+
+        doomed = []
+        for file_id, blob, _ in rows:
+            if total <= self.max_bytes:
+                break
+
+            self._conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+            # Another process may have resolved a name it has not downloaded yet, so only
+            # mappings to evicted files are dropped
+            self._conn.execute("DELETE FROM names WHERE file_id = ?", (file_id,))
+            references[blob] -= 1
+            if not references[blob]:
+                total -= blob_sizes[blob]
+                doomed.append(blob)
+        return doomed
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+import uuid
+from tracing import current_run
+from typing import Dict, List, Optional
+
+
+class DryRunRecorder:
+    """Log of the requests the platform tools would have sent, in place of sending them.
+
+    In dry-run mode each tool renders and validates its post as usual, then
+    hands the final request bodies here instead of calling the platform API.
+    Every entry is appended to a JSON lines file with how long the tool took
+    to prepare it, and counted in memory for the end-of-run summary.
+    """
+
+    def __init__(self, config: Dict):
+        self.path = config.get('path', 'dry_run.jsonl')
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, platform: str, account: str, requests: List[Dict], seconds: float,
+               media: Optional[Dict] = None, error: Optional[Exception] = None) -> Optional[str]:
+        """Store one would-be post; returns a placeholder post ID (None when it failed validation)"""
+        post_id = None if error is not None else f"dry-run-{uuid.uuid4().hex[:12]}"
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'run_id': current_run.get(),
+            'platform': platform,
+            'account': account,
+            'post_id': post_id,
+            'seconds': round(seconds, 6),
+            'requests': requests,
+            'media': media,
+            'error': str(error) if error is not None else None
+        }
+        with self._lock:
+            counts = self._counts.setdefault(platform, {'valid': 0, 'invalid': 0})
+            counts['invalid' if error is not None else 'valid'] += 1
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        return post_id
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Valid and invalid would-be posts per platform since the process started"""
+        with self._lock:
+            return {platform: dict(counts) for platform, counts in self._counts.items()}
+
+
+_recorders: Dict[str, DryRunRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_dry_run(config: Optional[Dict]) -> Optional[DryRunRecorder]:
+    """Return the process-wide recorder for this config, or None when posts are published for real"""
+    config = config or {}
+    if not config.get('enabled', False):
+        return None
+
+    path = config.get('path', 'dry_run.jsonl')
+    with _recorders_lock:
+        if path not in _recorders:
+            _recorders[path] = DryRunRecorder(config)
+        return _recorders[path]
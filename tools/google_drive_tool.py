@@ -1,11 +1,35 @@
 from crewai_tools import BaseTool
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
+from tools.async_http import get_async_client
+from tools.credentials import credential_manager
+from tools.drive_cache import DriveCache
+from tools.media import DEFAULT_CHUNK_SIZE, MediaFile
+from tools.retry import retrier
+from tracing import run_in_context, tracer
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import httplib2
 import json
-import os
-from typing import Dict, List
+import threading
+from typing import Dict, Iterator, List, Tuple
+
+
+DRIVE_API_URL = "https://www.googleapis.com/drive/v3/"
+
+
+@lru_cache(maxsize=None)
+def drive_discovery_document() -> str:
+    """Drive v3 discovery document bundled with googleapiclient, read once per process"""
+    return discovery_cache.get_static_doc('drive', 'v3')
+
+
+def query_string(value: str) -> str:
+    """Quote a value for a Drive ``q`` expression, escaping backslashes and single quotes"""
+    return "'%s'" % value.replace('\\', '\\\\').replace("'", "\\'")
 
 
 class GoogleDriveTool(BaseTool):
@@ -15,45 +39,348 @@ class GoogleDriveTool(BaseTool):
     def __init__(self, config: Dict):
         super().__init__()
         self.config = config
-        self.service = self._authenticate()
+        self._local = threading.local()
+        # OAuth and client construction wait for the first Drive call
+        self._service = None
+        self._service_lock = threading.Lock()
+        
+        cache_config = config.get('cache', {})
+        self.cache = DriveCache(cache_config) if cache_config.get('enabled', True) else None
     
     def _authenticate(self):
         """Authenticate with Google Drive API"""
-        creds = None
-        token_file = 'token.json'
+        # Shared, file-locked token; never opens a browser in worker mode
+        creds = credential_manager.google(self.config)
         
-        if os.path.exists(token_file):
-            creds = Credentials.from_authorized_user_file(token_file, self.config['scopes'])
+        self.credentials = creds
+        # api_endpoint points the client at a proxy or a local stand-in server
+        client_options = {'api_endpoint': self.config['api_endpoint']} if self.config.get('api_endpoint') else None
+        return build_from_document(drive_discovery_document(), credentials=creds, client_options=client_options)
+    
+    @property
+    def service(self):
+        """Drive API client, authenticated on first use"""
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    self._service = self._authenticate()
+        return self._service
+    
+    def _http(self) -> AuthorizedHttp:
+        """Per-thread authorized connection; httplib2 objects are not thread-safe"""
+        if not hasattr(self._local, 'http'):
+            self.service
+            self._local.http = AuthorizedHttp(
+                self.credentials, http=httplib2.Http(timeout=self.config.get('timeout', 60)))
+        return self._local.http
+    
+    def _execute(self, request):
+        """Execute a Drive API request on this thread's connection, retrying transient failures"""
+        # Cheap unless the token is close to expiry; then it is refreshed once for all processes
+        credential_manager.google(self.config)
+        return retrier.call('google_drive', request.execute, http=self._http(), idempotent=True)
+    
+    async def _aget(self, client, url: str, **kwargs):
+        """GET a Drive REST URL on the async client, retrying transient failures"""
+        async def get():
+            response = await client.get(url, **kwargs)
+            response.raise_for_status()
+            return response
+        return await retrier.acall('google_drive', get, idempotent=True)
+    
+    def _find_file(self, filename: str) -> Dict:
+        """Look up a file's ID and version metadata by name in the content folder"""
+        query = f"name={query_string(filename)} and parents in {query_string(self.config['content_folder_id'])}"
+        results = self._execute(self.service.files().list(
+            q=query, fields="files(id, name, md5Checksum, modifiedTime, size)"))
+        files = results.get('files', [])
+        
+        if not files:
+            raise FileNotFoundError(f"File '{filename}' not found in Google Drive")
+        
+        return files[0]
+    
+    def media_file(self, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> MediaFile:
+        """Describe a media file for streaming upload; nothing is downloaded yet"""
+        query = f"name={query_string(filename)} and parents in {query_string(self.config['content_folder_id'])} " \
+                "and trashed=false"
+        with tracer.span('http', 'drive files.list', file=filename):
+            results = self._execute(self.service.files().list(
+                q=query, fields="files(id, name, mimeType, md5Checksum, modifiedTime, size)"))
+        files = results.get('files', [])
         
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
+        if not files:
+            raise FileNotFoundError(f"File '{filename}' not found in Google Drive")
+        
+        metadata = files[0]
+        return MediaFile(
+            file_id=metadata['id'],
+            name=metadata['name'],
+            mime_type=metadata.get('mimeType', 'application/octet-stream'),
+            size=int(metadata.get('size', 0)),
+            version=DriveCache.version_of(metadata),
+            chunk_size=chunk_size,
+            source=self
+        )
+    
+    def _download(self, file_id: str) -> bytes:
+        return self._execute(self.service.files().get_media(fileId=file_id))
+    
+    def fetch(self, filename: str) -> str:
+        """Download a file from the content folder, raising if it cannot be read"""
+        with tracer.span('tool', self.name, file=filename) as span:
+            if self.cache is None:
+                data = self._download(self._find_file(filename)['id'])
             else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.config['credentials_file'], self.config['scopes'])
-                creds = flow.run_local_server(port=0)
-            
-            with open(token_file, 'w') as token:
-                token.write(creds.to_json())
+                data = self._fetch_cached(filename)
+            span['bytes'] = len(data)
+            return data.decode('utf-8')
+    
+    def _fetch_cached(self, filename: str) -> bytes:
+        """Serve from the local cache, re-downloading only changed files"""
+        folder_id = self.config['content_folder_id']
+        file_id = self.cache.resolve(folder_id, filename)
+        metadata = None
+        
+        if file_id is None:
+            metadata = self._find_file(filename)
+            file_id = metadata['id']
+            self.cache.remember_name(folder_id, filename, file_id)
+        elif not self.cache.needs_metadata_check(file_id):
+            data = self.cache.get(file_id)
+            if data is not None:
+                return data
+        
+        if metadata is None:
+            try:
+                metadata = self._execute(self.service.files().get(
+                    fileId=file_id, fields="id, md5Checksum, modifiedTime, size"))
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
+                # The cached name now points at a deleted file; resolve it again
+                self.cache.forget_name(folder_id, filename)
+                metadata = self._find_file(filename)
+                file_id = metadata['id']
+                self.cache.remember_name(folder_id, filename, file_id)
         
-        return build('drive', 'v3', credentials=creds)
+        version = DriveCache.version_of(metadata)
+        data = self.cache.get(file_id, version)
+        if data is None:
+            data = self._download(file_id)
+            self.cache.put(file_id, version, data)
+        
+        return data
     
-    def _run(self, filename: str) -> str:
-        """Fetch content from a specific file in Google Drive"""
-        try:
-            # Search for the file in the specified folder
-            query = f"name='{filename}' and parents in '{self.config['content_folder_id']}'"
-            results = self.service.files().list(q=query, fields="files(id, name)").execute()
-            files = results.get('files', [])
+    def _list_queries(self, filenames: List[str]) -> Iterator[str]:
+        """OR-ed name queries, split so each stays within Drive's query length limits"""
+        folder_id = self.config['content_folder_id']
+        batch_size = self.config.get('list_batch_size', 50)
+        
+        for start in range(0, len(filenames), batch_size):
+            names = filenames[start:start + batch_size]
+            clauses = " or ".join(f"name={query_string(name)}" for name in names)
+            yield f"({clauses}) and {query_string(folder_id)} in parents and trashed=false"
+    
+    def _list_files(self, filenames: List[str]) -> Dict[str, Dict]:
+        """Resolve many names with OR-ed list queries, returning name -> metadata"""
+        found = {}
+        
+        for query in self._list_queries(filenames):
+            page_token = None
             
-            if not files:
-                return f"File '{filename}' not found in Google Drive"
+            while True:
+                results = self._execute(self.service.files().list(
+                    q=query,
+                    fields="nextPageToken, files(id, name, md5Checksum, modifiedTime, size)",
+                    pageSize=1000,
+                    pageToken=page_token
+                ))
+                for item in results.get('files', []):
+                    found.setdefault(item['name'], item)
+                
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+        
+        return found
+    
+    def list_folder(self, folder_id: str) -> Iterator[Dict]:
+        """Yield the metadata of every file in a folder, one listing page at a time"""
+        page_token = None
+        while True:
+            results = self._execute(self.service.files().list(
+                q=f"parents in {query_string(folder_id)} and trashed=false",
+                fields="nextPageToken, files(id, name, mimeType, modifiedTime)",
+                pageSize=1000,
+                pageToken=page_token
+            ))
+            yield from results.get('files', [])
             
-            file_id = files[0]['id']
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return
+    
+    def _split_cached(self, filenames: List[str], metadata: Dict[str, Dict]):
+        """Sort listed files into cached contents, errors and (file_id, version) downloads"""
+        folder_id = self.config['content_folder_id']
+        contents = {}
+        errors = {}
+        pending = {}
+        for filename in filenames:
+            if filename not in metadata:
+                errors[filename] = f"File '{filename}' not found in Google Drive"
+                continue
             
-            # Download file content
-            content = self.service.files().get_media(fileId=file_id).execute()
-            return content.decode('utf-8')
+            file_id = metadata[filename]['id']
+            version = DriveCache.version_of(metadata[filename])
+            if self.cache is not None:
+                self.cache.remember_name(folder_id, filename, file_id)
+                data = self.cache.get(file_id, version)
+                if data is not None:
+                    contents[filename] = data.decode('utf-8')
+                    continue
             
+            pending[filename] = (file_id, version)
+        
+        return contents, errors, pending
+    
+    @staticmethod
+    def _versions(filenames: List[str], metadata: Dict[str, Dict]) -> Dict[str, str]:
+        return {filename: DriveCache.version_of(metadata[filename]) for filename in filenames if filename in metadata}
+    
+    def file_versions(self, filenames: List[str]) -> Dict[str, str]:
+        """Current Drive revision of each file that exists, from one listing"""
+        unique = list(dict.fromkeys(filenames))
+        if not unique:
+            return {}
+        with tracer.span('http', 'drive files.list', files=len(unique)):
+            return self._versions(unique, self._list_files(unique))
+    
+    def fetch_many(self, filenames: List[str]) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+        """Fetch several files with one name lookup and concurrent downloads.
+        
+        Returns (contents, errors, versions), all keyed by filename; versions
+        are the Drive revisions that were read.
+        """
+        unique = list(dict.fromkeys(filenames))
+        with tracer.span('http', 'drive files.list', files=len(unique)):
+            metadata = self._list_files(unique)
+        contents, errors, pending = self._split_cached(unique, metadata)
+        versions = self._versions(unique, metadata)
+        
+        def download(item):
+            filename, (file_id, version) = item
+            try:
+                with tracer.span('http', 'drive get_media', file=filename) as span:
+                    data = self._download(file_id)
+                    span['bytes_received'] = len(data)
+            except Exception as e:
+                return filename, None, e
+            if self.cache is not None:
+                self.cache.put(file_id, version, data)
+            return filename, data, None
+        
+        if pending:
+            workers = min(len(pending), self.config.get('max_concurrent_downloads', 8))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='drive') as pool:
+                futures = [pool.submit(run_in_context(download), item) for item in pending.items()]
+                for filename, data, error in (future.result() for future in futures):
+                    if error is not None:
+                        errors[filename] = f"Error fetching content from Google Drive: {str(error)}"
+                    else:
+                        contents[filename] = data.decode('utf-8')
+        
+        return contents, errors, versions
+    
+    def _authorized_headers(self) -> Dict[str, str]:
+        """Bearer header for direct REST calls, refreshing the token when it has expired"""
+        self.service
+        # Refreshes (or adopts another process's refresh) in place
+        credential_manager.google(self.config)
+        headers = {}
+        self.credentials.apply(headers)
+        return headers
+    
+    async def afetch_many(self, filenames: List[str]) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+        """Async variant of fetch_many calling the Drive REST API over the shared async client"""
+        unique = list(dict.fromkeys(filenames))
+        # OAuth may need a blocking token refresh, so it runs off the event loop
+        headers = await asyncio.to_thread(self._authorized_headers)
+        client = get_async_client({'read_timeout': self.config.get('timeout', 60)})
+        base_url = self.config.get('api_endpoint') or DRIVE_API_URL
+        
+        metadata = {}
+        with tracer.span('http', 'drive files.list', files=len(unique)):
+            for query in self._list_queries(unique):
+                params = {
+                    'q': query,
+                    'fields': "nextPageToken, files(id, name, md5Checksum, modifiedTime, size)",
+                    'pageSize': 1000
+                }
+                while True:
+                    response = await self._aget(client, f"{base_url}files", params=params, headers=headers)
+                    results = response.json()
+                    for item in results.get('files', []):
+                        metadata.setdefault(item['name'], item)
+                    
+                    params['pageToken'] = results.get('nextPageToken')
+                    if not params['pageToken']:
+                        break
+        
+        contents, errors, pending = self._split_cached(unique, metadata)
+        versions = self._versions(unique, metadata)
+        limit = asyncio.Semaphore(self.config.get('max_concurrent_downloads', 8))
+        
+        async def download(filename: str, file_id: str, version: str):
+            try:
+                async with limit:
+                    response = await self._aget(client, f"{base_url}files/{file_id}", params={'alt': 'media'},
+                                                headers=headers)
+            except Exception as e:
+                errors[filename] = f"Error fetching content from Google Drive: {str(e)}"
+                return
+            if self.cache is not None:
+                self.cache.put(file_id, version, response.content)
+            contents[filename] = response.content.decode('utf-8')
+        
+        await asyncio.gather(*(download(filename, *item) for filename, item in pending.items()))
+        return contents, errors, versions
+    
+    @staticmethod
+    def _content_mapping_result(content_mapping: Dict[str, str], contents: Dict[str, str],
+                                errors: Dict[str, str], versions: Dict[str, str]) -> Dict[str, Dict]:
+        return {
+            platform: {
+                'file': filename,
+                'content': contents.get(filename),
+                'error': errors.get(filename),
+                'version': versions.get(filename)
+            }
+            for platform, filename in content_mapping.items()
+        }
+    
+    def fetch_content_mapping(self, content_mapping: Dict[str, str]) -> Dict[str, Dict]:
+        """Prefetch every platform's file, returning platform -> {file, content, error, version}"""
+        return self._content_mapping_result(content_mapping, *self.fetch_many(list(content_mapping.values())))
+    
+    async def afetch_content_mapping(self, content_mapping: Dict[str, str]) -> Dict[str, Dict]:
+        """Async variant of fetch_content_mapping"""
+        return self._content_mapping_result(content_mapping, *await self.afetch_many(list(content_mapping.values())))
+    
+    def _run(self, filename: str) -> str:
+        """Fetch content from a specific file in Google Drive"""
+        try:
+            return self.fetch(filename)
+        except FileNotFoundError as e:
+            return str(e)
+        except Exception as e:
+            return f"Error fetching content from Google Drive: {str(e)}"
+    
+    async def _arun(self, filename: str) -> str:
+        """Fetch content from a specific file in Google Drive without blocking the event loop"""
+        try:
+            contents, errors, _ = await self.afetch_many([filename])
         except Exception as e:
             return f"Error fetching content from Google Drive: {str(e)}"
+        return contents.get(filename, errors.get(filename))
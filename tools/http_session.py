@@ -0,0 +1,73 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from tools.rate_limit import rate_limits
+from tracing import tracer
+from typing import Dict, Tuple
+
+
+DEFAULT_HTTP_SETTINGS = {
+    'pool_connections': 10,
+    'pool_maxsize': 20,
+    'connect_timeout': 5,
+    'read_timeout': 30,
+    'async_max_connections': 100
+}
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default (connect, read) timeout to every request.
+
+    Third-party clients such as tweepy never pass a timeout themselves, so the
+    default has to live on the adapter to protect them from hung sockets.
+    """
+
+    def __init__(self, timeout: Tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def http_settings(settings: Dict = None) -> Dict:
+    """Fill in defaults for the config's ``http`` section"""
+    return {**DEFAULT_HTTP_SETTINGS, **(settings or {})}
+
+
+def request_timeout(settings: Dict = None) -> Tuple[float, float]:
+    settings = http_settings(settings)
+    return (settings['connect_timeout'], settings['read_timeout'])
+
+
+def build_session(settings: Dict = None) -> requests.Session:
+    """Create a keep-alive session with a sized connection pool and timeouts"""
+    settings = http_settings(settings)
+    adapter = TimeoutHTTPAdapter(
+        timeout=request_timeout(settings),
+        pool_connections=settings['pool_connections'],
+        pool_maxsize=settings['pool_maxsize']
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # Let the rate-limit manager learn budgets from every platform response
+    session.hooks['response'].append(rate_limits.observe)
+    session.hooks['response'].append(tracer.observe_http)
+    return session
+
+
+_sessions: Dict[Tuple, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(settings: Dict = None) -> requests.Session:
+    """Return the process-wide session for these settings, creating it once"""
+    key = tuple(sorted(http_settings(settings).items()))
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = build_session(settings)
+        return _sessions[key]
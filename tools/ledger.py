@@ -0,0 +1,169 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_key TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    account TEXT NOT NULL,
+    status TEXT NOT NULL,
+    post_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_key ON posts (post_key, created_at);
+"""
+
+# Columns added after the first release, created on older ledgers at open
+MIGRATIONS = {
+    'parts': "ALTER TABLE posts ADD COLUMN parts TEXT",
+}
+
+
+class DuplicatePostInFlight(Exception):
+    """Raised when the same content is already being published by another worker"""
+
+
+def post_key(platform: str, account: str, content: str) -> str:
+    """Hash identifying one piece of content on one account"""
+    payload = "\x1f".join([platform, account, content.strip()])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PostLedger:
+    """Persistent record of published posts used to make publishing idempotent.
+
+    Before a tool calls its API it claims the (platform, account, content) key.
+    A key already published within ``window_seconds`` returns the stored post
+    ID instead of posting again, so whole runs can be retried safely while the
+    same evergreen copy can still go out again on a later day.
+
+    Posts made of several requests (Twitter threads) store the ID of each part
+    as it goes out, so a run that takes over a crashed reservation carries on
+    from the last part instead of starting again.
+    """
+
+    def __init__(self, config: Dict):
+        self.path = config.get('path', 'post_ledger.db')
+        self.window_seconds = config.get('window_seconds', 20 * 3600)
+        self.pending_timeout = config.get('pending_timeout', 600)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(posts)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+
+    def claim(self, platform: str, account: str, content: str):
+        """Reserve a post before publishing.
+
+        Returns ``(key, existing_post_id)``. When ``existing_post_id`` is set the
+        content was already published and the caller must not post again.
+        """
+        key = post_key(platform, account, content)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM posts WHERE post_key = ? AND created_at >= ? "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (key, now - self.window_seconds)
+                ).fetchone()
+
+                if row is not None and row['status'] == 'published':
+                    self._conn.execute("COMMIT")
+                    return key, row['post_id']
+
+                if row is not None and now - row['updated_at'] < self.pending_timeout:
+                    self._conn.execute("COMMIT")
+                    raise DuplicatePostInFlight(
+                        f"The same {platform} post is already being published")
+
+                if row is not None:
+                    # A stale reservation from a crashed run; take it over
+                    self._conn.execute(
+                        "UPDATE posts SET updated_at = ? WHERE id = ?", (now, row['id']))
+                else:
+                    self._conn.execute(
+                        "INSERT INTO posts (post_key, platform, account, status, created_at, updated_at) "
+                        "VALUES (?, ?, ?, 'pending', ?, ?)",
+                        (key, platform, account, now, now)
+                    )
+                self._conn.execute("COMMIT")
+            except DuplicatePostInFlight:
+                raise
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return key, None
+
+    def record(self, key: str, post_id: str):
+        """Mark a claimed post as published"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE posts SET status = 'published', post_id = ?, updated_at = ? "
+                "WHERE post_key = ? AND status = 'pending'",
+                (str(post_id), time.time(), key)
+            )
+
+    def progress(self, key: str, parts: List[str]):
+        """Store the IDs of the parts published so far for a claimed post"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE posts SET parts = ?, updated_at = ? WHERE post_key = ? AND status = 'pending'",
+                (json.dumps(parts), time.time(), key)
+            )
+
+    def parts(self, key: str) -> List[str]:
+        """IDs of the parts an earlier attempt published under this reservation"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parts FROM posts WHERE post_key = ? AND status = 'pending' "
+                "ORDER BY created_at DESC LIMIT 1", (key,)
+            ).fetchone()
+        return json.loads(row['parts']) if row and row['parts'] else []
+
+    def release(self, key: str):
+        """Drop a reservation after a failed publish so a retry can post"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM posts WHERE post_key = ? AND status = 'pending'", (key,))
+
+    def lookup(self, platform: str, account: str, content: str) -> Optional[str]:
+        """Post ID of a matching publish within the window, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT post_id FROM posts WHERE post_key = ? AND status = 'published' "
+                "AND created_at >= ? ORDER BY created_at DESC LIMIT 1",
+                (post_key(platform, account, content), time.time() - self.window_seconds)
+            ).fetchone()
+        return row['post_id'] if row else None
+
+
+_ledgers: Dict[str, PostLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(config: Optional[Dict]) -> Optional[PostLedger]:
+    """Return the process-wide ledger for this config, or None when disabled"""
+    config = config or {}
+    if not config.get('enabled', True):
+        return None
+
+    path = config.get('path', 'post_ledger.db')
+    with _ledgers_lock:
+        if path not in _ledgers:
+            _ledgers[path] = PostLedger(config)
+        return _ledgers[path]
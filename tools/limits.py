@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict
+
+
+class PlatformLimiter:
+    """Caps how many API calls may be in flight per platform across all accounts"""
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.configure(limits or {})
+
+    def configure(self, limits: Dict[str, int]):
+        """Replace the per-platform limits; platforms without a limit are unbounded"""
+        with self._lock:
+            self._limits = {platform: limit for platform, limit in limits.items() if limit}
+            self._semaphores = {
+                platform: threading.BoundedSemaphore(limit)
+                for platform, limit in self._limits.items()
+            }
+            # asyncio semaphores belong to one event loop, so they are kept per loop
+            self._async_semaphores = weakref.WeakKeyDictionary()
+
+    @contextmanager
+    def slot(self, platform: str):
+        """Hold one of the platform's slots for the duration of the block"""
+        with self._lock:
+            semaphore = self._semaphores.get(platform)
+
+        if semaphore is None:
+            yield
+            return
+
+        with semaphore:
+            yield
+
+    @asynccontextmanager
+    async def aslot(self, platform: str):
+        """Async variant of slot for coroutines on the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            limit = self._limits.get(platform)
+            semaphores = self._async_semaphores.setdefault(loop, {})
+            if limit and platform not in semaphores:
+                semaphores[platform] = asyncio.Semaphore(limit)
+            semaphore = semaphores.get(platform)
+
+        if semaphore is None:
+            yield
+            return
+
+        async with semaphore:
+            yield
+
+
+# Shared by every platform tool in the process
+platform_limiter = PlatformLimiter()
@@ -0,0 +1,232 @@
+from dataclasses import dataclass, field
+from googleapiclient.http import MediaIoBaseDownload
+import facebook
+import io
+import time
+from typing import Any, Dict, Iterator
+
+
+# Twitter accepts APPEND segments of up to 5 MB; Drive chunks must be a
+# multiple of 256 KB, so 4 MB suits both
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Facebook photos have no resumable endpoint and are sent in one request
+FACEBOOK_PHOTO_MAX_BYTES = 10 * 1024 * 1024
+
+# Largest file each platform accepts, by kind; there is no limit where a kind is missing
+MEDIA_MAX_BYTES = {
+    'facebook': {'image': FACEBOOK_PHOTO_MAX_BYTES, 'video': 10 * 1024 * 1024 * 1024},
+    'twitter': {'image': 5 * 1024 * 1024, 'gif': 15 * 1024 * 1024, 'video': 512 * 1024 * 1024},
+    'linkedin': {'video': 200 * 1024 * 1024},
+}
+
+# How long to wait for Twitter to finish transcoding an uploaded video
+TWITTER_PROCESSING_TIMEOUT = 600
+
+
+class MediaError(Exception):
+    """Raised when a media upload is rejected or cannot be completed"""
+
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+        self.status_code = response.status_code if response is not None else None
+
+
+@dataclass
+class MediaFile:
+    """A media file in the Drive content folder, opened as a fresh stream per upload"""
+    file_id: str
+    name: str
+    mime_type: str
+    size: int
+    version: str
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    source: Any = field(default=None, repr=False, compare=False)
+
+    @property
+    def kind(self) -> str:
+        """'image' or 'video'"""
+        return 'video' if self.mime_type.startswith('video/') else 'image'
+
+    @property
+    def key(self) -> str:
+        """Identity of this exact file version, used in ledger keys"""
+        return f"{self.file_id}:{self.version}"
+
+    def open(self) -> 'DriveMediaReader':
+        return DriveMediaReader(self.source, self)
+
+
+class DriveMediaReader:
+    """File-like view of a Drive file that downloads it one chunk at a time.
+
+    At most one Drive chunk plus the unread remainder is held in memory, so
+    arbitrarily large videos can be piped into an upload. ``len()`` reports
+    the full size so ``requests`` sends a Content-Length and streams the body
+    with ``read()`` instead of loading it.
+    """
+
+    def __init__(self, drive_tool, media: MediaFile):
+        self.size = media.size
+        self._buffer = io.BytesIO()
+        self._pending = bytearray()
+        self._done = media.size == 0
+        request = drive_tool.service.files().get_media(fileId=media.file_id)
+        # httplib2 connections are not thread-safe; use this thread's own
+        request.http = drive_tool._http()
+        self._downloader = MediaIoBaseDownload(self._buffer, request, chunksize=media.chunk_size)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _fill(self):
+        _, self._done = self._downloader.next_chunk(num_retries=3)
+        self._pending += self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._done and (size is None or size < 0 or len(self._pending) < size):
+            self._fill()
+        if size is None or size < 0:
+            size = len(self._pending)
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def chunks(self, size: int) -> Iterator[bytes]:
+        """Yield the file in pieces of ``size`` bytes (the last one may be shorter)"""
+        while True:
+            data = self.read(size)
+            if not data:
+                return
+            yield data
+
+
+def _json(response) -> Dict:
+    if not 200 <= response.status_code < 300:
+        raise MediaError(f"{response.status_code} - {response.text}", response)
+    return response.json() if response.content else {}
+
+
+def _graph_json(response) -> Dict:
+    # Graph API errors carry codes the Facebook tool maps to throttling
+    result = response.json()
+    if isinstance(result, dict) and result.get('error'):
+        raise facebook.GraphAPIError(result)
+    return result
+
+
+def check_media(platform: str, media: MediaFile):
+    """Raise MediaError for a file the platform would reject, before anything is uploaded"""
+    if not media.mime_type.startswith(('image/', 'video/')):
+        raise MediaError(f"{media.name} is {media.mime_type}, not an image or video")
+    limits = MEDIA_MAX_BYTES.get(platform, {})
+    kind = 'gif' if media.mime_type == 'image/gif' and 'gif' in limits else media.kind
+    if kind in limits and media.size > limits[kind]:
+        raise MediaError(f"{media.name} is larger than {platform}'s {limits[kind]} byte {kind} limit")
+
+
+def twitter_upload(session, auth, media: MediaFile,
+                   url: str = "https://upload.twitter.com/1.1/media/upload.json") -> str:
+    """Upload with the chunked INIT/APPEND/FINALIZE flow and return the media ID"""
+    check_media('twitter', media)
+    category = {'video': 'tweet_video', 'image': 'tweet_image'}[media.kind]
+    if media.mime_type == 'image/gif':
+        category = 'tweet_gif'
+
+    init = _json(session.post(url, auth=auth, data={
+        'command': 'INIT',
+        'total_bytes': media.size,
+        'media_type': media.mime_type,
+        'media_category': category
+    }))
+    media_id = init['media_id_string']
+
+    reader = media.open()
+    for index, chunk in enumerate(reader.chunks(media.chunk_size)):
+        _json(session.post(url, auth=auth, data={'command': 'APPEND', 'media_id': media_id, 'segment_index': index},
+                           files={'media': chunk}))
+
+    result = _json(session.post(url, auth=auth, data={'command': 'FINALIZE', 'media_id': media_id}))
+    deadline = time.monotonic() + TWITTER_PROCESSING_TIMEOUT
+    # Videos are transcoded asynchronously; poll STATUS until they can be attached
+    while result.get('processing_info', {}).get('state') in ('pending', 'in_progress'):
+        if time.monotonic() > deadline:
+            raise MediaError(f"Twitter is still processing media {media_id}")
+        time.sleep(result['processing_info'].get('check_after_secs', 5))
+        result = _json(session.get(url, auth=auth, params={'command': 'STATUS', 'media_id': media_id}))
+
+    if result.get('processing_info', {}).get('state') == 'failed':
+        raise MediaError(f"Twitter could not process media: {result['processing_info'].get('error')}")
+    return media_id
+
+
+def linkedin_upload(session, headers: Dict[str, str], owner: str, media: MediaFile,
+                    url: str = "https://api.linkedin.com/v2/assets?action=registerUpload") -> str:
+    """Register an upload, stream the file to it and return the asset URN"""
+    check_media('linkedin', media)
+    registered = session.post(url, headers=headers, json={
+        "registerUploadRequest": {
+            "recipes": [f"urn:li:digitalmediaRecipe:feedshare-{media.kind}"],
+            "owner": owner,
+            "serviceRelationships": [{
+                "relationshipType": "OWNER",
+                "identifier": "urn:li:userGeneratedContent"
+            }]
+        }
+    })
+    value = _json(registered)['value']
+    mechanism = value['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']
+
+    upload_headers = {
+        'Authorization': headers['Authorization'],
+        'Content-Type': 'application/octet-stream'
+    }
+    response = session.put(mechanism['uploadUrl'], headers=upload_headers, data=media.open())
+    if not 200 <= response.status_code < 300:
+        raise MediaError(f"{response.status_code} - {response.text}", response)
+    return value['asset']
+
+
+def facebook_video_upload(session, url: str, access_token: str, media: MediaFile, description: str) -> str:
+    """Upload a video with the resumable start/transfer/finish flow and return its ID"""
+    check_media('facebook', media)
+    start = _graph_json(session.post(url, data={
+        'access_token': access_token,
+        'upload_phase': 'start',
+        'file_size': media.size
+    }))
+    session_id = start['upload_session_id']
+    start_offset, end_offset = int(start['start_offset']), int(start['end_offset'])
+
+    reader = media.open()
+    # Facebook chooses each chunk's range; keep transferring until it stops asking
+    while start_offset < end_offset:
+        chunk = reader.read(end_offset - start_offset)
+        transfer = _graph_json(session.post(url, data={
+            'access_token': access_token,
+            'upload_phase': 'transfer',
+            'upload_session_id': session_id,
+            'start_offset': start_offset
+        }, files={'video_file_chunk': (media.name, chunk, media.mime_type)}))
+        start_offset, end_offset = int(transfer['start_offset']), int(transfer['end_offset'])
+
+    finish = _graph_json(session.post(url, data={
+        'access_token': access_token,
+        'upload_phase': 'finish',
+        'upload_session_id': session_id,
+        'description': description
+    }))
+    if not finish.get('success'):
+        raise MediaError(f"Facebook did not accept video upload {session_id}")
+    return start['video_id']
+
+
+def facebook_photo_upload(session, url: str, access_token: str, media: MediaFile, message: str) -> str:
+    """Publish a photo with its caption and return the post ID"""
+    check_media('facebook', media)
+    result = _graph_json(session.post(url, data={'access_token': access_token, 'message': message},
+                                files={'source': (media.name, media.open().read(), media.mime_type)}))
+    return result.get('post_id') or result['id']
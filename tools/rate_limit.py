@@ -0,0 +1,376 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+
+PLATFORM_HOSTS = {
+    'api.twitter.com': 'twitter',
+    'api.x.com': 'twitter',
+    'upload.twitter.com': 'twitter',
+    'graph.facebook.com': 'facebook',
+    'graph-video.facebook.com': 'facebook',
+    'api.linkedin.com': 'linkedin',
+}
+
+# Graph API error codes that mean "throttled" rather than "rejected"
+FACEBOOK_THROTTLE_CODES = {4, 17, 32, 613, 80001}
+
+DEFAULT_BUCKETS = {
+    # Twitter allows a limited number of tweets per user per 24h; LinkedIn and
+    # Facebook budgets are per app and mostly reported through headers instead
+    'twitter': {'capacity': 50, 'per_seconds': 86400},
+    'facebook': {'capacity': 200, 'per_seconds': 3600},
+    'linkedin': {'capacity': 150, 'per_seconds': 86400},
+}
+
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    platform TEXT NOT NULL,
+    account TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (platform, account)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    platform TEXT NOT NULL,
+    account TEXT NOT NULL,
+    until REAL NOT NULL,
+    PRIMARY KEY (platform, account)
+);
+"""
+
+
+# Refreshed token -> key of the token it replaced, so budgets follow the account
+_token_aliases: Dict[str, str] = {}
+
+
+def account_key(secret: Optional[str]) -> Optional[str]:
+    """Short, non-reversible key identifying the account behind a token"""
+    if not secret:
+        return None
+    key = hashlib.sha256(secret.encode('utf-8')).hexdigest()[:12]
+    return _token_aliases.get(key, key)
+
+
+def alias_token(secret: str, original: str):
+    """Make account_key(secret) return the key of original (used when tokens are refreshed)"""
+    key = hashlib.sha256(secret.encode('utf-8')).hexdigest()[:12]
+    original_key = account_key(original)
+    if key != original_key:
+        _token_aliases[key] = original_key
+
+
+class RateLimited(Exception):
+    """Raised instead of sleeping when a platform's budget is exhausted"""
+
+    def __init__(self, platform: str, retry_at: float, reason: str = "rate limit reached"):
+        self.platform = platform
+        self.retry_at = retry_at
+        super().__init__(
+            f"{platform} {reason}; retry after "
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(retry_at))}"
+        )
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at capacity / per_seconds"""
+
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = capacity
+        self.updated = time.time()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now: float) -> float:
+        """Take a token; return 0 on success or the seconds until one is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+
+class RateLimitManager:
+    """Tracks per-platform (and per-account) posting budgets without blocking.
+
+    Local token buckets provide a conservative budget, and response headers
+    from each platform tighten it: Twitter's ``x-rate-limit-*``, the Graph
+    API's ``x-app-usage``/``x-business-use-case-usage`` and LinkedIn's 429s
+    with ``Retry-After``. Callers get a RateLimited error instead of a sleep,
+    so one throttled platform never holds up the others.
+
+    Budgets live in memory by default. Given a ``path``, the token buckets and
+    blocks are kept in a SQLite file instead, so several worker processes
+    spend one budget rather than one each, and a 429 seen by one worker holds
+    back the others too. Header readings and deferrals stay per process.
+    """
+
+    def __init__(self, buckets: Optional[Dict[str, Dict]] = None, usage_threshold: float = 90):
+        self._lock = threading.Lock()
+        self.usage_threshold = usage_threshold
+        self._bucket_config = {**DEFAULT_BUCKETS, **(buckets or {})}
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._blocked_until: Dict[tuple, float] = {}
+        self._reported: Dict[tuple, Dict] = {}
+        self._deferrals: List[Dict] = []
+        self.path: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def configure(self, buckets: Dict[str, Dict], usage_threshold: Optional[float] = None,
+                  path: Optional[str] = None):
+        """Apply bucket settings; a path shares budgets with every process using the same file"""
+        with self._lock:
+            self._bucket_config = {**DEFAULT_BUCKETS, **buckets}
+            # In-memory buckets restart full; shared ones keep their level, capped to the new capacity
+            self._buckets.clear()
+            if usage_threshold is not None:
+                self.usage_threshold = usage_threshold
+            if path != self.path:
+                if self._conn is not None:
+                    self._conn.close()
+                self._conn = self._connect(path) if path else None
+                self.path = path
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SHARED_SCHEMA)
+        return conn
+
+    def _bucket(self, platform: str, account: Optional[str]) -> Optional[TokenBucket]:
+        key = (platform, account)
+        if key not in self._buckets:
+            settings = self._bucket_config.get(platform)
+            if not settings:
+                return None
+            self._buckets[key] = TokenBucket(settings['capacity'], settings['per_seconds'])
+        return self._buckets[key]
+
+    def _shared_acquire(self, platform: str, account: Optional[str], now: float) -> float:
+        settings = self._bucket_config.get(platform)
+        if not settings:
+            return 0.0
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE platform = ? AND account = ?",
+                (platform, account or '')
+            ).fetchone()
+            bucket = TokenBucket(settings['capacity'], settings['per_seconds'])
+            if row is not None:
+                bucket.tokens, bucket.updated = min(row[0], bucket.capacity), min(row[1], now)
+            wait = bucket.try_acquire(now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO buckets (platform, account, tokens, updated) VALUES (?, ?, ?, ?)",
+                (platform, account or '', bucket.tokens, bucket.updated)
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def blocked_until(self, platform: str, account: Optional[str] = None) -> float:
+        """Epoch time before which the platform should not be called (0 if free)"""
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT MAX(until) FROM blocks WHERE platform = ? AND account IN ('', ?)",
+                    (platform, account or '')
+                ).fetchone()
+                until = row[0] or 0
+            else:
+                until = max(
+                    self._blocked_until.get((platform, None), 0),
+                    self._blocked_until.get((platform, account), 0) if account else 0
+                )
+        return until if until > now else 0.0
+
+    def acquire(self, platform: str, account: Optional[str] = None):
+        """Spend one request from the budget or raise RateLimited immediately"""
+        now = time.time()
+        blocked = self.blocked_until(platform, account)
+        if blocked:
+            raise RateLimited(platform, blocked)
+
+        with self._lock:
+            if self._conn is not None:
+                wait = self._shared_acquire(platform, account, now)
+            else:
+                bucket = self._bucket(platform, account)
+                wait = bucket.try_acquire(now) if bucket else 0.0
+        if wait:
+            raise RateLimited(platform, now + wait, "local posting budget exhausted")
+
+    def block(self, platform: str, until: float, account: Optional[str] = None):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO blocks (platform, account, until) VALUES (?, ?, ?) "
+                    "ON CONFLICT (platform, account) DO UPDATE SET until = MAX(until, excluded.until)",
+                    (platform, account or '', until)
+                )
+                return
+            key = (platform, account)
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0), until)
+
+    def defer(self, error: RateLimited, account: Optional[str] = None):
+        """Record a post that was skipped so the scheduler can retry it later"""
+        with self._lock:
+            self._deferrals.append({
+                'platform': error.platform,
+                'account': account,
+                'retry_at': error.retry_at
+            })
+
+    def pop_deferrals(self, accounts: Dict[str, Optional[str]]) -> Dict[str, float]:
+        """Remove and return deferred posts for these platform accounts as platform -> retry_at"""
+        found = {}
+        with self._lock:
+            remaining = []
+            for deferral in self._deferrals:
+                if accounts.get(deferral['platform'], '') == deferral['account']:
+                    platform = deferral['platform']
+                    found[platform] = max(found.get(platform, 0), deferral['retry_at'])
+                else:
+                    remaining.append(deferral)
+            self._deferrals = remaining
+        return found
+
+    def observe(self, response, *args, **kwargs):
+        """requests/httpx response hook: learn budgets from platform headers"""
+        platform = PLATFORM_HOSTS.get(urlparse(str(response.url)).hostname or '')
+        if platform is None:
+            return response
+
+        account = self._request_account(platform, response.request)
+        handler = getattr(self, f'_observe_{platform}')
+        handler(response, account)
+        return response
+
+    @staticmethod
+    def _request_account(platform: str, request) -> Optional[str]:
+        authorization = request.headers.get('Authorization', '') if request is not None else ''
+        if isinstance(authorization, bytes):
+            authorization = authorization.decode('utf-8', 'ignore')
+
+        if platform == 'twitter':
+            match = re.search(r'oauth_token="([^"]+)"', authorization)
+            return account_key(match.group(1)) if match else None
+        if platform == 'linkedin' and authorization.startswith('Bearer '):
+            return account_key(authorization[len('Bearer '):])
+        # Graph API usage headers describe the whole app, not one page
+        return None
+
+    def _retry_after(self, response, default: float) -> float:
+        value = response.headers.get('Retry-After')
+        try:
+            return time.time() + float(value)
+        except (TypeError, ValueError):
+            return time.time() + default
+
+    def _observe_twitter(self, response, account: Optional[str]):
+        headers = response.headers
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        if remaining is None or reset is None:
+            if response.status_code == 429:
+                self.block('twitter', self._retry_after(response, 900), account)
+            return
+
+        with self._lock:
+            self._reported[('twitter', account)] = {
+                'limit': int(headers.get('x-rate-limit-limit', 0)),
+                'remaining': int(remaining),
+                'reset_at': float(reset)
+            }
+        if int(remaining) <= 0 or response.status_code == 429:
+            self.block('twitter', float(reset), account)
+
+    def _observe_facebook(self, response, account: Optional[str]):
+        usage = []
+        regain_minutes = 0
+        try:
+            if response.headers.get('x-app-usage'):
+                app_usage = json.loads(response.headers['x-app-usage'])
+                usage += [value for value in app_usage.values() if isinstance(value, (int, float))]
+            if response.headers.get('x-business-use-case-usage'):
+                for entries in json.loads(response.headers['x-business-use-case-usage']).values():
+                    for entry in entries:
+                        usage += [entry.get('call_count', 0), entry.get('total_cputime', 0),
+                                  entry.get('total_time', 0)]
+                        regain_minutes = max(regain_minutes, entry.get('estimated_time_to_regain_access', 0))
+        except (ValueError, AttributeError):
+            return
+
+        if usage:
+            with self._lock:
+                self._reported[('facebook', account)] = {'usage_percent': max(usage)}
+
+        if regain_minutes:
+            self.block('facebook', time.time() + regain_minutes * 60, account)
+        elif usage and max(usage) >= self.usage_threshold:
+            # Usage is a rolling one-hour window; back off until some of it drains
+            self.block('facebook', time.time() + 300, account)
+        elif response.status_code == 429:
+            self.block('facebook', self._retry_after(response, 300), account)
+
+    def _observe_linkedin(self, response, account: Optional[str]):
+        if response.status_code == 429:
+            self.block('linkedin', self._retry_after(response, 3600), account)
+
+    def remaining(self) -> Dict[str, Dict]:
+        """Snapshot of every known budget, for planning and monitoring"""
+        now = time.time()
+        snapshot = {}
+        with self._lock:
+            buckets, blocked_until = self._buckets, self._blocked_until
+            if self._conn is not None:
+                buckets, blocked_until = {}, {}
+                for platform, account, tokens, updated in self._conn.execute("SELECT * FROM buckets"):
+                    settings = self._bucket_config.get(platform)
+                    if settings:
+                        bucket = TokenBucket(settings['capacity'], settings['per_seconds'])
+                        bucket.tokens, bucket.updated = min(tokens, bucket.capacity), min(updated, now)
+                        buckets[(platform, account or None)] = bucket
+                for platform, account, until in self._conn.execute("SELECT * FROM blocks"):
+                    blocked_until[(platform, account or None)] = until
+
+            keys = set(buckets) | set(blocked_until) | set(self._reported)
+            for platform, account in keys:
+                bucket = buckets.get((platform, account))
+                blocked = blocked_until.get((platform, account), 0)
+                snapshot.setdefault(platform, {})[account or '*'] = {
+                    'local_tokens': round(bucket.available(now), 2) if bucket else None,
+                    'blocked_until': blocked if blocked > now else None,
+                    'reported': self._reported.get((platform, account))
+                }
+        return snapshot
+
+
+# Shared by every platform tool and HTTP session in the process
+rate_limits = RateLimitManager()
+
+
+def configure_rate_limits(config: Dict):
+    """Apply the rate_limits section; pool workers share their budgets through rate_limits.path"""
+    limits = config.get('rate_limits', {})
+    path = limits.get('path', 'rate_limits.db') if config.get('worker_pool', {}).get('enabled') else None
+    rate_limits.configure(limits.get('buckets', {}), limits.get('usage_threshold'), path)
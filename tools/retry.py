@@ -0,0 +1,240 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import requests
+from urllib3.exceptions import NewConnectionError
+from tools.rate_limit import RateLimited
+from tracing import tracer
+
+
+DEFAULT_RETRY_SETTINGS = {
+    'attempts': 3,
+    'base_delay': 1.0,
+    'max_delay': 30.0,
+    'failure_threshold': 5,
+    'reset_seconds': 120
+}
+
+# Server-side failures retried for idempotent reads (and counted by the circuit breaker)
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+class CircuitOpen(RateLimited):
+    """Raised without calling the platform while its circuit breaker is open.
+
+    It is a RateLimited error, so the post is deferred and the scheduler queues
+    a retry for when the breaker lets a trial call through again.
+    """
+
+    def __init__(self, platform: str, retry_at: float):
+        super().__init__(platform, retry_at, "circuit breaker is open after repeated failures")
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status behind a client error, if it carries one"""
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) is not None:
+        return response.status_code
+    resp = getattr(error, 'resp', None)  # googleapiclient HttpError
+    if resp is not None and getattr(resp, 'status', None) is not None:
+        return int(resp.status)
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from the Retry-After header of the error's response, if any"""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None and response.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def never_sent(error: BaseException) -> bool:
+    """True when the request failed before a connection existed, so nothing reached the API"""
+    if isinstance(error, (requests.exceptions.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout,
+                          httpx.PoolTimeout, NewConnectionError)):
+        return True
+    # requests wraps urllib3's failure to open a socket in a plain ConnectionError
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+    return False
+
+
+def is_transient(error: BaseException, idempotent: bool = False) -> bool:
+    """True for failures worth retrying.
+
+    A publish is only retried when it provably never reached the API (no
+    connection was made) or the API refused it with a 503 and a Retry-After.
+    A dropped connection, a 502/504 or a read timeout may come after the post
+    was created, and retrying would publish it twice. Idempotent reads (Drive
+    GETs) are also retried on any connection error and 5xx.
+    """
+    if isinstance(error, RateLimited):
+        return False
+    if never_sent(error):
+        return True
+    status = status_of(error)
+    if not idempotent:
+        return status == 503 and retry_after(error) is not None
+    if isinstance(error, (requests.ConnectionError, ConnectionError)):
+        return True
+    # Graph API errors report server trouble in the body rather than the status
+    result = getattr(error, 'result', None)
+    if isinstance(result, dict) and isinstance(result.get('error'), dict):
+        graph_error = result['error']
+        if graph_error.get('is_transient') or graph_error.get('code') in (1, 2):
+            return True
+    return status in RETRY_STATUSES
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one platform"""
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+
+class RetryManager:
+    """Retries transient platform failures and stops calling platforms that keep failing.
+
+    Each call is retried up to ``attempts`` times with full-jitter exponential
+    backoff, honouring Retry-After when the platform sends one. A Retry-After
+    longer than ``max_delay`` defers the post instead of sleeping. After
+    ``failure_threshold`` consecutive failed calls a platform's breaker opens
+    and calls fail fast for ``reset_seconds``; then one trial call decides
+    whether it closes again.
+
+    Calls are publishes unless made with ``idempotent=True``, and only the
+    failures ``is_transient`` allows for them are retried; the breaker counts
+    every server-side failure either way.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.configure(config or {})
+
+    def configure(self, config: Dict):
+        settings = {**DEFAULT_RETRY_SETTINGS, **config}
+        self.attempts = max(1, settings['attempts'])
+        self.base_delay = settings['base_delay']
+        self.max_delay = settings['max_delay']
+        self.failure_threshold = settings['failure_threshold']
+        self.reset_seconds = settings['reset_seconds']
+
+    def _breaker(self, platform: str) -> CircuitBreaker:
+        return self._breakers.setdefault(platform, CircuitBreaker())
+
+    def open_until(self, platform: str) -> float:
+        """Epoch time the platform's breaker allows a trial call (0 if closed)"""
+        with self._lock:
+            breaker = self._breakers.get(platform)
+            if breaker is None or breaker.failures < self.failure_threshold:
+                return 0.0
+            until = breaker.opened_at + self.reset_seconds
+        return until if until > time.time() else 0.0
+
+    def _before_call(self, platform: str) -> bool:
+        """Raise CircuitOpen while the breaker is open; True if this call is the half-open trial"""
+        now = time.time()
+        with self._lock:
+            breaker = self._breaker(platform)
+            if breaker.failures < self.failure_threshold:
+                return False
+            retry_at = breaker.opened_at + self.reset_seconds
+            if now < retry_at or breaker.trial_in_flight:
+                raise CircuitOpen(platform, max(retry_at, now + 1))
+            breaker.trial_in_flight = True
+            return True
+
+    def _after_call(self, platform: str, trial: bool, error: Optional[BaseException] = None):
+        with self._lock:
+            breaker = self._breaker(platform)
+            if trial:
+                breaker.trial_in_flight = False
+            # Any answer other than a server failure shows the platform is up
+            if error is None or not is_transient(error, idempotent=True):
+                breaker.failures = 0
+            else:
+                breaker.failures += 1
+                if breaker.failures >= self.failure_threshold:
+                    breaker.opened_at = time.time()
+
+    def _delay(self, platform: str, attempt: int, error: BaseException,
+               idempotent: bool) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up"""
+        if attempt + 1 >= self.attempts or not is_transient(error, idempotent):
+            return None
+        requested = retry_after(error)
+        if requested is not None:
+            if requested > self.max_delay:
+                raise RateLimited(platform, time.time() + requested, "asked to retry later") from error
+            return requested
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, platform: str, func: Callable[..., Any], *args, idempotent: bool = False,
+             **kwargs) -> Any:
+        """Run func with retries, counting the final outcome against the platform's breaker"""
+        trial = self._before_call(platform)
+        attempt = 0
+        while True:
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                try:
+                    delay = self._delay(platform, attempt, e, idempotent)
+                except RateLimited:
+                    self._after_call(platform, trial)
+                    raise
+                if delay is None:
+                    self._after_call(platform, trial, e)
+                    raise
+                tracer.record('retry', platform, time.time(), delay, attempt=attempt + 1, error=str(e))
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._after_call(platform, trial)
+            return result
+
+    async def acall(self, platform: str, func: Callable[..., Any], *args, idempotent: bool = False,
+                    **kwargs) -> Any:
+        """Async variant of call for coroutine functions"""
+        trial = self._before_call(platform)
+        attempt = 0
+        while True:
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                try:
+                    delay = self._delay(platform, attempt, e, idempotent)
+                except RateLimited:
+                    self._after_call(platform, trial)
+                    raise
+                if delay is None:
+                    self._after_call(platform, trial, e)
+                    raise
+                tracer.record('retry', platform, time.time(), delay, attempt=attempt + 1, error=str(e))
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._after_call(platform, trial)
+            return result
+
+
+# Shared by every tool in the process
+retrier = RetryManager()
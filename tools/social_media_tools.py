@@ -1,102 +1,625 @@
 from crewai_tools import BaseTool
+import abc
+import asyncio
 import facebook
 import tweepy
 import requests
 import json
-from typing import Dict
+import logging
+import time
+from oauthlib.oauth1 import Client as OAuth1Client
+from render import renderer
+from requests_oauthlib import OAuth1
+from tools.async_http import get_async_client
+from tools.checkpoint import deadline_guard, outcomes
+from tools.credentials import credential_manager
+from tools.dry_run import DryRunRecorder
+from tools.http_session import get_session
+from tools.ledger import PostLedger
+from tools.limits import platform_limiter
+from tools.media import MediaError, MediaFile, check_media, facebook_photo_upload, facebook_video_upload, \
+    linkedin_upload, twitter_upload
+from tools.rate_limit import FACEBOOK_THROTTLE_CODES, RateLimited, account_key, rate_limits
+from tools.retry import retrier
+from tracing import tracer
+from typing import ClassVar, Dict, List, Optional
 
+logger = logging.getLogger('social_media_tools')
 
-class FacebookTool(BaseTool):
+class PostingError(Exception):
+    """Raised when a platform API rejects a post"""
+    
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class PostingTool(BaseTool):
+    """Shared publish path for the platform tools.
+    
+    Subclasses implement ``_publish`` (and ``_apublish`` on the shared async
+    HTTP client); ``post``/``apost`` wrap them with the ledger, the rate-limit
+    budget and the per-platform concurrency limit. Transient failures are
+    retried with backoff behind the platform's circuit breaker; tools whose
+    posts take several requests override ``_send`` to retry each one alone. Media posts
+    stream their file from Drive into the platform's chunked upload inside
+    ``_publish``. In dry-run mode ``_preview`` builds the same requests and
+    they are recorded instead of sent, after checking what would make the
+    real publish fail: missing ``required_keys`` in the platform config and
+    media the platform does not accept.
+    """
+    platform: ClassVar[str] = ""
+    display_name: ClassVar[str] = ""
+    id_label: ClassVar[str] = "Post ID"
+    required_keys: ClassVar[tuple] = ()
+    
+    @property
+    def account(self) -> Optional[str]:
+        """Rate-limit key of the account this tool posts as (None if app-wide)"""
+        return None
+    
+    @property
+    @abc.abstractmethod
+    def account_id(self) -> str:
+        """Identifier of the page/user this tool publishes to, used by the ledger"""
+    
+    @abc.abstractmethod
+    def _publish(self, content: str, media: Optional[MediaFile] = None) -> str:
+        """Call the platform API and return the new post's ID"""
+    
+    @abc.abstractmethod
+    async def _apublish(self, content: str) -> str:
+        """Async variant of _publish on the shared httpx client"""
+    
+    @abc.abstractmethod
+    def _preview(self, content: str, media: Optional[MediaFile] = None) -> List[Dict]:
+        """Requests ``_publish`` would send, validated but not sent (dry runs)"""
+    
+    def _check_config(self):
+        """Raise PostingError when a required setting is missing or still the example value"""
+        missing = [key for key in self.required_keys
+                   if not str(self.config.get(key) or '').strip() or str(self.config[key]).startswith('your_')]
+        if missing:
+            raise PostingError(f"{self.display_name} config is missing {', '.join(missing)}")
+    
+    def _render(self, content: str) -> List[str]:
+        """Platform variant of the content, usually prerendered and served from the render cache"""
+        return renderer.variant(self.platform, content)
+    
+    def _limited_publish(self, content: str, media: Optional[MediaFile] = None) -> str:
+        # The slot is only held while calling the API, not during retry backoff
+        with platform_limiter.slot(self.platform):
+            return self._publish(content, media)
+    
+    async def _alimited_publish(self, content: str) -> str:
+        async with platform_limiter.aslot(self.platform):
+            return await self._apublish(content)
+    
+    def _send(self, content: str, media: Optional[MediaFile] = None, key: Optional[str] = None) -> str:
+        """Publish with retries; ``key`` is the ledger reservation, for posts sent in several parts"""
+        return retrier.call(self.platform, self._limited_publish, content, media)
+    
+    async def _asend(self, content: str, key: Optional[str] = None) -> str:
+        return await retrier.acall(self.platform, self._alimited_publish, content)
+    
+    def post(self, content: str, media: Optional[MediaFile] = None) -> str:
+        """Publish content, optionally with an image or video, and return the platform's post ID.
+        
+        With a ledger configured, content already published to this account
+        returns the recorded post ID instead of being posted a second time.
+        """
+        with tracer.span('tool', self.name, platform=self.platform, bytes=len(content.encode('utf-8'))) as span:
+            if media is not None:
+                span['media'] = media.name
+                span['media_bytes'] = media.size
+            try:
+                post_id = self._post(content, span, media)
+            except Exception as e:
+                outcomes.record(self.platform, error=e)
+                raise
+            outcomes.record(self.platform, post_id=post_id)
+            span['post_id'] = post_id
+            return post_id
+    
+    def _dry_run_post(self, content: str, span: Dict, media: Optional[MediaFile] = None) -> str:
+        # No ledger claim, rate-limit token or credential refresh: nothing is sent
+        span['dry_run'] = True
+        clock = time.monotonic()
+        calls, error = [], None
+        try:
+            self._check_config()
+            if media is not None:
+                check_media(self.platform, media)
+            calls = self._preview(content, media)
+        except Exception as e:
+            error = e
+        media_info = {'name': media.name, 'mime_type': media.mime_type, 'size': media.size} if media else None
+        post_id = self.dry_run.record(self.platform, self.account_id, calls, time.monotonic() - clock,
+                                      media_info, error)
+        if error is not None:
+            raise error
+        return post_id
+    
+    def _post(self, content: str, span: Dict, media: Optional[MediaFile] = None) -> str:
+        if self.dry_run is not None:
+            return self._dry_run_post(content, span, media)
+        key = None
+        if self.ledger is not None:
+            # The same caption with a different file (or file revision) is a new post
+            ledger_content = content if media is None else f"{content}\x1fmedia:{media.key}"
+            key, existing_id = self.ledger.claim(self.platform, self.account_id, ledger_content)
+            if existing_id is not None:
+                span['deduplicated'] = True
+                return existing_id
+        
+        try:
+            with deadline_guard(self.platform):
+                rate_limits.acquire(self.platform, self.account)
+                post_id = self._send(content, media, key)
+        except RateLimited as e:
+            rate_limits.defer(e, self.account)
+            if key is not None:
+                self.ledger.release(key)
+            raise
+        except Exception:
+            if key is not None:
+                self.ledger.release(key)
+            raise
+        
+        if key is not None:
+            self.ledger.record(key, post_id)
+        return post_id
+    
+    async def apost(self, content: str) -> str:
+        """Async variant of post that keeps the event loop free while publishing"""
+        with tracer.span('tool', self.name, platform=self.platform, bytes=len(content.encode('utf-8'))) as span:
+            try:
+                post_id = await self._apost(content, span)
+            except Exception as e:
+                outcomes.record(self.platform, error=e)
+                raise
+            outcomes.record(self.platform, post_id=post_id)
+            span['post_id'] = post_id
+            return post_id
+    
+    async def _apost(self, content: str, span: Dict) -> str:
+        if self.dry_run is not None:
+            return self._dry_run_post(content, span)
+        key = None
+        if self.ledger is not None:
+            # SQLite calls may wait on another writer, so keep them off the loop
+            key, existing_id = await asyncio.to_thread(
+                self.ledger.claim, self.platform, self.account_id, content)
+            if existing_id is not None:
+                span['deduplicated'] = True
+                return existing_id
+        
+        try:
+            with deadline_guard(self.platform):
+                rate_limits.acquire(self.platform, self.account)
+                post_id = await self._asend(content, key)
+        except RateLimited as e:
+            rate_limits.defer(e, self.account)
+            if key is not None:
+                await asyncio.to_thread(self.ledger.release, key)
+            raise
+        except Exception:
+            if key is not None:
+                await asyncio.to_thread(self.ledger.release, key)
+            raise
+        
+        if key is not None:
+            await asyncio.to_thread(self.ledger.record, key, post_id)
+        return post_id
+    
+    def _result_message(self, post_id: Optional[str] = None, error: Optional[Exception] = None) -> str:
+        if error is None and self.dry_run is not None:
+            return f"Dry run: validated the post to {self.display_name}; nothing was published. " \
+                   f"{self.id_label}: {post_id}"
+        if error is None:
+            return f"Successfully posted to {self.display_name}. {self.id_label}: {post_id}"
+        if isinstance(error, RateLimited):
+            return f"Posting to {self.display_name} was deferred: {str(error)}"
+        return f"Error posting to {self.display_name}: {str(error)}"
+    
+    def _run(self, content: str) -> str:
+        """Post content to the platform"""
+        try:
+            return self._result_message(post_id=self.post(content))
+        except Exception as e:
+            return self._result_message(error=e)
+    
+    async def _arun(self, content: str) -> str:
+        """Post content to the platform without blocking the event loop"""
+        try:
+            return self._result_message(post_id=await self.apost(content))
+        except Exception as e:
+            return self._result_message(error=e)
+
+
+FACEBOOK_VIDEO_URL = "https://graph-video.facebook.com/"
+
+
+class FacebookTool(PostingTool):
     name: str = "Facebook Poster"
     description: str = "Posts content to Facebook page"
+    platform: ClassVar[str] = "facebook"
+    display_name: ClassVar[str] = "Facebook"
+    required_keys: ClassVar[tuple] = ('page_id', 'access_token')
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, session: requests.Session = None, ledger: Optional[PostLedger] = None,
+                 http_config: Optional[Dict] = None, dry_run: Optional[DryRunRecorder] = None):
         super().__init__()
         self.config = config
-        self.graph = facebook.GraphAPI(access_token=config['access_token'])
+        self.ledger = ledger
+        self.http_config = http_config
+        self.dry_run = dry_run
+        self.graph = facebook.GraphAPI(
+            access_token=config['access_token'],
+            session=session or get_session()
+        )
     
-    def _run(self, content: str) -> str:
-        """Post content to Facebook"""
+    @property
+    def account_id(self) -> str:
+        return str(self.config['page_id'])
+    
+    @property
+    def access_token(self) -> str:
+        """Current page token; the credential manager swaps in refreshed ones"""
+        self.graph.access_token = credential_manager.access_token('facebook', self.config)
+        return self.graph.access_token
+    
+    def _throttled(self, error: facebook.GraphAPIError) -> Optional[RateLimited]:
+        """RateLimited for Graph API errors that mean "slow down", else None"""
+        if error.code not in FACEBOOK_THROTTLE_CODES:
+            return None
+        retry_at = rate_limits.blocked_until('facebook') or time.time() + 300
+        rate_limits.block('facebook', retry_at)
+        return RateLimited('facebook', retry_at)
+    
+    def _publish_media(self, content: str, media: MediaFile) -> str:
+        """Upload a video (resumably) or a photo to the page with content as its caption"""
+        if media.kind == 'video':
+            url = f"{FACEBOOK_VIDEO_URL}{self.graph.version}/{self.config['page_id']}/videos"
+            return facebook_video_upload(self.graph.session, url, self.access_token, media, content)
+        url = f"{facebook.FACEBOOK_GRAPH_URL}{self.graph.version}/{self.config['page_id']}/photos"
+        return facebook_photo_upload(self.graph.session, url, self.access_token, media, content)
+    
+    def _publish(self, content: str, media: Optional[MediaFile] = None) -> str:
+        """Publish content to the Facebook page and return the post ID"""
+        message = self._render(content)[0]
         try:
+            if media is not None:
+                return self._publish_media(message, media)
+            # Make sure the Graph client holds the current page token
+            self.access_token
             result = self.graph.put_object(
                 parent_object=self.config['page_id'],
                 connection_name='feed',
-                message=content
+                message=message
             )
-            return f"Successfully posted to Facebook. Post ID: {result['id']}"
-        except Exception as e:
-            return f"Error posting to Facebook: {str(e)}"
+        except facebook.GraphAPIError as e:
+            throttled = self._throttled(e)
+            if throttled is not None:
+                raise throttled from e
+            raise
+        return result['id']
+    
+    def _preview(self, content: str, media: Optional[MediaFile] = None) -> List[Dict]:
+        """The feed post, or the photo/video upload with its caption"""
+        message = self._render(content)[0]
+        if not message.strip():
+            raise PostingError("Facebook post is empty")
+        
+        page_id = self.config['page_id']
+        if media is None:
+            url = f"{facebook.FACEBOOK_GRAPH_URL}{self.graph.version}/{page_id}/feed"
+            return [{'method': 'POST', 'url': url, 'data': {'message': message}}]
+        if media.kind == 'video':
+            url = f"{FACEBOOK_VIDEO_URL}{self.graph.version}/{page_id}/videos"
+            return [{'method': 'POST', 'url': url, 'data': {'description': message}, 'upload': media.name}]
+        url = f"{facebook.FACEBOOK_GRAPH_URL}{self.graph.version}/{page_id}/photos"
+        return [{'method': 'POST', 'url': url, 'data': {'message': message}, 'upload': media.name}]
+    
+    async def _apublish(self, content: str) -> str:
+        """Publish content to the Facebook page over the async client"""
+        url = f"{facebook.FACEBOOK_GRAPH_URL}{self.graph.version}/{self.config['page_id']}/feed"
+        response = await get_async_client(self.http_config).post(
+            url, data={'message': self._render(content)[0], 'access_token': self.access_token})
+        result = response.json()
+        
+        if isinstance(result, dict) and result.get('error'):
+            error = facebook.GraphAPIError(result)
+            throttled = self._throttled(error)
+            if throttled is not None:
+                raise throttled from error
+            raise error
+        return result['id']
 
 
-class TwitterTool(BaseTool):
+class TwitterTool(PostingTool):
     name: str = "Twitter Poster"
     description: str = "Posts content to Twitter/X"
+    platform: ClassVar[str] = "twitter"
+    display_name: ClassVar[str] = "Twitter"
+    id_label: ClassVar[str] = "Tweet ID"
+    url: ClassVar[str] = "https://api.twitter.com/2/tweets"
+    required_keys: ClassVar[tuple] = ('api_key', 'api_secret', 'access_token', 'access_token_secret')
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, session: requests.Session = None, ledger: Optional[PostLedger] = None,
+                 http_config: Optional[Dict] = None, dry_run: Optional[DryRunRecorder] = None):
         super().__init__()
         self.config = config
+        self.ledger = ledger
+        self.http_config = http_config
+        self.dry_run = dry_run
+        # Throttling is handled by the rate-limit manager, which defers the post
+        # instead of putting the whole worker thread to sleep
         self.client = tweepy.Client(
             bearer_token=config['bearer_token'],
             consumer_key=config['api_key'],
             consumer_secret=config['api_secret'],
             access_token=config['access_token'],
             access_token_secret=config['access_token_secret'],
-            wait_on_rate_limit=True
+            wait_on_rate_limit=False
         )
+        # Reuse the pooled keep-alive session; its adapter supplies the timeouts
+        self.client.session = session or get_session()
     
-    def _run(self, content: str) -> str:
-        """Post content to Twitter"""
+    @property
+    def account(self) -> Optional[str]:
+        return account_key(self.config['access_token'])
+    
+    @property
+    def account_id(self) -> str:
+        # User access tokens are prefixed with the numeric user ID
+        return self.config['access_token'].split('-', 1)[0]
+    
+    def _check_config(self):
+        super()._check_config()
+        # The ledger keys posts by the user ID at the start of the token
+        if not self.account_id.isdigit():
+            raise PostingError("Twitter access_token is not a user access token ('<user id>-…')")
+    
+    def _throttled(self) -> RateLimited:
+        # The response hook has usually recorded the reset time already
+        retry_at = rate_limits.blocked_until('twitter', self.account) or time.time() + 900
+        rate_limits.block('twitter', retry_at, self.account)
+        return RateLimited('twitter', retry_at)
+    
+    def _upload(self, media: MediaFile) -> str:
+        """Chunk-upload media on the shared session and return its media ID"""
+        auth = OAuth1(
+            self.config['api_key'],
+            client_secret=self.config['api_secret'],
+            resource_owner_key=self.config['access_token'],
+            resource_owner_secret=self.config['access_token_secret']
+        )
         try:
-            # Ensure content is within Twitter's character limit
-            if len(content) > 280:
-                content = content[:277] + "..."
-            
-            response = self.client.create_tweet(text=content)
-            return f"Successfully posted to Twitter. Tweet ID: {response.data['id']}"
-        except Exception as e:
-            return f"Error posting to Twitter: {str(e)}"
+            return twitter_upload(self.client.session, auth, media)
+        except MediaError as e:
+            if e.status_code == 429:
+                raise self._throttled() from e
+            raise
+    
+    def _limited_upload(self, media: MediaFile) -> str:
+        with platform_limiter.slot(self.platform):
+            return self._upload(media)
+    
+    def _create_tweet(self, text: str, media_ids: Optional[List[str]] = None, reply_to: Optional[str] = None) -> str:
+        """Post one tweet of a thread and return its ID"""
+        with platform_limiter.slot(self.platform):
+            try:
+                response = self.client.create_tweet(text=text, media_ids=media_ids, in_reply_to_tweet_id=reply_to)
+            except tweepy.TooManyRequests as e:
+                raise self._throttled() from e
+        return response.data['id']
+    
+    def _thread_stopped(self, posted: List[str], parts: List[str], error: Exception) -> str:
+        """First tweet ID of a thread that could not be finished; the opening tweet is live, so it counts as posted"""
+        logger.warning(f"⚠️ Twitter thread stopped after {len(posted)}/{len(parts)} tweets "
+                       f"(first ID: {posted[0]}): {str(error)}")
+        return posted[0]
+    
+    def _publish(self, content: str, media: Optional[MediaFile] = None) -> str:
+        """Publish a tweet, or a thread when the copy is too long for one, and return the first ID"""
+        return self._send(content, media)
+    
+    def _send(self, content: str, media: Optional[MediaFile] = None, key: Optional[str] = None) -> str:
+        """Post a thread one tweet at a time, retrying each on its own and recording progress in the ledger.
+        
+        Retrying the whole thread would repost the tweets that already went out,
+        so a failure only repeats the tweet that failed. A run taking over a
+        crashed reservation continues after the last tweet recorded for it.
+        """
+        parts = self._render(content)
+        posted = self.ledger.parts(key) if key is not None else []
+        media_ids = None
+        if media is not None and not posted:
+            media_ids = [retrier.call(self.platform, self._limited_upload, media)]
+        
+        for part in parts[len(posted):]:
+            try:
+                tweet_id = retrier.call(self.platform, self._create_tweet, part, media_ids,
+                                        posted[-1] if posted else None)
+            except Exception as e:
+                if not posted:
+                    raise
+                return self._thread_stopped(posted, parts, e)
+            posted.append(tweet_id)
+            # Media goes on the opening tweet only
+            media_ids = None
+            if key is not None:
+                self.ledger.progress(key, posted)
+        return posted[0]
+    
+    def _preview(self, content: str, media: Optional[MediaFile] = None) -> List[Dict]:
+        """The media upload (if any) and one create-tweet request per part of the thread"""
+        parts = self._render(content)
+        calls = []
+        if media is not None:
+            calls.append({'method': 'POST', 'url': "https://upload.twitter.com/1.1/media/upload.json",
+                             'upload': media.name})
+        for index, part in enumerate(parts):
+            if not part.strip():
+                raise PostingError(f"Tweet {index + 1} of {len(parts)} is empty")
+            payload = {'text': part}
+            if index == 0 and media is not None:
+                payload['media'] = {'media_ids': ['<uploaded media>']}
+            if index > 0:
+                payload['reply'] = {'in_reply_to_tweet_id': '<previous tweet>'}
+            calls.append({'method': 'POST', 'url': self.url, 'json': payload})
+        return calls
+    
+    async def _acreate_tweet(self, signer: OAuth1Client, text: str, reply_to: Optional[str] = None) -> str:
+        """Post one tweet of a thread over the async client and return its ID"""
+        # JSON bodies are not part of the OAuth 1.0a signature base string
+        _, headers, _ = signer.sign(self.url, http_method='POST', headers={'Content-Type': 'application/json'})
+        payload = {'text': text}
+        if reply_to is not None:
+            payload['reply'] = {'in_reply_to_tweet_id': reply_to}
+        
+        async with platform_limiter.aslot(self.platform):
+            response = await get_async_client(self.http_config).post(
+                self.url, headers=headers, content=json.dumps(payload))
+        
+        if response.status_code == 429:
+            raise self._throttled()
+        if not 200 <= response.status_code < 300:
+            raise PostingError(f"{response.status_code} - {response.text}", response)
+        return response.json()['data']['id']
+    
+    async def _apublish(self, content: str) -> str:
+        """Publish a tweet or thread over the async client, signing each request with OAuth 1.0a"""
+        return await self._asend(content)
+    
+    async def _asend(self, content: str, key: Optional[str] = None) -> str:
+        """Async variant of _send"""
+        parts = self._render(content)
+        posted = await asyncio.to_thread(self.ledger.parts, key) if key is not None else []
+        signer = OAuth1Client(
+            self.config['api_key'],
+            client_secret=self.config['api_secret'],
+            resource_owner_key=self.config['access_token'],
+            resource_owner_secret=self.config['access_token_secret']
+        )
+        
+        for part in parts[len(posted):]:
+            try:
+                tweet_id = await retrier.acall(self.platform, self._acreate_tweet, signer, part,
+                                               posted[-1] if posted else None)
+            except Exception as e:
+                if not posted:
+                    raise
+                return self._thread_stopped(posted, parts, e)
+            posted.append(tweet_id)
+            if key is not None:
+                await asyncio.to_thread(self.ledger.progress, key, list(posted))
+        return posted[0]
 
 
-class LinkedInTool(BaseTool):
+class LinkedInTool(PostingTool):
     name: str = "LinkedIn Poster"
     description: str = "Posts content to LinkedIn"
+    platform: ClassVar[str] = "linkedin"
+    display_name: ClassVar[str] = "LinkedIn"
+    url: ClassVar[str] = "https://api.linkedin.com/v2/ugcPosts"
+    required_keys: ClassVar[tuple] = ('person_id', 'access_token')
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, session: requests.Session = None, ledger: Optional[PostLedger] = None,
+                 http_config: Optional[Dict] = None, dry_run: Optional[DryRunRecorder] = None):
         super().__init__()
         self.config = config
-        self.headers = {
-            'Authorization': f'Bearer {config["access_token"]}',
+        self.ledger = ledger
+        self.http_config = http_config
+        self.dry_run = dry_run
+        self.session = session or get_session()
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Request headers with the current token; the credential manager swaps in refreshed ones"""
+        return {
+            'Authorization': f'Bearer {credential_manager.access_token("linkedin", self.config)}',
             'Content-Type': 'application/json',
             'X-Restli-Protocol-Version': '2.0.0'
         }
     
-    def _run(self, content: str) -> str:
-        """Post content to LinkedIn"""
-        try:
-            url = 'https://api.linkedin.com/v2/ugcPosts'
-            
-            post_data = {
-                "author": f"urn:li:person:{self.config['person_id']}",
-                "lifecycleState": "PUBLISHED",
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {
-                            "text": content
-                        },
-                        "shareMediaCategory": "NONE"
-                    }
-                },
-                "visibility": {
-                    "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
-                }
+    @property
+    def account(self) -> Optional[str]:
+        return account_key(self.config['access_token'])
+    
+    @property
+    def account_id(self) -> str:
+        return str(self.config['person_id'])
+    
+    def _share(self, content: str, category: str = "NONE", assets: Optional[List[str]] = None) -> Dict:
+        share_content = {
+            "shareCommentary": {
+                "text": content
+            },
+            "shareMediaCategory": category
+        }
+        if assets:
+            share_content["media"] = [{"status": "READY", "media": asset} for asset in assets]
+        
+        return {
+            "author": f"urn:li:person:{self.config['person_id']}",
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": share_content
+            },
+            "visibility": {
+                "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
             }
-            
-            response = requests.post(url, headers=self.headers, json=post_data)
-            
-            if response.status_code == 201:
-                return f"Successfully posted to LinkedIn. Response: {response.json()}"
-            else:
-                return f"Error posting to LinkedIn: {response.status_code} - {response.text}"
-                
-        except Exception as e:
-            return f"Error posting to LinkedIn: {str(e)}"
+        }
+    
+    def _throttled(self) -> RateLimited:
+        retry_at = rate_limits.blocked_until('linkedin', self.account) or time.time() + 3600
+        rate_limits.block('linkedin', retry_at, self.account)
+        return RateLimited('linkedin', retry_at)
+    
+    def _post_id(self, response) -> str:
+        """Post URN from a requests or httpx response"""
+        if response.status_code == 429:
+            raise self._throttled()
+        if response.status_code != 201:
+            raise PostingError(f"{response.status_code} - {response.text}", response)
+        
+        return response.headers.get('x-restli-id') or response.json().get('id')
+    
+    def _publish(self, content: str, media: Optional[MediaFile] = None) -> str:
+        """Publish a share to LinkedIn and return the post URN"""
+        text = self._render(content)[0]
+        if media is None:
+            share = self._share(text)
+        else:
+            try:
+                asset = linkedin_upload(self.session, self.headers, f"urn:li:person:{self.config['person_id']}", media)
+            except MediaError as e:
+                if e.status_code == 429:
+                    raise self._throttled() from e
+                raise
+            share = self._share(text, media.kind.upper(), [asset])
+        
+        response = self.session.post(self.url, headers=self.headers, json=share)
+        return self._post_id(response)
+    
+    def _preview(self, content: str, media: Optional[MediaFile] = None) -> List[Dict]:
+        """The asset registration and upload (if any) and the share itself"""
+        text = self._render(content)[0]
+        if not text.strip():
+            raise PostingError("LinkedIn post is empty")
+        
+        if media is None:
+            return [{'method': 'POST', 'url': self.url, 'json': self._share(text)}]
+        return [
+            {'method': 'POST', 'url': "https://api.linkedin.com/v2/assets?action=registerUpload",
+             'upload': media.name},
+            {'method': 'POST', 'url': self.url, 'json': self._share(text, media.kind.upper(), ['<uploaded asset>'])}
+        ]
+    
+    async def _apublish(self, content: str) -> str:
+        """Publish a share to LinkedIn over the async client"""
+        response = await get_async_client(self.http_config).post(
+            self.url, headers=self.headers, json=self._share(self._render(content)[0]))
+        return self._post_id(response)
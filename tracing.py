@@ -0,0 +1,313 @@
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # OpenTelemetry export is optional
+    otel_trace = None
+
+
+# Identifies the workflow run a span belongs to; copied into worker threads
+current_run: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_run', default=None)
+
+USAGE_KEYS = ('llm_calls', 'http_calls', 'prompt_tokens', 'completion_tokens', 'total_tokens')
+
+# Spans recorded outside any run are written once this many have accumulated
+FLUSH_EVERY = 200
+
+
+def run_in_context(func):
+    """Bind func to the caller's context so spans in a worker thread keep the run ID"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Tracer:
+    """Collects timing, token and byte counts for workflow stages.
+
+    Spans are recorded for tasks, agent steps, tool calls, LLM calls and HTTP
+    requests. Each finished span is kept in memory for the per-run summary
+    table, mirrored to OpenTelemetry when it is installed and enabled, and
+    appended to a JSON lines file in one batch when its run finishes, so the
+    hot path never waits on disk.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, List[Dict]] = {}
+        # Spans outside any run, waiting for the next batched write
+        self._pending: List[Dict] = []
+        self._write_lock = threading.Lock()
+        # Process-wide totals, kept even with span export disabled (shadow runs diff these)
+        self._usage = dict.fromkeys(USAGE_KEYS, 0)
+        self.configure(config or {})
+
+    def configure(self, config: Dict):
+        self.enabled = config.get('enabled', True)
+        self.jsonl_path = config.get('jsonl_path', 'traces.jsonl')
+        self.prometheus_path = config.get('prometheus_path')
+        self.print_summary = config.get('print_summary', True)
+        self._otel = (
+            otel_trace.get_tracer('social_media_poster')
+            if config.get('opentelemetry') and otel_trace is not None else None
+        )
+
+    def start_run(self, label: str) -> str:
+        """Begin collecting spans for a workflow run in the current context"""
+        run_id = f"{label}-{uuid.uuid4().hex[:8]}"
+        current_run.set(run_id)
+        with self._lock:
+            self._spans[run_id] = []
+        return run_id
+
+    def finish_run(self, run_id: str) -> List[Dict]:
+        """Stop collecting for a run, export metrics and return its spans"""
+        with self._lock:
+            spans = self._spans.pop(run_id, [])
+            pending, self._pending = self._pending, []
+        self._write_jsonl(pending + spans)
+        if self.prometheus_path and spans:
+            self.write_prometheus(spans)
+        return spans
+
+    def record(self, kind: str, name: str, started: float, seconds: float, **attrs: Any):
+        """Store a finished span measured by the caller"""
+        if kind in ('llm', 'http'):
+            with self._lock:
+                self._usage[f'{kind}_calls'] += 1
+                for key in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+                    self._usage[key] += attrs.get(key, 0)
+        if not self.enabled:
+            return
+
+        run_id = current_run.get()
+        span = {
+            'run_id': run_id,
+            'kind': kind,
+            'name': name,
+            'start': round(started, 6),
+            'seconds': round(seconds, 6),
+            'thread': threading.current_thread().name,
+            **attrs
+        }
+
+        overflow = False
+        with self._lock:
+            if run_id in self._spans:
+                self._spans[run_id].append(span)
+            elif self.jsonl_path:
+                self._pending.append(span)
+                overflow = len(self._pending) >= FLUSH_EVERY
+        if overflow:
+            self.flush()
+
+        if self._otel is not None:
+            otel_span = self._otel.start_span(
+                f"{kind}:{name}",
+                start_time=int(started * 1e9),
+                attributes={key: value for key, value in span.items()
+                            if isinstance(value, (str, int, float, bool))}
+            )
+            otel_span.end(end_time=int((started + seconds) * 1e9))
+
+    def flush(self):
+        """Write spans recorded outside any run that are still buffered"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        self._write_jsonl(pending)
+
+    def _write_jsonl(self, spans: List[Dict]):
+        if not spans or not self.jsonl_path:
+            return
+        lines = ''.join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self._write_lock:
+            with open(self.jsonl_path, 'a') as f:
+                f.write(lines)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs: Any):
+        """Time a block; the yielded dict can be filled with extra attributes"""
+        started = time.time()
+        clock = time.monotonic()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs.setdefault('error', str(e))
+            raise
+        finally:
+            self.record(kind, name, started, time.monotonic() - clock, **attrs)
+
+    def observe_http(self, response, *args, **kwargs):
+        """requests/httpx response hook recording each HTTP call"""
+        request = response.request
+        # requests keeps the payload in .body, httpx in .content
+        body = getattr(request, 'body', None) if hasattr(request, 'body') else getattr(request, 'content', None)
+        sent = len(body) if isinstance(body, (bytes, str)) else 0
+        received = int(response.headers.get('Content-Length') or 0)
+        seconds = response.elapsed.total_seconds()
+        self.record(
+            'http', f"{request.method if request is not None else ''} {str(response.url).split('?')[0]}",
+            time.time() - seconds, seconds,
+            status=response.status_code, bytes_sent=sent, bytes_received=received,
+            redirects=len(response.history)
+        )
+        return response
+
+    def usage(self) -> Dict[str, int]:
+        """LLM/HTTP call and token totals since the process started"""
+        with self._lock:
+            return dict(self._usage)
+
+    def agent_step(self, step_output: Any):
+        """crewai step_callback: one span-less event per agent reasoning step"""
+        self.record('agent_step', type(step_output).__name__, time.time(), 0.0)
+
+    def summary_table(self, spans: List[Dict]) -> str:
+        """Aggregate spans per kind/name into a fixed-width table"""
+        groups: Dict[tuple, List[Dict]] = {}
+        for span in spans:
+            groups.setdefault((span['kind'], span['name']), []).append(span)
+
+        header = f"{'kind':<12} {'name':<48} {'count':>5} {'total s':>9} {'p50 s':>8} {'max s':>8} {'tokens':>8} {'bytes':>10}"
+        lines = [header, '-' * len(header)]
+        for (kind, name), group in sorted(groups.items()):
+            durations = [span['seconds'] for span in group]
+            tokens = sum(span.get('total_tokens', 0) for span in group)
+            transferred = sum(span.get('bytes_sent', 0) + span.get('bytes_received', 0) +
+                              span.get('bytes', 0) for span in group)
+            lines.append(
+                f"{kind:<12} {name[:48]:<48} {len(group):>5} {sum(durations):>9.3f} "
+                f"{_percentile(durations, 0.5):>8.3f} {max(durations):>8.3f} {tokens:>8} {transferred:>10}"
+            )
+        return "\n".join(lines)
+
+    def prometheus_text(self, spans: List[Dict]) -> str:
+        """Render the last run's span totals in the Prometheus text exposition format"""
+        counts: Dict[tuple, int] = {}
+        seconds: Dict[tuple, float] = {}
+        tokens: Dict[tuple, int] = {}
+        for span in spans:
+            key = (span['kind'], span['name'])
+            counts[key] = counts.get(key, 0) + 1
+            seconds[key] = seconds.get(key, 0.0) + span['seconds']
+            tokens[key] = tokens.get(key, 0) + span.get('total_tokens', 0)
+
+        def labels(key):
+            kind, name = key
+            return 'kind="%s",name="%s"' % (kind, name.replace('\\', '\\\\').replace('"', '\\"'))
+
+        lines = [
+            "# TYPE social_poster_last_run_seconds gauge",
+            *[f"social_poster_last_run_seconds{{{labels(key)}}} {value:.6f}" for key, value in seconds.items()],
+            "# TYPE social_poster_last_run_spans gauge",
+            *[f"social_poster_last_run_spans{{{labels(key)}}} {value}" for key, value in counts.items()],
+            "# TYPE social_poster_last_run_tokens gauge",
+            *[f"social_poster_last_run_tokens{{{labels(key)}}} {value}" for key, value in tokens.items() if value],
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, spans: List[Dict]):
+        # Written for the node_exporter textfile collector, so replace atomically
+        tmp_path = self.prometheus_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text(spans))
+        os.replace(tmp_path, self.prometheus_path)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """langchain callback that records latency and token usage of each LLM call"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._started: Dict[Any, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = (time.time(), time.monotonic())
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = (time.time(), time.monotonic())
+
+    @staticmethod
+    def _metadata(generation) -> Dict:
+        message = getattr(generation, 'message', None)
+        return {**(getattr(message, 'response_metadata', None) or {}), **(generation.generation_info or {})}
+
+    def _usage(self, response) -> Dict[str, int]:
+        """Token counts of a result; streamed results carry them on the generations, not in llm_output"""
+        usage = (response.llm_output or {}).get('token_usage')
+        if usage:
+            return usage
+
+        usage = dict.fromkeys(('prompt_tokens', 'completion_tokens', 'total_tokens'), 0)
+        for generation in (item for batch in response.generations for item in batch):
+            # Newer langchain releases report streamed usage on the message itself
+            metadata = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if metadata:
+                reported = {'prompt_tokens': metadata.get('input_tokens', 0),
+                            'completion_tokens': metadata.get('output_tokens', 0),
+                            'total_tokens': metadata.get('total_tokens', 0)}
+            else:
+                info = self._metadata(generation)
+                reported = info.get('token_usage') or info.get('usage') or {}
+            for key in usage:
+                usage[key] += reported.get(key) or 0
+        return usage
+
+    def _model(self, response) -> str:
+        model = (response.llm_output or {}).get('model_name')
+        generations = [item for batch in response.generations for item in batch]
+        if not model and generations:
+            model = self._metadata(generations[0]).get('model_name')
+        return model or 'llm'
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started, clock = self._started.pop(run_id, (time.time(), time.monotonic()))
+        usage = self._usage(response)
+        model = self._model(response)
+        self.tracer.record(
+            'llm', model, started, time.monotonic() - clock,
+            prompt_tokens=usage.get('prompt_tokens', 0),
+            completion_tokens=usage.get('completion_tokens', 0),
+            total_tokens=usage.get('total_tokens', 0)
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started, clock = self._started.pop(run_id, (time.time(), time.monotonic()))
+        self.tracer.record('llm', 'error', started, time.monotonic() - clock, error=str(error))
+
+
+class TaskTimer:
+    """crewai task_callback that times tasks of a sequential crew"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self.reset()
+
+    def reset(self):
+        self._last = (time.time(), time.monotonic())
+
+    def __call__(self, output: Any):
+        started, clock = self._last
+        description = ' '.join(str(getattr(output, 'description', 'task')).split())
+        self.tracer.record('task', description[:60], started, time.monotonic() - clock)
+        self.reset()
+
+
+# Shared by every component in the process
+tracer = Tracer()
+atexit.register(tracer.flush)
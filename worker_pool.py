@@ -0,0 +1,301 @@
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+from log_pipeline import RunContextFilter
+from registry import fingerprint
+
+
+DEFAULT_POOL_SETTINGS = {
+    'enabled': False,
+    'workers': 2,
+    # A worker is replaced after this many jobs, or as soon as its resident memory passes max_rss_mb
+    'max_jobs_per_worker': 20,
+    'max_rss_mb': 1024,
+    # A job still running after this long is treated as hung and its worker killed
+    'job_timeout': 3600,
+    'start_timeout': 120
+}
+
+# Imported once in the fork server, so every worker (and every replacement) starts warm
+PRELOAD = ['scheduler', 'crew', 'fanout', 'render']
+
+logger = logging.getLogger('worker_pool')
+
+
+class WorkerError(Exception):
+    """Raised when a pool worker cannot be started, dies mid-job or hangs"""
+
+
+def rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB (current on Linux, peak elsewhere)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _context():
+    # A fork server imports the heavy modules once and forks warm workers from
+    # that clean process, never from the threaded scheduler itself
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        if sys.version_info < (3, 12):
+            # Older fork servers ignore the parent's sys.path and would only find
+            # the preload modules when started from the project directory
+            project_dir = os.path.dirname(os.path.abspath(__file__))
+            paths = os.environ.get('PYTHONPATH', '').split(os.pathsep)
+            if project_dir not in paths:
+                os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [project_dir] + paths))
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(PRELOAD)
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class _Relay(logging.Handler):
+    """Hands records from the workers to the parent's loggers, so one process owns the log files"""
+
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger(None if record.name == 'root' else record.name).handle(record)
+
+
+def _apply_config(config: Dict):
+    """Per-process state a worker takes from the config it is handed"""
+    from tools.credentials import credential_manager
+    from tools.rate_limit import configure_rate_limits
+
+    settings = config.get('logging', {})
+    logging.getLogger().setLevel(settings.get('level', 'INFO'))
+    for component, level in settings.get('levels', {}).items():
+        logging.getLogger(component).setLevel(level)
+
+    configure_rate_limits(config)
+    credential_manager.configure(config.get('credentials', {}))
+
+
+def _worker_main(conn, log_queue, cwd: str, max_jobs: int, max_rss: Optional[float],
+                 initializer: Optional[Callable], initargs: Sequence):
+    """Worker process: run jobs from the pipe until told to stop or due for recycling"""
+    os.chdir(cwd)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RunContextFilter())
+    root.addHandler(queue_handler)
+
+    # Already loaded in the fork server; under spawn this is where the warm-up happens
+    for module in PRELOAD:
+        __import__(module)
+    from config_watcher import evict_stale_components
+    from scheduler import JobRunner
+    from tools.credentials import credential_manager
+
+    # Headless: a missing token fails the job instead of waiting on a browser
+    credential_manager.worker = True
+    if initializer is not None:
+        initializer(*initargs)
+    conn.send(('ready', os.getpid()))
+
+    runner = None
+    config_key = None
+    jobs = 0
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == 'stop':
+            return
+
+        _, payload, config = message
+        if fingerprint(config) != config_key:
+            _apply_config(config)
+            if runner is not None:
+                evict_stale_components(runner.config, config)
+            runner = JobRunner(config)
+            config_key = fingerprint(config)
+
+        try:
+            result = runner.run(payload)
+        except Exception as e:
+            logger.exception(f"❌ Job failed in pool worker {os.getpid()}: {str(e)}")
+            result = {'success': False, 'deferred': []}
+
+        jobs += 1
+        rss = rss_mb()
+        retire = jobs >= max_jobs or bool(max_rss and rss and rss > max_rss)
+        conn.send(('result', {'result': result, 'jobs': jobs, 'rss_mb': rss, 'retire': retire}))
+        if retire:
+            return
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+
+class WorkerPool:
+    """Pre-started worker processes that each run one posting job at a time.
+
+    Workers are forked from a fork server that has already imported crewai,
+    LangChain and the platform clients, so a job starts warm and a replacement
+    costs a fork rather than a cold start. Each job's payload and config go to
+    an idle worker over its pipe, and the result (success and rate-limit
+    deferrals) comes back the same way.
+
+    A worker retires after ``max_jobs_per_worker`` jobs or once its resident
+    memory passes ``max_rss_mb``, and is replaced in the background, so the
+    memory held by long-running agent state is returned to the OS instead of
+    accumulating. Workers log through the parent's pipeline.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None, initializer: Optional[Callable] = None,
+                 initargs: Sequence = ()):
+        settings = {**DEFAULT_POOL_SETTINGS, **(settings or {})}
+        self.size = max(1, settings['workers'])
+        self.max_jobs = max(1, settings['max_jobs_per_worker'])
+        self.max_rss_mb = settings['max_rss_mb']
+        self.job_timeout = settings['job_timeout']
+        self.start_timeout = settings['start_timeout']
+        # Run in each worker before it takes jobs, like multiprocessing.Pool's initializer
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self._context = _context()
+        self._idle: queue.Queue = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._log_queue = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._closed = False
+
+    def start(self):
+        """Start the workers and wait until each has its imports loaded"""
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._log_queue = self._context.Queue()
+            self._listener = logging.handlers.QueueListener(self._log_queue, _Relay())
+            self._listener.start()
+
+        started = time.monotonic()
+        workers = [self._launch() for _ in range(self.size)]
+        for worker in workers:
+            self._idle.put(self._await_ready(worker))
+        logger.info(f"🏊 Started {self.size} pool worker(s) in {time.monotonic() - started:.1f}s")
+
+    def _launch(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._log_queue, os.getcwd(), self.max_jobs, self.max_rss_mb,
+                  self.initializer, self.initargs),
+            name='posting-worker',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _await_ready(self, worker: _Worker) -> _Worker:
+        if worker.conn.poll(self.start_timeout):
+            try:
+                if worker.conn.recv()[0] == 'ready':
+                    return worker
+            except EOFError:
+                pass
+        self._discard(worker)
+        raise WorkerError(f"Pool worker did not start within {self.start_timeout}s "
+                          f"(exit code {worker.process.exitcode})")
+
+    def _discard(self, worker: _Worker):
+        worker.process.join(5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
+        with self._lock:
+            self._workers.discard(worker)
+
+    def _replace(self, worker: _Worker):
+        """Start a replacement for a retired or broken worker, then reap it, off the caller's thread"""
+        def respawn():
+            if not self._closed:
+                try:
+                    self._idle.put(self._await_ready(self._launch()))
+                except Exception as e:
+                    logger.error(f"❌ Could not replace pool worker: {str(e)}")
+            self._discard(worker)
+
+        threading.Thread(target=respawn, name='pool-respawn', daemon=True).start()
+
+    def _receive(self, worker: _Worker) -> Dict:
+        deadline = time.monotonic() + self.job_timeout
+        pid = worker.process.pid
+        while not worker.conn.poll(1):
+            if not worker.process.is_alive():
+                raise WorkerError(f"Pool worker {pid} exited with code {worker.process.exitcode} mid-job")
+            if time.monotonic() > deadline:
+                worker.process.kill()
+                raise WorkerError(f"Pool worker {pid} did not finish within {self.job_timeout}s")
+        try:
+            return worker.conn.recv()[1]
+        except EOFError:
+            raise WorkerError(f"Pool worker {pid} exited mid-job")
+
+    def run(self, payload: Dict, config: Dict) -> Dict:
+        """Run one job payload in an idle worker and return its result"""
+        self.start()
+        try:
+            worker = self._idle.get(timeout=self.job_timeout)
+        except queue.Empty:
+            raise WorkerError(f"No pool worker became available within {self.job_timeout}s")
+
+        reply = None
+        try:
+            worker.conn.send(('run', payload, config))
+            reply = self._receive(worker)
+        finally:
+            if reply is not None and not reply['retire']:
+                self._idle.put(worker)
+            else:
+                self._replace(worker)
+
+        if reply['retire']:
+            rss = f", {reply['rss_mb']:.0f} MB resident" if reply['rss_mb'] else ""
+            logger.info(f"♻️ Recycling pool worker {worker.process.pid} after {reply['jobs']} job(s){rss}")
+        return reply['result']
+
+    def stop(self):
+        """Ask every worker to exit and stop relaying their logs"""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker.conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            self._discard(worker)
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None